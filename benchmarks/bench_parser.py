@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass SQL parser against the sqlparse path.
+
+Usage:
+    python benchmarks/bench_parser.py [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sql_to_mongodb.sql_parser import SQLParser
+
+QUERIES = [
+    "SELECT name, age FROM users WHERE age > 18",
+    "SELECT * FROM users WHERE status = 'active' AND age >= 21",
+    "SELECT id, total FROM orders WHERE customer_id = 42 AND total > 100.5 ORDER BY total DESC LIMIT 10",
+    "SELECT sku FROM products WHERE category IN ('books', 'music', 'film')",
+    "UPDATE users SET age = 26 WHERE name = 'John'",
+    "DELETE FROM sessions WHERE expires_at < '2024-01-01'",
+    "INSERT INTO users (name, age) VALUES ('John', 25)",
+]
+
+def _statements_per_second(parse, queries, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            parse(query)
+    elapsed = time.perf_counter() - start
+    return (repeat * len(queries)) / elapsed
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--repeat", type=int, default=2000, help="passes over the query set")
+    args = arg_parser.parse_args()
+
+    fast = SQLParser()
+    slow = SQLParser(use_fast_parser=False)
+
+    fast_rate = _statements_per_second(fast.parse, QUERIES, args.repeat)
+    slow_rate = _statements_per_second(slow.parse, QUERIES, max(1, args.repeat // 10))
+
+    print(f"{'parser':<12}{'statements/sec':>18}")
+    print(f"{'sqlparse':<12}{slow_rate:>18,.0f}")
+    print(f"{'fast':<12}{fast_rate:>18,.0f}")
+    print(f"speedup: {fast_rate / slow_rate:.1f}x")
+
+if __name__ == "__main__":
+    main()
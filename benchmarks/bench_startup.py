@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark import time of the core package and the web app in fresh interpreters.
+
+Fails (exit status 1) if an import exceeds its budget or if importing the
+core package or the web app pulls in langchain.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--max-core-ms MS] [--max-web-ms MS]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Prints the import time in ms and whether any langchain module was loaded
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(elapsed, any(name.split('.')[0].startswith('langchain') for name in sys.modules))
+"""
+
+def _measure(module, runs):
+    """Return (median ms, langchain loaded) over runs fresh interpreters."""
+    timings = []
+    loaded = False
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.split()
+        timings.append(float(output[0]))
+        loaded = loaded or output[1] == "True"
+    return statistics.median(timings), loaded
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    arg_parser.add_argument("--max-core-ms", type=float, default=150.0)
+    arg_parser.add_argument("--max-web-ms", type=float, default=2500.0)
+    args = arg_parser.parse_args()
+
+    budgets = [("sql_to_mongodb", args.max_core_ms), ("web.main", args.max_web_ms)]
+    failed = False
+    print(f"{'module':<18}{'median ms':>12}{'budget ms':>12}  langchain")
+    for module, budget in budgets:
+        try:
+            elapsed, loaded = _measure(module, args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<18}{'error':>12}{budget:>12.0f}  {e.stderr.strip().splitlines()[-1]}")
+            failed = True
+            continue
+        ok = elapsed <= budget and not loaded
+        failed = failed or not ok
+        print(f"{module:<18}{elapsed:>12.1f}{budget:>12.0f}  {'loaded' if loaded else 'not loaded'}"
+              f"{'' if ok else '  FAIL'}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
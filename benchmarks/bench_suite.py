@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite with regression thresholds against a stored JSON baseline.
+
+Times SQLParser.parse, MongoDBQueryBuilder.build and translate_batch over
+generated corpora of increasing complexity, plus the /translate,
+/translate/batch and /translate/stream endpoints. Throughput is the best of
+several runs; peak memory is measured in a separate traced run so tracing
+does not skew the timings.
+
+Usage:
+    python benchmarks/bench_suite.py [--baseline benchmarks/baseline.json] [--update-baseline]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import CorpusSpec, generate_corpus
+from sql_to_mongodb import SQLToMongoDBTranslator
+from sql_to_mongodb.sql_parser import SQLParser
+from sql_to_mongodb.mongodb_builder import MongoDBQueryBuilder
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+PROFILES = {
+    "simple": CorpusSpec(predicates=1, nesting=0, in_list=0, values_rows=1),
+    "default": CorpusSpec(),
+    "complex": CorpusSpec(predicates=6, nesting=2, in_list=50, values_rows=100),
+}
+
+# Fraction of --count generated per profile; complex statements are far slower
+SCALE = {"simple": 1.0, "default": 1.0, "complex": 0.05}
+
+def _measure(run, operations, repeat, min_time):
+    """
+    Return (best operations/sec, peak traced bytes) for a benchmark callable,
+    timing at least `repeat` runs and at least `min_time` seconds.
+    """
+    best = 0.0
+    runs = 0
+    deadline = time.perf_counter() + min_time
+    while runs < repeat or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        run()
+        best = max(best, operations / (time.perf_counter() - start))
+        runs += 1
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+def core_cases(count, seed):
+    """Yield (name, callable, operations) for the parser, builder and batch benchmarks."""
+    parser = SQLParser()
+    builder = MongoDBQueryBuilder()
+    for profile, spec in PROFILES.items():
+        corpus = generate_corpus(max(1, int(count * SCALE[profile])), spec, seed)
+        parsed = [parser.parse(sql) for sql in corpus]
+        yield f"parse/{profile}", lambda corpus=corpus: [parser.parse(sql) for sql in corpus], len(corpus)
+        yield f"build/{profile}", lambda parsed=parsed: [builder.build(item) for item in parsed], len(corpus)
+        # Caching is disabled so that every statement is parsed and built
+        translator = SQLToMongoDBTranslator(cache_size=0)
+        yield (f"translate_batch/{profile}",
+               lambda corpus=corpus, translator=translator: translator.translate_batch(corpus, return_errors=True),
+               len(corpus))
+
+def web_cases(count, seed):
+    """Yield (name, callable, operations) for the FastAPI endpoints, if FastAPI is installed."""
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError:
+        return
+    os.chdir(ROOT)
+    import web.main
+
+    client = TestClient(web.main.app)
+    corpus = generate_corpus(count, PROFILES["default"], seed)
+    single = corpus[:max(1, count // 10)]
+    batch = json.dumps(corpus)
+    stream = "".join(json.dumps(sql) + "\n" for sql in corpus)
+
+    yield ("endpoint/translate",
+           lambda: [client.post("/translate", data={"sql_query": sql}) for sql in single],
+           len(single))
+    yield ("endpoint/translate_batch",
+           lambda: client.post("/translate/batch", data={"sql_queries": batch}),
+           count)
+    yield ("endpoint/translate_stream",
+           lambda: client.post("/translate/stream", content=stream,
+                               headers={"content-type": "application/x-ndjson"}),
+           count)
+
+def compare(results, baseline, throughput_tolerance, memory_tolerance):
+    """
+    Compare results with a baseline.
+
+    Returns:
+        List[str]: A description of each regression beyond the tolerances
+    """
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if current["ops_per_sec"] < base["ops_per_sec"] * (1 - throughput_tolerance):
+            regressions.append(
+                f"{name}: throughput {current['ops_per_sec']:,.0f}/s < baseline {base['ops_per_sec']:,.0f}/s"
+            )
+        if current["peak_bytes"] > base["peak_bytes"] * (1 + memory_tolerance):
+            regressions.append(
+                f"{name}: peak memory {current['peak_bytes']:,} B > baseline {base['peak_bytes']:,} B"
+            )
+    return regressions
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--count", type=int, default=2000, help="statements per corpus")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="minimum timed runs per case")
+    arg_parser.add_argument("--min-time", type=float, default=1.0, help="minimum seconds timed per case")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--only", help="comma separated case name prefixes to run")
+    arg_parser.add_argument("--skip-web", action="store_true", help="skip the FastAPI endpoints")
+    arg_parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    arg_parser.add_argument("--update-baseline", action="store_true",
+                            help="write the results to the baseline instead of comparing")
+    arg_parser.add_argument("--output", help="also write the results to this JSON file")
+    arg_parser.add_argument("--throughput-tolerance", type=float, default=0.25,
+                            help="allowed fractional drop in operations/sec")
+    arg_parser.add_argument("--memory-tolerance", type=float, default=0.25,
+                            help="allowed fractional growth in peak memory")
+    args = arg_parser.parse_args()
+
+    cases = list(core_cases(args.count, args.seed))
+    if not args.skip_web:
+        cases.extend(web_cases(args.count, args.seed))
+    if args.only:
+        prefixes = tuple(args.only.split(","))
+        cases = [case for case in cases if case[0].startswith(prefixes)]
+
+    results = {}
+    print(f"{'case':<32}{'ops/sec':>14}{'peak KiB':>12}")
+    for name, run, operations in cases:
+        ops_per_sec, peak = _measure(run, operations, args.repeat, args.min_time)
+        results[name] = {"ops_per_sec": round(ops_per_sec, 1), "peak_bytes": peak}
+        print(f"{name:<32}{ops_per_sec:>14,.0f}{peak / 1024:>12,.0f}")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "count": args.count,
+            "seed": args.seed,
+            "profiles": {name: dict(spec.to_dict(), scale=SCALE[name]) for name, spec in PROFILES.items()}
+        },
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --update-baseline to create one")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("meta", {}).get("count") != args.count:
+        print("warning: baseline was recorded with a different --count")
+    regressions = compare(results, baseline, args.throughput_tolerance, args.memory_tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("no regressions against baseline")
+
+if __name__ == "__main__":
+    main()
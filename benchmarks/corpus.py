@@ -0,0 +1,122 @@
+"""
+Deterministic SQL corpus generator for benchmarks.
+
+The same seed and parameters always produce the same statements, so runs on
+different commits measure identical work.
+"""
+
+import random
+from typing import Iterator, List
+
+TABLES = ["users", "orders", "products", "sessions", "events", "invoices"]
+COLUMNS = ["id", "name", "age", "status", "total", "category", "created_at", "score", "region", "owner_id"]
+STATUSES = ["active", "inactive", "pending", "banned", "archived"]
+OPERATORS = ["=", "!=", ">", ">=", "<", "<="]
+
+class CorpusSpec:
+    """Knobs controlling the size and shape of generated statements."""
+
+    def __init__(self, predicates: int = 3, nesting: int = 0, in_list: int = 5,
+                 values_rows: int = 10, mix: str = "select:6,insert:2,update:1,delete:1"):
+        """
+        Args:
+            predicates (int): AND-ed conditions per WHERE clause
+            nesting (int): Depth of parenthesized OR groups in each WHERE clause
+            in_list (int): Items in IN lists (0 disables IN predicates)
+            values_rows (int): Rows per INSERT ... VALUES
+            mix (str): Relative weights of statement kinds, "kind:weight,..."
+        """
+        self.predicates = predicates
+        self.nesting = nesting
+        self.in_list = in_list
+        self.values_rows = values_rows
+        self.mix = [(kind, int(weight)) for kind, weight in
+                    (item.split(":") for item in mix.split(","))]
+
+    def to_dict(self):
+        return {
+            "predicates": self.predicates,
+            "nesting": self.nesting,
+            "in_list": self.in_list,
+            "values_rows": self.values_rows,
+            "mix": ",".join(f"{kind}:{weight}" for kind, weight in self.mix)
+        }
+
+class CorpusGenerator:
+    """Generate SQL statements from a CorpusSpec with a seeded random source."""
+
+    def __init__(self, spec: CorpusSpec = None, seed: int = 0):
+        self.spec = spec or CorpusSpec()
+        self.random = random.Random(seed)
+        self._kinds = [kind for kind, weight in self.spec.mix for _ in range(weight)]
+
+    def _literal(self, column: str) -> str:
+        if column in ("name", "status", "category", "region"):
+            return f"'{self.random.choice(STATUSES)}{self.random.randint(0, 99)}'"
+        if column == "created_at":
+            return f"'2024-{self.random.randint(1, 12):02d}-{self.random.randint(1, 28):02d}'"
+        if column in ("total", "score"):
+            return f"{self.random.uniform(0, 1000):.2f}"
+        return str(self.random.randint(0, 100000))
+
+    def _condition(self, column: str) -> str:
+        if self.spec.in_list and self.random.random() < 0.25:
+            items = ", ".join(self._literal(column) for _ in range(self.spec.in_list))
+            return f"{column} IN ({items})"
+        return f"{column} {self.random.choice(OPERATORS)} {self._literal(column)}"
+
+    def _group(self, depth: int) -> str:
+        first, second = self.random.sample(COLUMNS, 2)
+        if depth <= 1:
+            return f"({self._condition(first)} OR {self._condition(second)})"
+        return f"({self._condition(first)} OR ({self._condition(second)} AND {self._group(depth - 1)}))"
+
+    def _where(self) -> str:
+        count = min(self.spec.predicates, len(COLUMNS))
+        conditions = [self._condition(column) for column in self.random.sample(COLUMNS, count)]
+        if self.spec.nesting:
+            conditions.append(self._group(self.spec.nesting))
+        return " WHERE " + " AND ".join(conditions) if conditions else ""
+
+    def statement(self) -> str:
+        """Generate the next statement."""
+        kind = self.random.choice(self._kinds)
+        table = self.random.choice(TABLES)
+        if kind == "select":
+            columns = ", ".join(self.random.sample(COLUMNS, self.random.randint(1, 4)))
+            sql = f"SELECT {columns} FROM {table}{self._where()}"
+            if self.random.random() < 0.5:
+                sql += f" ORDER BY {self.random.choice(COLUMNS)} {self.random.choice(['ASC', 'DESC'])}"
+            if self.random.random() < 0.5:
+                sql += f" LIMIT {self.random.randint(1, 1000)}"
+            return sql
+        if kind == "insert":
+            columns = self.random.sample(COLUMNS, self.random.randint(2, 5))
+            rows = ", ".join(
+                "(" + ", ".join(self._literal(column) for column in columns) + ")"
+                for _ in range(max(1, self.spec.values_rows))
+            )
+            return f"INSERT INTO {table} ({', '.join(columns)}) VALUES {rows}"
+        if kind == "update":
+            column = self.random.choice(COLUMNS)
+            return f"UPDATE {table} SET {column} = {self._literal(column)}{self._where()}"
+        return f"DELETE FROM {table}{self._where()}"
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            yield self.statement()
+
+def generate_corpus(count: int, spec: CorpusSpec = None, seed: int = 0) -> List[str]:
+    """
+    Generate a reproducible list of SQL statements.
+
+    Args:
+        count (int): Number of statements
+        spec (CorpusSpec): Size and shape of the statements
+        seed (int): Random seed
+
+    Returns:
+        List[str]: The statements
+    """
+    generator = CorpusGenerator(spec, seed)
+    return [generator.statement() for _ in range(count)]
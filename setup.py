@@ -37,6 +37,9 @@ setup(
     entry_points={
         "console_scripts": [
             "sql-to-mongodb=run_webapp:main",
+            "sql-to-mongodb-dump=sql_to_mongodb.cli:main",
+            "sql-to-mongodb-migrate=sql_to_mongodb.migration:main",
+            "sql-to-mongodb-log=sql_to_mongodb.query_log:main",
         ],
     },
 ) 
\ No newline at end of file
@@ -1,19 +1,73 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, AsyncIterator
 from langchain.agents import Tool, AgentExecutor, create_react_agent
 from langchain.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain_community.llms import Ollama
-from langchain.schema import AgentAction, AgentFinish
 from langchain.tools import BaseTool
-from langchain.chains import LLMChain
+from langchain.callbacks.base import BaseCallbackHandler
 from .translator import SQLToMongoDBTranslator
+from .explanations import ExplanationCache
+from .router import IntentRouter, TRANSLATE, VALIDATE, EXPLAIN, AGENT
+from .instrumentation import timed, record
+from concurrent.futures import Executor
+from functools import partial
+import asyncio
+import time
 import re
 import json
 import os
 
+# Heading of each answer in a packed explanation prompt
+_SECTION_RE = re.compile(r"^\W*Query\s+(\d+)\b[^\n]*$", re.IGNORECASE | re.MULTILINE)
+
+async def _single(awaitable) -> AsyncIterator[Any]:
+    yield await awaitable
+
+class TimingCallbackHandler(BaseCallbackHandler):
+    """Report the LLM and tool calls made inside the ReAct loop to the instrumentation hooks."""
+
+    def __init__(self):
+        self._started: Dict[Any, float] = {}
+        self._tools: Dict[Any, str] = {}
+
+    def _finish(self, stage: str, run_id: Any, labels: Dict[str, str], error: Optional[BaseException] = None) -> None:
+        start = self._started.pop(run_id, None)
+        if start is not None:
+            record(stage, time.perf_counter() - start, labels, error)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        self._finish("agent.llm", run_id, {"path": "agent"})
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        self._finish("agent.llm", run_id, {"path": "agent"}, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs) -> None:
+        self._tools[run_id] = (serialized or {}).get("name", "unknown")
+        self._started[run_id] = time.perf_counter()
+
+    def on_tool_end(self, output, *, run_id, **kwargs) -> None:
+        self._finish("agent.tool", run_id, {"tool": self._tools.pop(run_id, "unknown")})
+
+    def on_tool_error(self, error, *, run_id, **kwargs) -> None:
+        self._finish("agent.tool", run_id, {"tool": self._tools.pop(run_id, "unknown")}, error)
+
 class SQLToMongoDBAgent:
-    def __init__(self, llm_type: str = "ollama", model_name: str = "llama2", openai_api_key: str = None):
-        self.translator = SQLToMongoDBTranslator()
+    def __init__(self, llm_type: str = "ollama", model_name: str = "llama2", openai_api_key: str = None,
+                 explanation_cache: Optional[ExplanationCache] = None,
+                 router: Optional[IntentRouter] = None,
+                 translator: Optional[SQLToMongoDBTranslator] = None,
+                 executor: Optional[Executor] = None):
+        self.translator = translator or SQLToMongoDBTranslator()
+        # Thread pool the async methods translate on; None uses the loop's default
+        self.executor = executor
+        self.explanations = explanation_cache or ExplanationCache()
+        self.router = router or IntentRouter()
         self.llm = self._create_llm(llm_type, model_name, openai_api_key)
         self.tools = self._create_tools()
         self.agent_executor = self._create_agent()
@@ -133,24 +187,233 @@ Question: {input}
         return AgentExecutor.from_agent_and_tools(
             agent=agent,
             tools=self.tools,
-            verbose=True
+            verbose=True,
+            callbacks=[TimingCallbackHandler()]
         )
 
+    def _explanation_prompt(self, sql_query: str, mongodb_query: Dict[str, Any]) -> str:
+        return f"""Explain how this SQL query:
+                {sql_query}
+                was translated to this MongoDB query:
+                {json.dumps(mongodb_query, indent=2, default=str)}
+                Focus on the key transformations and MongoDB concepts used."""
+
+    def _packed_prompt(self, translations: List[Any]) -> str:
+        sections = "\n\n".join(
+            f"### Query {number}\nSQL: {sql_query}\nMongoDB: {json.dumps(mongodb_query, default=str)}"
+            for number, (sql_query, mongodb_query) in enumerate(translations, 1)
+        )
+        return f"""Explain how each of these SQL queries was translated to MongoDB.
+                Answer each one under its own "### Query N" heading, in the same order,
+                focusing on the key transformations and MongoDB concepts used.
+
+{sections}"""
+
+    def _split_packed(self, text: str, count: int) -> List[Optional[str]]:
+        """Split a packed answer into one section per query; unanswered queries are None."""
+        sections: List[Optional[str]] = [None] * count
+        parts = _SECTION_RE.split(text)
+        for number, section in zip(parts[1::2], parts[2::2]):
+            index = int(number) - 1
+            if 0 <= index < count and section.strip() and sections[index] is None:
+                sections[index] = section.strip()
+        return sections
+
+    def _response_text(self, response: Any) -> str:
+        """Chat models return a message, plain LLMs return a string."""
+        return getattr(response, "content", response)
+
     def _explain_translation(self, sql_query: str) -> str:
         """Explain how a SQL query was translated to MongoDB."""
         try:
             mongodb_query = self.translator.translate(sql_query)
-            explanation = self.llm.invoke(
-                f"""Explain how this SQL query:
-                {sql_query}
-                was translated to this MongoDB query:
-                {json.dumps(mongodb_query, indent=2)}
-                Focus on the key transformations and MongoDB concepts used."""
+            prompt = self._explanation_prompt(sql_query, mongodb_query)
+            return self.explanations.get_or_compute(
+                self.explanations.key(sql_query, mongodb_query),
+                lambda: self._invoke_llm(prompt)
+            )
+        except Exception as e:
+            return f"Error explaining translation: {str(e)}"
+
+    def _invoke_llm(self, prompt: str) -> str:
+        """Call the LLM directly, outside the ReAct loop."""
+        with timed("agent.llm", path="direct"):
+            return self._response_text(self.llm.invoke(prompt))
+
+    async def _ainvoke_llm(self, prompt: str) -> str:
+        """Call the LLM without blocking the event loop."""
+        with timed("agent.llm", path="direct"):
+            if hasattr(self.llm, "ainvoke"):
+                response = await self.llm.ainvoke(prompt)
+            else:
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(None, self.llm.invoke, prompt)
+        return self._response_text(response)
+
+    def _run_sync(self, func, *args):
+        """Run CPU-bound translation work on the executor, off the event loop."""
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, partial(func, *args))
+
+    def _translate_each(self, sql_queries: List[str]) -> List[Any]:
+        """Translate each query, returning the exception in place of any that fail."""
+        translations = []
+        for sql_query in sql_queries:
+            try:
+                translations.append(self.translator.translate(sql_query))
+            except Exception as e:
+                translations.append(e)
+        return translations
+
+    async def _aexplain_translation(self, sql_query: str) -> str:
+        """Async variant of _explain_translation."""
+        try:
+            mongodb_query = await self._run_sync(self.translator.translate, sql_query)
+            prompt = self._explanation_prompt(sql_query, mongodb_query)
+            return await self.explanations.aget_or_compute(
+                self.explanations.key(sql_query, mongodb_query),
+                lambda: self._ainvoke_llm(prompt)
             )
-            return explanation.content
         except Exception as e:
             return f"Error explaining translation: {str(e)}"
 
+    async def aexplain_batch(self, sql_queries: List[str], concurrency: int = 4, pack_size: int = 4,
+                             pack_chars: int = 1200) -> List[Dict[str, Any]]:
+        """
+        Explain several translations with concurrent LLM calls.
+
+        At most `concurrency` LLM calls run at once. Short translations are
+        packed up to `pack_size` per prompt and the answer is split on its
+        per-query headings; queries the answer leaves out are retried on
+        their own. Cached explanations and repeated query shapes cost no
+        extra calls.
+
+        Args:
+            sql_queries (List[str]): The SQL queries to explain
+            concurrency (int): Maximum LLM calls in flight
+            pack_size (int): Maximum translations per prompt; 1 disables packing
+            pack_chars (int): Translations longer than this many characters
+                (SQL plus MongoDB JSON) get a prompt of their own
+
+        Returns:
+            List[Dict[str, Any]]: One result per query, in order, with
+                "explanation" on success and "message" on error
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(sql_queries)
+        translations: Dict[str, Any] = {}
+        positions: List[Any] = []
+        mongodb_queries = await self._run_sync(self._translate_each, sql_queries)
+        for index, (sql_query, mongodb_query) in enumerate(zip(sql_queries, mongodb_queries)):
+            if isinstance(mongodb_query, Exception):
+                results[index] = {"sql_query": sql_query, "status": "error",
+                                  "message": str(mongodb_query)}
+                continue
+            key = self.explanations.key(sql_query, mongodb_query)
+            translations.setdefault(key, (sql_query, mongodb_query))
+            positions.append((index, key))
+
+        # Cached explanations are answered without a call; the rest are grouped into prompts
+        groups: List[List[str]] = []
+        pack: List[str] = []
+        for key, (sql_query, mongodb_query) in translations.items():
+            if await self.explanations.aget(key) is not None:
+                groups.append([key])
+            elif pack_size <= 1 or len(sql_query) + len(json.dumps(mongodb_query, default=str)) > pack_chars:
+                groups.append([key])
+            else:
+                pack.append(key)
+                if len(pack) == pack_size:
+                    groups.append(pack)
+                    pack = []
+        if pack:
+            groups.append(pack)
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def call(prompt: str) -> str:
+            async with semaphore:
+                return await self._ainvoke_llm(prompt)
+
+        async def explain_one(key: str) -> Any:
+            # Errors are returned per key so one query cannot fail the rest of its pack
+            try:
+                return await call(self._explanation_prompt(*translations[key]))
+            except Exception as e:
+                return e
+
+        async def compute(keys: List[str]) -> Dict[str, Any]:
+            explanations: Dict[str, Any] = {}
+            if len(keys) > 1:
+                try:
+                    answer = await call(self._packed_prompt([translations[key] for key in keys]))
+                except Exception:
+                    # Retried one query at a time below
+                    answer = ""
+                explanations = {key: section for key, section in zip(keys, self._split_packed(answer, len(keys)))
+                                if section is not None}
+            missing = [key for key in keys if key not in explanations]
+            explanations.update(zip(missing, await asyncio.gather(*(explain_one(key) for key in missing))))
+            return explanations
+
+        explained: Dict[str, Any] = {}
+        outcomes = await asyncio.gather(
+            *(self.explanations.aget_or_compute_many(keys, compute) for keys in groups),
+            return_exceptions=True
+        )
+        for keys, outcome in zip(groups, outcomes):
+            for key in keys:
+                explained[key] = outcome if isinstance(outcome, BaseException) else outcome[key]
+
+        for index, key in positions:
+            explanation = explained[key]
+            if isinstance(explanation, BaseException):
+                results[index] = {"sql_query": sql_queries[index], "status": "error",
+                                  "message": str(explanation)}
+            else:
+                results[index] = {"sql_query": sql_queries[index], "status": "success",
+                                  "explanation": explanation}
+        return results
+
+    def explain_batch(self, sql_queries: List[str], **options: Any) -> List[Dict[str, Any]]:
+        """Synchronous variant of aexplain_batch; takes the same options."""
+        return asyncio.run(self.aexplain_batch(sql_queries, **options))
+
+    async def _astream_llm(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the completion as the LLM generates it; LLMs that cannot stream yield it whole."""
+        start = time.perf_counter()
+        first = True
+        with timed("agent.llm", path="stream"):
+            if hasattr(self.llm, "astream"):
+                chunks = self.llm.astream(prompt)
+            else:
+                chunks = _single(self._ainvoke_llm(prompt))
+            async for chunk in chunks:
+                text = self._response_text(chunk)
+                if not text:
+                    continue
+                if first:
+                    record("agent.llm.first_token", time.perf_counter() - start, {"path": "stream"})
+                    first = False
+                yield text
+
+    async def astream_explanation(self, sql_query: str) -> AsyncIterator[str]:
+        """
+        Stream the explanation of a translation as the LLM generates it.
+
+        Cached explanations, and ones another request is already generating,
+        are yielded in one piece.
+
+        Raises:
+            ValueError: If the query cannot be translated
+        """
+        mongodb_query = await self._run_sync(self.translator.translate, sql_query)
+        prompt = self._explanation_prompt(sql_query, mongodb_query)
+        async for chunk in self.explanations.astream_or_compute(
+            self.explanations.key(sql_query, mongodb_query),
+            lambda: self._astream_llm(prompt)
+        ):
+            yield chunk
+
     def _validate_sql(self, sql_query: str) -> Dict[str, Any]:
         """Validate if a SQL query is valid and can be translated."""
         try:
@@ -166,9 +429,37 @@ Question: {input}
                 "message": f"Invalid SQL query: {str(e)}"
             }
 
+    def _direct_response(self, intent: str, sql_query: str, explanation: Optional[str] = None) -> Dict[str, Any]:
+        """Answer a request the router mapped onto a single tool."""
+        if intent == TRANSLATE:
+            mongodb_query = self.translator.translate(sql_query)
+            return {
+                "status": "success",
+                "route": intent,
+                "response": json.dumps(mongodb_query, indent=2, default=str),
+                "mongodb_query": mongodb_query
+            }
+        if intent == VALIDATE:
+            validation = self._validate_sql(sql_query)
+            return {
+                "status": "success",
+                "route": intent,
+                "response": validation["message"],
+                "validation": validation
+            }
+        return {
+            "status": "success",
+            "route": intent,
+            "response": explanation
+        }
+
     def process_request(self, request: str) -> Dict[str, Any]:
         """
         Process a user request using the agent.
+
+        Plain SQL and simple translate/validate/explain requests are answered
+        by calling the matching tool directly; everything else goes through
+        the ReAct agent.
         
         Args:
             request (str): The user's request
@@ -177,9 +468,45 @@ Question: {input}
             Dict[str, Any]: The agent's response
         """
         try:
-            response = self.agent_executor.invoke({"input": request})
+            intent, sql_query = self.router.classify(request)
+            with timed("agent.request", route=intent):
+                if intent == EXPLAIN:
+                    return self._direct_response(intent, sql_query, self._explain_translation(sql_query))
+                if intent != AGENT:
+                    return self._direct_response(intent, sql_query)
+                response = self.agent_executor.invoke({"input": request})
+            return {
+                "status": "success",
+                "route": AGENT,
+                "response": response["output"]
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": str(e)
+            }
+
+    async def aprocess_request(self, request: str) -> Dict[str, Any]:
+        """
+        Async variant of process_request for use from the web app.
+
+        Args:
+            request (str): The user's request
+
+        Returns:
+            Dict[str, Any]: The agent's response
+        """
+        try:
+            intent, sql_query = self.router.classify(request)
+            with timed("agent.request", route=intent):
+                if intent == EXPLAIN:
+                    return self._direct_response(intent, sql_query, await self._aexplain_translation(sql_query))
+                if intent != AGENT:
+                    return await self._run_sync(self._direct_response, intent, sql_query)
+                response = await self.agent_executor.ainvoke({"input": request})
             return {
                 "status": "success",
+                "route": AGENT,
                 "response": response["output"]
             }
         except Exception as e:
@@ -0,0 +1,214 @@
+import json
+from typing import Dict, List, Any, Iterable, Iterator, Optional
+from .pipeline import filter_fields
+from .predicates import pinned_fields
+
+# Update operators whose effects on one field do not depend on the order they are applied in
+_COMMUTATIVE_OPERATORS = frozenset(["$inc", "$mul", "$min", "$max"])
+
+def _document_size(document: Dict[str, Any]) -> int:
+    """Approximate the encoded size of a document in bytes."""
+    return len(json.dumps(document, separators=(",", ":"), default=str))
+
+def coalesce_inserts(mongodb_queries: Iterable[Dict[str, Any]], max_batch_size: int = 1000,
+                     max_batch_bytes: Optional[int] = 16 * 1024 * 1024) -> Iterator[Dict[str, Any]]:
+    """
+    Merge consecutive inserts into the same collection into batched inserts.
+
+    Operation order is preserved: any other operation, or an insert into a
+    different collection, flushes the pending batch first. A batch is also
+    flushed once it reaches max_batch_size documents or max_batch_bytes of
+    (approximate) encoded document size, so a single large multi-row INSERT
+    may be split across several batches.
+
+    Args:
+        mongodb_queries (Iterable[Dict[str, Any]]): Translated queries, in order
+        max_batch_size (int): Maximum number of documents per batch
+        max_batch_bytes (Optional[int]): Maximum approximate size of a batch; None for no limit
+
+    Yields:
+        Dict[str, Any]: Translated queries with inserts batched together
+    """
+    collection = None
+    documents: List[Dict[str, Any]] = []
+    batch_bytes = 0
+
+    def flush() -> Dict[str, Any]:
+        return {
+            "collection": collection,
+            "operation": "insert",
+            "documents": documents
+        }
+
+    for query in mongodb_queries:
+        if query.get("operation") != "insert":
+            if documents:
+                yield flush()
+                documents, batch_bytes = [], 0
+            yield query
+            continue
+
+        if documents and query["collection"] != collection:
+            yield flush()
+            documents, batch_bytes = [], 0
+        collection = query["collection"]
+        for document in query["documents"]:
+            size = _document_size(document) if max_batch_bytes is not None else 0
+            if documents and (
+                len(documents) >= max_batch_size
+                or (max_batch_bytes is not None and batch_bytes + size > max_batch_bytes)
+            ):
+                yield flush()
+                documents, batch_bytes = [], 0
+            documents.append(document)
+            batch_bytes += size
+
+    if documents:
+        yield flush()
+
+def _root(field: str) -> str:
+    return field.split(".", 1)[0]
+
+class _UpdateSummary:
+    """What one update reads and writes, computed once per update."""
+
+    __slots__ = ("pinned", "reads", "writes")
+
+    def __init__(self, query: Dict[str, Any]):
+        self.pinned = pinned_fields(query["filter"])
+        fields = filter_fields(query["filter"])
+        # None when the filter uses operators whose fields cannot be listed
+        self.reads = None if fields is None else {_root(field) for field in fields}
+        self.writes = {_root(field): operator for operator, fields in query["update"].items() for field in fields}
+
+    def commutes(self, other: "_UpdateSummary") -> bool:
+        # An update that writes the pinned field can move a document into the other's reach
+        if any(field in other.pinned and other.pinned[field] != value
+               and field not in self.writes and field not in other.writes
+               for field, value in self.pinned.items()):
+            return True
+        if self.reads is None or other.reads is None:
+            return False
+        if self.writes.keys() & other.reads or other.writes.keys() & self.reads:
+            return False
+        return all(
+            self.writes[field] == other.writes[field] and self.writes[field] in _COMMUTATIVE_OPERATORS
+            for field in self.writes.keys() & other.writes.keys()
+        )
+
+def updates_commute(first: Dict[str, Any], second: Dict[str, Any]) -> bool:
+    """
+    Whether two translated updates have the same effect in either order.
+
+    They commute when their filters pin a shared field, which neither of them
+    writes, to different values, so they never touch the same document, or
+    when neither writes a field the
+    other reads or writes, except for $inc/$mul/$min/$max with the same
+    operator on the same field.
+    """
+    return _UpdateSummary(first).commutes(_UpdateSummary(second))
+
+class _UpdateBatch:
+    """Pending updates of one collection, with what they read, write and pin in aggregate."""
+
+    def __init__(self, collection: str):
+        self.collection = collection
+        self.queries: List[Dict[str, Any]] = []
+        self.summaries: List[_UpdateSummary] = []
+        self.reads: Optional[set] = set()
+        # Operator writing each field, or None once two different operators do
+        self.writes: Dict[str, Optional[str]] = {}
+        # Values each field is pinned to, and by how many updates
+        self.pinned_values: Dict[str, set] = {}
+        self.pinned_counts: Dict[str, int] = {}
+
+    def accepts(self, summary: _UpdateSummary) -> bool:
+        """Whether the update commutes with every update of the batch."""
+        # Updates by key, the usual case: a field every update pins, to other values
+        for field, value in summary.pinned.items():
+            if self.pinned_counts.get(field) == len(self.queries) and field not in self.writes \
+                    and field not in summary.writes:
+                try:
+                    if value not in self.pinned_values[field]:
+                        return True
+                except TypeError:
+                    pass
+        # Updates touching disjoint fields, or accumulating into the same ones
+        if self.reads is not None and summary.reads is not None:
+            if not (summary.writes.keys() & self.reads or self.writes.keys() & summary.reads) and all(
+                self.writes[field] == operator and operator in _COMMUTATIVE_OPERATORS
+                for field, operator in summary.writes.items() if field in self.writes
+            ):
+                return True
+        return all(summary.commutes(previous) for previous in self.summaries)
+
+    def add(self, query: Dict[str, Any], summary: _UpdateSummary) -> None:
+        self.queries.append(query)
+        self.summaries.append(summary)
+        if self.reads is not None:
+            self.reads = None if summary.reads is None else self.reads | summary.reads
+        for field, operator in summary.writes.items():
+            self.writes[field] = operator if self.writes.get(field, operator) == operator else None
+        for field, value in summary.pinned.items():
+            try:
+                self.pinned_values.setdefault(field, set()).add(value)
+            except TypeError:
+                # Unhashable values cannot take the fast path
+                continue
+            self.pinned_counts[field] = self.pinned_counts.get(field, 0) + 1
+
+    def to_query(self) -> Dict[str, Any]:
+        if len(self.queries) == 1:
+            return self.queries[0]
+        return {
+            "collection": self.collection,
+            "operation": "bulk_update",
+            "updates": [
+                {"filter": query["filter"], "update": query["update"], "options": query.get("options", {})}
+                for query in self.queries
+            ],
+            "ordered": False
+        }
+
+def coalesce_updates(mongodb_queries: Iterable[Dict[str, Any]],
+                     max_batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Group consecutive updates to the same collection into unordered bulk updates.
+
+    The updates of a bulk_update may be applied in any order, so an update
+    only joins the pending batch if it commutes with every update already in
+    it (see updates_commute); otherwise the batch is flushed first and the
+    overall order of conflicting updates is preserved. Lone updates are
+    passed through unchanged.
+
+    Args:
+        mongodb_queries (Iterable[Dict[str, Any]]): Translated queries, in order
+        max_batch_size (int): Maximum number of updates per batch
+
+    Yields:
+        Dict[str, Any]: Translated queries, with runs of updates replaced by
+            {"operation": "bulk_update", "updates": [...], "ordered": False} batches
+    """
+    batch: Optional[_UpdateBatch] = None
+    for query in mongodb_queries:
+        if query.get("operation") != "update":
+            if batch is not None:
+                yield batch.to_query()
+                batch = None
+            yield query
+            continue
+
+        summary = _UpdateSummary(query)
+        if batch is not None and (
+            query["collection"] != batch.collection
+            or len(batch.queries) >= max_batch_size
+            or not batch.accepts(summary)
+        ):
+            yield batch.to_query()
+            batch = None
+        if batch is None:
+            batch = _UpdateBatch(query["collection"])
+        batch.add(query, summary)
+
+    if batch is not None:
+        yield batch.to_query()
@@ -0,0 +1,266 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+class LRUCache:
+    """
+    Bounded in-process cache with least-recently-used eviction.
+
+    Values are stored pickled, so every hit hands back a fresh copy that the
+    caller is free to mutate, and the entry size used for byte-based eviction
+    is known up front. Entries can optionally expire after `ttl` seconds.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            Optional[Any]: A copy of the cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and entry[1] <= time.monotonic() - self.ttl:
+                del self._entries[key]
+                self._size -= len(entry[0])
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            data = entry[0]
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return pickle.loads(data)
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entries if needed.
+
+        Args:
+            key (str): The cache key
+            value (Any): The value to cache
+        """
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._entries[key] = (data, time.monotonic())
+            self._size += len(data)
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes is not None and self._size > self.max_bytes)
+            ):
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and the current cache size."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+class SQLiteCache:
+    """
+    LRU cache stored in a local SQLite file.
+
+    Every process that opens the same file shares the same entries, which lets
+    all uvicorn workers behind the web app serve from one warm cache. Entries
+    can optionally expire after `ttl` seconds, and the total size of stored
+    values can be capped with `max_bytes`. Hit, miss and eviction counters are
+    kept per process.
+    """
+
+    # Inserts between eviction sweeps; keeps the sweep off the hot path
+    SWEEP_INTERVAL = 64
+
+    def __init__(self, path: str, max_entries: int = 100000,
+                 max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(cache_entries)")]
+        if columns and "created" not in columns:
+            # Cache files from before TTL support; the entries are disposable
+            conn.execute("DROP TABLE cache_entries")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, last_access REAL NOT NULL, "
+            "created REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS cache_entries_last_access "
+            "ON cache_entries (last_access)"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key (str): The cache key
+
+        Returns:
+            Optional[Any]: A copy of the cached value, or None on a miss
+        """
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, created FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        now = time.time()
+        expired = row is not None and self.ttl is not None and row[1] <= now - self.ttl
+        if expired:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        if row is None or expired:
+            with self._lock:
+                self.misses += 1
+                self.expirations += expired
+            return None
+        conn.execute(
+            "UPDATE cache_entries SET last_access = ? WHERE key = ?", (now, key)
+        )
+        with self._lock:
+            self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a value, periodically evicting the least recently used entries.
+
+        Args:
+            key (str): The cache key
+            value (Any): The value to cache
+        """
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, last_access, created, size) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, data, now, now, len(data))
+        )
+        with self._lock:
+            self._inserts += 1
+            sweep = self._inserts % self.SWEEP_INTERVAL == 0
+        if sweep:
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """
+        Delete expired entries, then everything beyond the max_entries (and
+        max_bytes) most recently used entries.
+        """
+        expired = 0
+        if self.ttl is not None:
+            cursor = conn.execute(
+                "DELETE FROM cache_entries WHERE created <= ?", (time.time() - self.ttl,)
+            )
+            expired = max(cursor.rowcount, 0)
+        cursor = conn.execute(
+            "DELETE FROM cache_entries WHERE key IN ("
+            "SELECT key FROM cache_entries ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        evicted = max(cursor.rowcount, 0)
+        if self.max_bytes is not None:
+            total = 0
+            stale = []
+            for key, size in conn.execute(
+                "SELECT key, size FROM cache_entries ORDER BY last_access DESC"
+            ).fetchall():
+                total += size
+                if total > self.max_bytes:
+                    stale.append((key,))
+            conn.executemany("DELETE FROM cache_entries WHERE key = ?", stale)
+            evicted += len(stale)
+        with self._lock:
+            self.expirations += expired
+            self.evictions += evicted
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        self._connection().execute("DELETE FROM cache_entries")
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and the current cache size."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Translate a SQL dump file into MongoDB operations.
+
+Reads mysqldump/pg_dump output incrementally and writes one translated
+operation per statement, either as NDJSON or as a mongosh script.
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import time
+from typing import Dict, Any, Iterator, Optional, TextIO
+
+from .batching import coalesce_inserts, coalesce_updates
+from .dump_reader import DumpReader
+from .output import to_ndjson, to_mongosh
+from .translator import SQLToMongoDBTranslator
+
+DML_KEYWORDS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+class DumpStats:
+    """Counters for a dump translation run."""
+
+    def __init__(self, total_bytes: Optional[int] = None):
+        self.total_bytes = total_bytes
+        self.statements = 0
+        self.translated = 0
+        self.skipped = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    def report(self, bytes_read: int) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        progress = f"{bytes_read / 1e6:,.1f} MB"
+        if self.total_bytes:
+            progress += f" ({100.0 * bytes_read / self.total_bytes:.1f}%)"
+        return (
+            f"{progress} | {self.statements:,} statements "
+            f"({self.statements / elapsed:,.0f}/s, {bytes_read / 1e6 / elapsed:,.1f} MB/s) | "
+            f"translated {self.translated:,} skipped {self.skipped:,} failed {self.failed:,}"
+        )
+
+def _is_dml(statement: str) -> bool:
+    return statement[:6].upper().startswith(DML_KEYWORDS)
+
+def translate_dump(reader: DumpReader, output: TextIO, translator: SQLToMongoDBTranslator,
+                   output_format: str = "ndjson", workers: Optional[int] = None,
+                   chunksize: int = 256, include_errors: bool = False,
+                   batch_size: int = 1000, batch_bytes: Optional[int] = 16 * 1024 * 1024,
+                   progress: Optional[TextIO] = None, progress_interval: float = 2.0,
+                   stats: Optional[DumpStats] = None) -> DumpStats:
+    """
+    Translate every DML statement in a dump and write the results incrementally.
+
+    Args:
+        reader (DumpReader): Source of statements
+        output (TextIO): Destination for translated operations
+        translator (SQLToMongoDBTranslator): Translator to use
+        output_format (str): "ndjson" or "mongosh"
+        workers (Optional[int]): Worker processes for translation
+        chunksize (int): Statements per worker task
+        include_errors (bool): Write failed translations to the output (NDJSON only)
+        batch_size (int): Merge consecutive inserts into batches of up to this
+            many documents, and consecutive commuting updates into unordered
+            bulk updates of this many updates; 1 disables batching
+        batch_bytes (Optional[int]): Maximum approximate size of an insert batch
+        progress (Optional[TextIO]): Stream for periodic progress reports
+        progress_interval (float): Seconds between progress reports
+        stats (Optional[DumpStats]): Counters to update
+
+    Returns:
+        DumpStats: Counters for the run
+    """
+    stats = stats or DumpStats()
+    render = to_mongosh if output_format == "mongosh" else to_ndjson
+
+    def dml_statements() -> Iterator[str]:
+        for statement in reader:
+            stats.statements += 1
+            if _is_dml(statement):
+                yield statement
+            else:
+                stats.skipped += 1
+
+    def counted(results: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for result in results:
+            if result.get("status") == "error":
+                stats.failed += 1
+                if include_errors and output_format == "ndjson":
+                    yield result
+            else:
+                stats.translated += 1
+                yield result
+
+    next_report = time.perf_counter() + progress_interval
+    operations = counted(translator.translate_iter(dml_statements(), workers=workers,
+                                                   chunksize=chunksize, return_errors=True))
+    if batch_size > 1:
+        operations = coalesce_updates(coalesce_inserts(operations, batch_size, batch_bytes), batch_size)
+    for operation in operations:
+        output.write(render(operation))
+        if progress is not None and time.perf_counter() >= next_report:
+            progress.write(stats.report(reader.bytes_read) + "\n")
+            progress.flush()
+            next_report = time.perf_counter() + progress_interval
+    return stats
+
+def _open_input(path: str):
+    if path == "-":
+        return sys.stdin.buffer, None
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb"), None
+    return open(path, "rb"), os.path.getsize(path)
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        prog="sql-to-mongodb-dump",
+        description="Translate a SQL dump file into MongoDB operations."
+    )
+    arg_parser.add_argument("input", help="SQL dump file (.sql or .sql.gz), or - for stdin")
+    arg_parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    arg_parser.add_argument("-f", "--format", choices=("ndjson", "mongosh"), default="ndjson",
+                            help="output format (default: ndjson)")
+    arg_parser.add_argument("--dialect", choices=("mysql", "postgres"), default="mysql",
+                            help="dump dialect, controls quoting rules (default: mysql)")
+    arg_parser.add_argument("--schema", help="JSON file of collection field types used to type literals")
+    arg_parser.add_argument("--workers", type=int, default=None,
+                            help="translate in this many worker processes")
+    arg_parser.add_argument("--chunksize", type=int, default=256,
+                            help="statements per worker task (default: 256)")
+    arg_parser.add_argument("--include-errors", action="store_true",
+                            help="write failed translations to NDJSON output as error entries")
+    arg_parser.add_argument("--batch-size", type=int, default=1000,
+                            help="merge consecutive inserts into batches of this many documents, and "
+                                 "consecutive updates into bulk updates; 1 disables batching (default: 1000)")
+    arg_parser.add_argument("--batch-bytes", type=int, default=16 * 1024 * 1024,
+                            help="maximum approximate size of an insert batch in bytes (default: 16 MiB)")
+    arg_parser.add_argument("--progress-interval", type=float, default=2.0,
+                            help="seconds between progress reports on stderr (default: 2)")
+    arg_parser.add_argument("-q", "--quiet", action="store_true", help="suppress progress reports")
+    args = arg_parser.parse_args(argv)
+
+    stream, total_bytes = _open_input(args.input)
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    progress = None if args.quiet else sys.stderr
+    reader = DumpReader(stream, dialect=args.dialect)
+    stats = DumpStats(total_bytes)
+    try:
+        translate_dump(
+            reader,
+            output,
+            SQLToMongoDBTranslator(cache_size=0, schema=args.schema),
+            output_format=args.format,
+            workers=args.workers,
+            chunksize=args.chunksize,
+            include_errors=args.include_errors,
+            batch_size=args.batch_size,
+            batch_bytes=args.batch_bytes,
+            progress=progress,
+            progress_interval=args.progress_interval,
+            stats=stats
+        )
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+        if output is not sys.stdout:
+            output.close()
+    if progress is not None:
+        progress.write("done: " + stats.report(reader.bytes_read) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Differential testing of translated queries against SQLite.
+
+Random SELECT statements run twice over the same generated rows: in SQLite
+as SQL, and through the translator and the in-memory evaluator as MongoDB
+queries. Any difference in the returned rows is a translation bug.
+
+Usage:
+    python -m sql_to_mongodb.differential [--cases 5000] [--rows 200] [--seed 0] [--columnar]
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Any, Optional, Tuple
+from .evaluator import compile_query, compile_query_columnar, ColumnarBatch
+from .translator import SQLToMongoDBTranslator
+
+TABLE = "people"
+# Column name, SQLite type
+COLUMNS = [("id", "INTEGER PRIMARY KEY"), ("age", "INTEGER"), ("score", "REAL"),
+           ("name", "TEXT"), ("status", "TEXT")]
+NAMES = ["Ann", "ann", "ANNA", "Bob", "bob_", "b%c", "Carl", "carla", "Dave", "d.ve", ""]
+STATUSES = ["active", "inactive", "pending", "Active"]
+LIKE_PATTERNS = ["ann", "Ann", "a%", "A%", "%a", "%n%", "_o%", "b!%c", "b!_%", "%", "d.v_", "C_rl%"]
+
+class Dataset:
+    """
+    Generated rows, loaded both into an in-memory SQLite table and as documents.
+
+    NULL columns are stored as null fields in half of the documents and left
+    out of the other half, so both of MongoDB's ways of storing a SQL NULL
+    are exercised.
+    """
+
+    def __init__(self, rows: int = 200, seed: int = 0, null_rate: float = 0.15):
+        rng = random.Random(seed)
+
+        def maybe(value: Any) -> Any:
+            return None if rng.random() < null_rate else value
+
+        self.rows: List[Tuple[Any, ...]] = [
+            (i, maybe(rng.randint(0, 60)), maybe(round(rng.uniform(-5, 5), 1)),
+             maybe(rng.choice(NAMES)), maybe(rng.choice(STATUSES)))
+            for i in range(1, rows + 1)
+        ]
+        self.columns = [name for name, _ in COLUMNS]
+        self.documents: List[Dict[str, Any]] = []
+        for index, row in enumerate(self.rows):
+            document = {"_id": row[0]}
+            for column, value in zip(self.columns, row):
+                if value is not None or index % 2:
+                    document[column] = value
+            self.documents.append(document)
+        self.connection = sqlite3.connect(":memory:")
+        # Standard SQL LIKE is case-sensitive; SQLite's is not by default
+        self.connection.execute("PRAGMA case_sensitive_like = ON")
+        self.connection.execute(f"CREATE TABLE {TABLE} ({', '.join(f'{c} {t}' for c, t in COLUMNS)})")
+        self.connection.executemany(f"INSERT INTO {TABLE} VALUES ({', '.join('?' * len(COLUMNS))})", self.rows)
+        self._batch: Optional[ColumnarBatch] = None
+
+    @property
+    def batch(self) -> ColumnarBatch:
+        if self._batch is None:
+            self._batch = ColumnarBatch(self.documents)
+        return self._batch
+
+class QueryGenerator:
+    """
+    Random SELECT statements over the Dataset table.
+
+    Each statement is produced twice: as the SQL the translator reads and as
+    the equivalent SQL SQLite runs, which differ only where SQLite lacks the
+    syntax (ILIKE becomes LIKE on lower-cased operands). ORDER BY always ends
+    with the primary key, so results with LIMIT and OFFSET are deterministic.
+    """
+
+    def __init__(self, seed: int = 0, max_depth: int = 3):
+        self.random = random.Random(seed)
+        self.max_depth = max_depth
+
+    def _literal(self, column: str, null_rate: float = 0.0) -> str:
+        if self.random.random() < null_rate:
+            # Comparisons with NULL are unknown in SQL and must select nothing
+            return "NULL"
+        if column in ("id", "age"):
+            return str(self.random.randint(-1, 61))
+        if column == "score":
+            return f"{self.random.uniform(-5, 5):.1f}"
+        value = self.random.choice(NAMES if column == "name" else STATUSES)
+        return "'" + value.replace("'", "''") + "'"
+
+    def _comparison(self) -> Tuple[str, str]:
+        column = self.random.choice(["id", "age", "score", "name", "status"])
+        kind = self.random.random()
+        if kind < 0.4:
+            operator = self.random.choice(["=", "!=", "<>", "<", "<=", ">", ">="])
+            sql = f"{column} {operator} {self._literal(column, 0.1)}"
+        elif kind < 0.55:
+            items = ", ".join(self._literal(column, 0.1) for _ in range(self.random.randint(1, 4)))
+            sql = f"{column} {self.random.choice(['IN', 'NOT IN'])} ({items})"
+        elif kind < 0.65:
+            low, high = sorted([self._literal(column), self._literal(column)])
+            sql = f"{column} BETWEEN {low} AND {high}"
+        elif kind < 0.75:
+            sql = f"{column} IS {self.random.choice(['', 'NOT '])}NULL"
+        else:
+            column = self.random.choice(["name", "status"])
+            pattern = self.random.choice(LIKE_PATTERNS)
+            escape = " ESCAPE '!'" if "!" in pattern else ""
+            negated = self.random.choice(["", "NOT "])
+            if self.random.random() < 0.3:
+                return (f"{column} {negated}ILIKE '{pattern}'{escape}",
+                        f"lower({column}) {negated}LIKE lower('{pattern}'){escape}")
+            sql = f"{column} {negated}LIKE '{pattern}'{escape}"
+        return sql, sql
+
+    def _condition(self, depth: int) -> Tuple[str, str]:
+        choice = self.random.random()
+        if depth >= self.max_depth or choice < 0.45:
+            return self._comparison()
+        if choice < 0.55:
+            translated, sqlite = self._condition(depth + 1)
+            return f"NOT ({translated})", f"NOT ({sqlite})"
+        joiner = self.random.choice([" AND ", " OR "])
+        parts = [self._condition(depth + 1) for _ in range(self.random.randint(2, 3))]
+        return ("(" + joiner.join(part[0] for part in parts) + ")",
+                "(" + joiner.join(part[1] for part in parts) + ")")
+
+    def statement(self) -> Tuple[str, str]:
+        """Generate the next (translator SQL, SQLite SQL) pair."""
+        columns = [name for name, _ in COLUMNS]
+        selected = "*" if self.random.random() < 0.3 else \
+            ", ".join(self.random.sample(columns, self.random.randint(1, len(columns))))
+        translated = sqlite = f"SELECT {selected} FROM {TABLE}"
+        if self.random.random() < 0.9:
+            where = self._condition(0)
+            translated += f" WHERE {where[0]}"
+            sqlite += f" WHERE {where[1]}"
+        if self.random.random() < 0.5:
+            keys = self.random.sample(["age", "score", "name", "status"], self.random.randint(1, 2))
+            order = ", ".join(f"{key} {self.random.choice(['ASC', 'DESC'])}" for key in keys) + ", id"
+            tail = f" ORDER BY {order}"
+            if self.random.random() < 0.6:
+                tail += f" LIMIT {self.random.randint(1, 30)}"
+                if self.random.random() < 0.4:
+                    tail += f" OFFSET {self.random.randint(0, 20)}"
+            translated += tail
+            sqlite += tail
+        return translated, sqlite
+
+class DifferentialHarness:
+    """Runs statements in SQLite and through the translator, and compares the rows."""
+
+    def __init__(self, dataset: Optional[Dataset] = None, translator: Optional[SQLToMongoDBTranslator] = None,
+                 columnar: bool = False):
+        """
+        Args:
+            dataset (Optional[Dataset]): Rows to query; defaults to Dataset()
+            translator (Optional[SQLToMongoDBTranslator]): Translator under test
+            columnar (bool): Evaluate with the NumPy columnar path
+        """
+        self.dataset = dataset or Dataset()
+        self.translator = translator or SQLToMongoDBTranslator(cache_size=0)
+        self.columnar = columnar
+
+    def check(self, sql_query: str, sqlite_query: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Compare one statement's results.
+
+        Args:
+            sql_query (str): Statement given to the translator
+            sqlite_query (Optional[str]): Equivalent statement for SQLite; defaults to sql_query
+
+        Returns:
+            Dict[str, Any]: "status" is "match", "mismatch" or "error", with
+                the MongoDB query and both row lists for mismatches
+        """
+        try:
+            mongodb_query = self.translator.translate(sql_query)
+            if self.columnar:
+                documents = compile_query_columnar(mongodb_query)(self.dataset.batch)
+            else:
+                documents = compile_query(mongodb_query)(self.dataset.documents)
+        except Exception as e:
+            return {"status": "error", "sql_query": sql_query, "message": f"{type(e).__name__}: {e}"}
+
+        cursor = self.dataset.connection.execute(sqlite_query or sql_query)
+        columns = [description[0] for description in cursor.description]
+        expected = cursor.fetchall()
+        actual = [tuple(map(document.get, columns)) for document in documents]
+        if actual == expected or "ORDER BY" not in sql_query.upper() and Counter(actual) == Counter(expected):
+            return {"status": "match"}
+        return {"status": "mismatch", "sql_query": sql_query, "mongodb_query": mongodb_query,
+                "expected": expected, "actual": actual}
+
+    def run(self, cases: int = 1000, seed: int = 0, max_failures: int = 10) -> Dict[str, Any]:
+        """
+        Check `cases` generated statements.
+
+        Returns:
+            Dict[str, Any]: Counts per status, cases per second and up to
+                max_failures mismatches and errors
+        """
+        generator = QueryGenerator(seed)
+        counts = {"match": 0, "mismatch": 0, "error": 0}
+        failures: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+        for _ in range(cases):
+            result = self.check(*generator.statement())
+            counts[result["status"]] += 1
+            if result["status"] != "match" and len(failures) < max_failures:
+                failures.append(result)
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        return dict(counts, cases=cases, per_second=cases / elapsed, failures=failures)
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(description="Compare translated queries with SQLite on random data.")
+    arg_parser.add_argument("--cases", type=int, default=5000, help="statements to check (default: 5000)")
+    arg_parser.add_argument("--rows", type=int, default=200, help="rows in the dataset (default: 200)")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--columnar", action="store_true", help="evaluate with the NumPy columnar path")
+    arg_parser.add_argument("--show", type=int, default=5, help="failures to print (default: 5)")
+    args = arg_parser.parse_args(argv)
+
+    harness = DifferentialHarness(Dataset(args.rows, args.seed), columnar=args.columnar)
+    report = harness.run(args.cases, args.seed, max_failures=args.show)
+    print(f"{report['cases']:,} cases ({report['per_second']:,.0f}/s): {report['match']:,} match, "
+          f"{report['mismatch']:,} mismatch, {report['error']:,} error")
+    for failure in report["failures"]:
+        print(f"\n{failure['status'].upper()}: {failure['sql_query']}")
+        if failure["status"] == "error":
+            print(f"  {failure['message']}")
+        else:
+            print(f"  mongodb:  {failure['mongodb_query']}")
+            print(f"  expected: {failure['expected'][:10]}")
+            print(f"  actual:   {failure['actual'][:10]}")
+    return 1 if report["mismatch"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+import codecs
+import re
+from typing import List, Iterator, BinaryIO
+
+# Scanner states
+_NORMAL = 0
+_QUOTE = 1
+_LINE_COMMENT = 2
+_BLOCK_COMMENT = 3
+_DOLLAR_QUOTE = 4
+_COPY_DATA = 5
+
+_COPY_FROM_STDIN = re.compile(r"^COPY\b.*\bFROM\s+stdin\b", re.IGNORECASE | re.DOTALL)
+_DOLLAR_TAG = re.compile(r"\$[A-Za-z_0-9]*\$")
+
+class StatementSplitter:
+    """
+    Incrementally split SQL dump text into individual statements.
+
+    Text can be fed in arbitrarily sized chunks; quoted strings, comments and
+    multi-character tokens that straddle a chunk boundary are carried over to
+    the next call. Comments are dropped from the returned statements.
+
+    The "mysql" dialect treats backslashes in strings as escapes and `#` as a
+    line comment; the "postgres" dialect understands dollar-quoted strings and
+    skips the data block that follows `COPY ... FROM stdin;`.
+    """
+
+    def __init__(self, dialect: str = "mysql"):
+        if dialect not in ("mysql", "postgres"):
+            raise ValueError(f"Unsupported dialect: {dialect}")
+        self.dialect = dialect
+        self.backslash_escapes = dialect == "mysql"
+        specials = ";'\"`/-" + ("#" if dialect == "mysql" else "$")
+        self._normal_special = re.compile("[" + re.escape(specials) + "]")
+        self._state = _NORMAL
+        self._quote = ""
+        self._carry = ""
+        self._parts: List[str] = []
+
+    def feed(self, text: str, final: bool = False) -> List[str]:
+        """
+        Consume a chunk of dump text.
+
+        Args:
+            text (str): The next chunk of the dump
+            final (bool): Whether this is the last chunk
+
+        Returns:
+            List[str]: The statements completed by this chunk
+        """
+        buf = self._carry + text
+        self._carry = ""
+        statements: List[str] = []
+        parts = self._parts
+        pos = 0
+        end = len(buf)
+
+        while pos < end:
+            state = self._state
+            if state == _NORMAL:
+                m = self._normal_special.search(buf, pos)
+                if m is None:
+                    parts.append(buf[pos:])
+                    pos = end
+                    break
+                i = m.start()
+                parts.append(buf[pos:i])
+                ch = buf[i]
+                if ch == ";":
+                    self._finish_statement(statements)
+                    pos = i + 1
+                elif ch in "'\"`":
+                    parts.append(ch)
+                    self._state = _QUOTE
+                    self._quote = ch
+                    pos = i + 1
+                elif ch == "#":
+                    self._state = _LINE_COMMENT
+                    pos = i + 1
+                elif ch == "-" or ch == "/":
+                    if i + 1 >= end and not final:
+                        self._carry = buf[i:]
+                        pos = end
+                        break
+                    following = buf[i + 1:i + 2]
+                    if ch == "-" and following == "-":
+                        self._state = _LINE_COMMENT
+                        pos = i + 2
+                    elif ch == "/" and following == "*":
+                        self._state = _BLOCK_COMMENT
+                        pos = i + 2
+                    else:
+                        parts.append(ch)
+                        pos = i + 1
+                else:
+                    tag = _DOLLAR_TAG.match(buf, i)
+                    if tag is None:
+                        if not final and "$" not in buf[i + 1:] and end - i < 64:
+                            # The closing $ of a tag may be in the next chunk
+                            self._carry = buf[i:]
+                            pos = end
+                            break
+                        parts.append(ch)
+                        pos = i + 1
+                    else:
+                        parts.append(tag.group())
+                        self._state = _DOLLAR_QUOTE
+                        self._quote = tag.group()
+                        pos = tag.end()
+            elif state == _QUOTE:
+                quote = self._quote
+                i = buf.find(quote, pos)
+                if self.backslash_escapes and quote != "`":
+                    j = buf.find("\\", pos, i if i >= 0 else end)
+                    if j >= 0:
+                        if j + 1 >= end and not final:
+                            parts.append(buf[pos:j])
+                            self._carry = buf[j:]
+                            pos = end
+                            break
+                        parts.append(buf[pos:j + 2])
+                        pos = j + 2
+                        continue
+                if i < 0:
+                    parts.append(buf[pos:])
+                    pos = end
+                    break
+                if i + 1 >= end and not final:
+                    parts.append(buf[pos:i])
+                    self._carry = buf[i:]
+                    pos = end
+                    break
+                if buf[i + 1:i + 2] == quote:
+                    # Doubled quote is an escaped quote character
+                    parts.append(buf[pos:i + 2])
+                    pos = i + 2
+                else:
+                    parts.append(buf[pos:i + 1])
+                    self._state = _NORMAL
+                    pos = i + 1
+            elif state == _LINE_COMMENT:
+                i = buf.find("\n", pos)
+                if i < 0:
+                    pos = end
+                    break
+                parts.append("\n")
+                self._state = _NORMAL
+                pos = i + 1
+            elif state == _BLOCK_COMMENT:
+                i = buf.find("*/", pos)
+                if i < 0:
+                    if not final and buf.endswith("*"):
+                        self._carry = "*"
+                    pos = end
+                    break
+                parts.append(" ")
+                self._state = _NORMAL
+                pos = i + 2
+            elif state == _DOLLAR_QUOTE:
+                tag = self._quote
+                i = buf.find(tag, pos)
+                if i < 0:
+                    # Keep enough text to recognise a tag split across chunks
+                    cut = end if final else max(pos, end - len(tag) + 1)
+                    parts.append(buf[pos:cut])
+                    self._carry = buf[cut:]
+                    pos = end
+                    break
+                parts.append(buf[pos:i + len(tag)])
+                self._state = _NORMAL
+                pos = i + len(tag)
+            else:
+                i = buf.find("\n", pos)
+                if i < 0:
+                    if not final:
+                        self._carry = buf[pos:]
+                    pos = end
+                    break
+                if buf[pos:i].rstrip("\r") == "\\.":
+                    self._state = _NORMAL
+                pos = i + 1
+
+        if final:
+            self._finish_statement(statements)
+            self._state = _NORMAL
+        return statements
+
+    def _finish_statement(self, statements: List[str]) -> None:
+        statement = "".join(self._parts).strip()
+        self._parts.clear()
+        if not statement:
+            return
+        statements.append(statement)
+        if self.dialect == "postgres" and _COPY_FROM_STDIN.match(statement):
+            self._state = _COPY_DATA
+
+class LineSplitter:
+    """
+    Incrementally split text into non-blank lines, with the same feed()
+    interface as StatementSplitter, for NDJSON and one-statement-per-line input.
+    """
+
+    def __init__(self):
+        self._partial = ""
+
+    def feed(self, text: str, final: bool = False) -> List[str]:
+        """
+        Consume a chunk of text and return the lines it completes.
+
+        Args:
+            text (str): The next chunk of input
+            final (bool): Whether this is the last chunk; flushes an unterminated line
+
+        Returns:
+            List[str]: Complete, stripped, non-blank lines
+        """
+        lines = (self._partial + text).split("\n")
+        self._partial = "" if final else lines.pop()
+        return [line.strip() for line in lines if line.strip()]
+
+class DumpReader:
+    """
+    Stream statements out of a binary dump file with bounded memory.
+
+    The number of bytes consumed so far is available as `bytes_read` for
+    progress reporting.
+    """
+
+    def __init__(self, stream: BinaryIO, dialect: str = "mysql",
+                 chunk_size: int = 1 << 20, encoding: str = "utf-8"):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.splitter = StatementSplitter(dialect)
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self.bytes_read = 0
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            chunk = self.stream.read(self.chunk_size)
+            if not chunk:
+                break
+            self.bytes_read += len(chunk)
+            for statement in self.splitter.feed(self._decoder.decode(chunk)):
+                yield statement
+        for statement in self.splitter.feed(self._decoder.decode(b"", final=True), final=True):
+            yield statement
@@ -0,0 +1,605 @@
+#!/usr/bin/env python3
+"""
+Run translated MongoDB queries against in-memory documents.
+
+Filters, sorts and projections are compiled once into plain Python
+closures that follow MongoDB's matching rules and BSON comparison order,
+so a find query can be checked without a server. ColumnarBatch evaluates
+the same queries over NumPy columns, falling back to the row-at-a-time
+path for fields that mix types.
+"""
+
+import operator as _operators
+import re
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, Iterable, Tuple
+
+# Stands in for a field a document does not have
+_MISSING = object()
+
+Matcher = Callable[[Dict[str, Any]], bool]
+
+# BSON comparison order of the types translated queries produce; null and
+# missing fields sort first
+_NULL, _NUMBER, _STRING, _OBJECT, _ARRAY, _BINARY, _OBJECT_ID, _BOOL, _DATE, _TIMESTAMP, _REGEX = range(11)
+
+_TYPE_NAMES = {
+    "null": _NULL, "double": _NUMBER, "int": _NUMBER, "long": _NUMBER, "decimal": _NUMBER,
+    "number": _NUMBER, "string": _STRING, "object": _OBJECT, "array": _ARRAY, "binData": _BINARY,
+    "objectId": _OBJECT_ID, "bool": _BOOL, "date": _DATE, "symbol": _STRING, "timestamp": _TIMESTAMP,
+    "regex": _REGEX,
+}
+
+_RANKS = {type(None): _NULL, bool: _BOOL, int: _NUMBER, float: _NUMBER, str: _STRING,
+          datetime: _DATE, dict: _OBJECT, list: _ARRAY, bytes: _BINARY}
+
+def _rank(value: Any) -> int:
+    rank = _RANKS.get(type(value))
+    if rank is not None:
+        return rank
+    if value is _MISSING:
+        return _NULL
+    if isinstance(value, bool):
+        return _BOOL
+    if isinstance(value, (int, float)):
+        return _NUMBER
+    if isinstance(value, str):
+        return _STRING
+    if isinstance(value, datetime):
+        return _DATE
+    if isinstance(value, dict):
+        return _OBJECT
+    if isinstance(value, list):
+        return _ARRAY
+    if isinstance(value, bytes):
+        return _BINARY
+    return {"ObjectId": _OBJECT_ID, "Timestamp": _TIMESTAMP, "Regex": _REGEX}.get(type(value).__name__, _OBJECT)
+
+def _folder(collation: Optional[Dict[str, Any]]) -> Optional[Callable[[str], str]]:
+    """String normalization of a collation; strength 1 and 2 compare case-insensitively."""
+    if collation and collation.get("strength", 3) <= 2:
+        return str.lower
+    return None
+
+def _getter(field: str) -> Callable[[Dict[str, Any]], Any]:
+    if "." not in field:
+        return lambda document: document.get(field, _MISSING)
+    parts = field.split(".")
+
+    def get(document: Dict[str, Any]) -> Any:
+        value: Any = document
+        for part in parts:
+            if not isinstance(value, dict):
+                return _MISSING
+            value = value.get(part, _MISSING)
+        return value
+    return get
+
+def _candidates(value: Any) -> List[Any]:
+    """The values a condition is tested against: an array matches if the array or any element does."""
+    return [value] + value if isinstance(value, list) else [value]
+
+def _any_candidate(test: Callable[[Any], bool]) -> Callable[[Any], bool]:
+    """Extend a test of one value to arrays, without building candidate lists for scalars."""
+    def matches(value: Any) -> bool:
+        if type(value) is list:
+            return test(value) or any(test(item) for item in value)
+        return test(value)
+    return matches
+
+def _equal_to(target: Any, fold: Optional[Callable[[str], str]]) -> Callable[[Any], bool]:
+    """Test of one value for equality with a target of the same type."""
+    if target is None:
+        return lambda value: value is None or value is _MISSING
+    rank = _rank(target)
+    if fold is not None and rank == _STRING:
+        key = fold(target)
+        return lambda value: type(value) is str and fold(value) == key
+    if type(target) is str:
+        # Only strings equal a string
+        return lambda value: value == target
+    # The cheap comparison first; the type check only tells True from 1
+    return lambda value: value == target and _rank(value) == rank
+
+# Exact types whose values are hashable and compare equal only within their BSON type (bool aside)
+_SCALARS = (int, float, str)
+
+def _member_of(targets: List[Any], fold: Optional[Callable[[str], str]]) -> Callable[[Any], bool]:
+    """Test of one value for equality with any of the targets."""
+    if fold is None and all(item is None or type(item) in _SCALARS for item in targets):
+        values = frozenset(item for item in targets if item is not None)
+        if None in targets:
+            return lambda value: value is None or value is _MISSING or \
+                (type(value) in _SCALARS and value in values)
+        return lambda value: type(value) in _SCALARS and value in values
+    tests = [_equal_to(item, fold) for item in targets]
+    return lambda value: any(test(value) for test in tests)
+
+_RANGES = {"$gt": _operators.gt, "$gte": _operators.ge, "$lt": _operators.lt, "$lte": _operators.le}
+
+def _operator(operator: str, target: Any, fold: Optional[Callable[[str], str]]) -> Callable[[Any], bool]:
+    """Compile one operator into a test of a field value (_MISSING if absent)."""
+    if operator in ("$eq", "$ne"):
+        equal = _any_candidate(_equal_to(target, fold))
+        return equal if operator == "$eq" else (lambda value: not equal(value))
+    if operator in ("$in", "$nin"):
+        found = _any_candidate(_member_of(target, fold))
+        return found if operator == "$in" else (lambda value: not found(value))
+    if operator in _RANGES:
+        compare = _RANGES[operator]
+        if target is None:
+            # Only $gte and $lte include null itself
+            return (lambda value: value is None or value is _MISSING) if operator in ("$gte", "$lte") \
+                else (lambda value: False)
+        rank = _rank(target)
+        key = fold(target) if fold is not None and isinstance(target, str) else target
+        # Values of these exact types need no rank lookup
+        same = (int, float) if rank == _NUMBER else (str,) if rank == _STRING and fold is None else ()
+
+        def in_range(value: Any) -> bool:
+            if type(value) in same:
+                return compare(value, key)
+            if _rank(value) != rank:
+                return False
+            if fold is not None and type(value) is str:
+                value = fold(value)
+            return compare(value, key)
+        return _any_candidate(in_range)
+    if operator == "$exists":
+        return (lambda value: value is not _MISSING) if target else (lambda value: value is _MISSING)
+    if operator == "$type":
+        names = target if isinstance(target, list) else [target]
+        ranks = set()
+        for name in names:
+            if name not in _TYPE_NAMES:
+                raise ValueError(f"Unsupported $type {name!r}")
+            ranks.add(_TYPE_NAMES[name])
+        return lambda value: value is not _MISSING and any(_rank(item) in ranks for item in _candidates(value))
+    if operator == "$regex":
+        pattern = re.compile(target) if isinstance(target, str) else target
+        search = pattern.search
+        return _any_candidate(lambda value: isinstance(value, str) and search(value) is not None)
+    if operator == "$not":
+        inner = _conditions(target, fold)
+        return lambda value: not inner(value)
+    raise ValueError(f"Unsupported query operator {operator}")
+
+def _conditions(condition: Any, fold: Optional[Callable[[str], str]]) -> Callable[[Any], bool]:
+    """Compile the condition on one field: an operator document or a value to equal."""
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        condition = dict(condition)
+        if "$regex" in condition and "$options" in condition:
+            condition["$regex"] = f"(?{condition.pop('$options')}){condition['$regex']}"
+        tests = [_operator(operator, target, fold) for operator, target in condition.items()]
+        if len(tests) == 1:
+            return tests[0]
+        return lambda value: all(test(value) for test in tests)
+    return _operator("$eq", condition, fold)
+
+def compile_filter(query_filter: Optional[Dict[str, Any]],
+                   collation: Optional[Dict[str, Any]] = None) -> Matcher:
+    """
+    Compile a MongoDB query filter into a function testing one document.
+
+    The filter is walked once and turned into nested closures, so evaluating
+    it costs no dictionary lookups on operators. Matching follows MongoDB's
+    rules for the operators translated queries use: comparisons only match
+    values of the same type, null matches missing fields, $ne and $nin match
+    documents without the field, and an array matches if any element does.
+
+    Args:
+        query_filter: The filter document; empty or None matches everything
+        collation: The query's collation; strength 1 or 2 compares strings
+            case-insensitively
+
+    Returns:
+        Matcher: Function returning whether a document matches
+
+    Raises:
+        ValueError: If the filter uses an unsupported operator
+    """
+    return _compile_filter(query_filter or {}, _folder(collation))
+
+def _compile_filter(query_filter: Dict[str, Any], fold: Optional[Callable[[str], str]]) -> Matcher:
+    matchers: List[Matcher] = []
+    for key, condition in query_filter.items():
+        if key in ("$and", "$or", "$nor"):
+            children = [_compile_filter(child, fold) for child in condition]
+            if key == "$and":
+                matchers.append(_all_of(children))
+            else:
+                found = _any_of(children)
+                matchers.append(found if key == "$or" else lambda document, found=found: not found(document))
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported query operator {key}")
+        else:
+            test = _conditions(condition, fold)
+            if "." in key:
+                get = _getter(key)
+                matchers.append(lambda document, get=get, test=test: test(get(document)))
+            else:
+                matchers.append(lambda document, key=key, test=test: test(document.get(key, _MISSING)))
+    return _all_of(matchers)
+
+def _all_of(matchers: List[Matcher]) -> Matcher:
+    if not matchers:
+        return lambda document: True
+    if len(matchers) == 1:
+        return matchers[0]
+    if len(matchers) == 2:
+        # Unrolled so the common short conjunctions create no generator per document
+        first, second = matchers
+        return lambda document: first(document) and second(document)
+    return lambda document: all(matcher(document) for matcher in matchers)
+
+def _any_of(matchers: List[Matcher]) -> Matcher:
+    if not matchers:
+        return lambda document: False
+    if len(matchers) == 1:
+        return matchers[0]
+    if len(matchers) == 2:
+        first, second = matchers
+        return lambda document: first(document) or second(document)
+    return lambda document: any(matcher(document) for matcher in matchers)
+
+def sort_key(value: Any, fold: Optional[Callable[[str], str]] = None) -> Tuple[int, Any]:
+    """Key ordering values of any type as MongoDB sorts them."""
+    rank = _rank(value)
+    if rank == _NULL:
+        return rank, 0
+    if fold is not None and rank == _STRING:
+        return rank, fold(value)
+    if rank == _ARRAY or rank == _OBJECT:
+        return rank, repr(value)
+    return rank, value
+
+def compile_sort(sort: Optional[Dict[str, int]],
+                 collation: Optional[Dict[str, Any]] = None) -> Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]:
+    """
+    Compile a sort document into a function sorting a list of documents.
+
+    Keys are applied from last to first with stable sorts, so mixed
+    directions need no key inversion and documents that tie keep their
+    input order. An array sorts by its smallest element ascending and by
+    its largest descending.
+    """
+    fold = _folder(collation)
+    keys = [(_getter(field), direction < 0) for field, direction in (sort or {}).items()]
+
+    def document_key(get: Callable[[Dict[str, Any]], Any], reverse: bool) -> Callable[[Dict[str, Any]], Tuple[int, Any]]:
+        pick = max if reverse else min
+
+        def key(document: Dict[str, Any]) -> Tuple[int, Any]:
+            value = get(document)
+            kind = type(value)
+            if kind is int or kind is float:
+                return _NUMBER, value
+            if kind is list and value:
+                return pick(sort_key(item, fold) for item in value)
+            return sort_key(value, fold)
+        return key
+
+    sorts = [(document_key(get, reverse), reverse) for get, reverse in reversed(keys)]
+
+    def sort_documents(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        documents = list(documents)
+        for key, reverse in sorts:
+            documents.sort(key=key, reverse=reverse)
+        return documents
+    return sort_documents
+
+def compile_projection(projection: Optional[Dict[str, Any]]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Compile an inclusion or exclusion projection into a function reshaping one document."""
+    if not projection:
+        return dict
+    include_id = projection.get("_id", 1) not in (0, False)
+    fields = [field for field in projection if field != "_id"]
+    if fields and all(projection[field] in (0, False) for field in fields) or not fields and not include_id:
+        excluded = set(fields) | (set() if include_id else {"_id"})
+        return lambda document: {key: value for key, value in document.items() if key not in excluded}
+    fields = (["_id"] if include_id else []) + fields
+    if not any("." in field for field in fields):
+        return lambda document: {field: document[field] for field in fields if field in document}
+    getters = [(field.split("."), _getter(field)) for field in fields]
+
+    def project(document: Dict[str, Any]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        for path, get in getters:
+            value = get(document)
+            if value is _MISSING:
+                continue
+            target = result
+            for parent in path[:-1]:
+                target = target.setdefault(parent, {})
+            target[path[-1]] = value
+        return result
+    return project
+
+def _find_options(mongodb_query: Dict[str, Any]) -> Dict[str, Any]:
+    if mongodb_query.get("operation") != "find":
+        raise ValueError(f"Only find queries can be evaluated, not {mongodb_query.get('operation')!r}")
+    return mongodb_query.get("options", {})
+
+def compile_query(mongodb_query: Dict[str, Any]) -> Callable[[Iterable[Dict[str, Any]]], List[Dict[str, Any]]]:
+    """
+    Compile a translated find query into a function running it over documents.
+
+    The returned function filters, sorts, skips, limits and projects like
+    the server, so a query can be checked against an in-memory dataset.
+
+    Args:
+        mongodb_query (Dict[str, Any]): A translated find query
+
+    Returns:
+        Callable: Takes an iterable of documents and returns the result documents
+    """
+    options = _find_options(mongodb_query)
+    collation = options.get("collation")
+    matches = compile_filter(mongodb_query.get("filter"), collation)
+    sort = compile_sort(options.get("sort"), collation) if options.get("sort") else None
+    project = compile_projection(mongodb_query.get("projection"))
+    skip = options.get("skip", 0)
+    limit = options.get("limit")
+
+    def run(documents: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        selected = list(filter(matches, documents))
+        if sort is not None:
+            selected = sort(selected)
+        selected = selected[skip:skip + limit] if limit else selected[skip:]
+        return [project(document) for document in selected]
+    return run
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("The columnar evaluator requires numpy: pip install numpy")
+    return numpy
+
+# Floats represent every integer up to 2**53 exactly
+_EXACT_INT = 2 ** 53
+
+class _Column:
+    """One field of a batch: values, a mask of non-null values and the kind of the values."""
+
+    __slots__ = ("kind", "values", "present", "missing", "_folded")
+
+    def __init__(self, kind: Optional[str], values: Any, present: Any, missing: Any):
+        # "number", "string", or None when values mix types and need the row path
+        self.kind = kind
+        self.values = values
+        self.present = present
+        self.missing = missing
+        self._folded = None
+
+    def folded(self, fold: Optional[Callable[[str], str]]) -> Any:
+        if fold is None:
+            return self.values
+        if self._folded is None:
+            self._folded = _numpy().char.lower(self.values)
+        return self._folded
+
+class ColumnarBatch:
+    """
+    Documents stored column by column as NumPy arrays.
+
+    Columns are built on first use, so a batch only pays for the fields its
+    queries touch. Numeric columns become float64 arrays and string columns
+    unicode arrays, with a mask of the non-null entries; fields mixing types
+    are left to the row-at-a-time evaluator.
+    """
+
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self.documents = documents
+        self.size = len(documents)
+        self._columns: Dict[str, _Column] = {}
+
+    def column(self, field: str) -> _Column:
+        column = self._columns.get(field)
+        if column is None:
+            column = self._columns[field] = self._build(field)
+        return column
+
+    def _build(self, field: str) -> _Column:
+        np = _numpy()
+        get = _getter(field)
+        values = [get(document) for document in self.documents]
+        missing = np.fromiter((value is _MISSING for value in values), bool, self.size)
+        present = np.fromiter((value is not None and value is not _MISSING for value in values), bool, self.size)
+        ranks = {_rank(value) for value in values if value is not None and value is not _MISSING}
+        if ranks == {_NUMBER} and all(-_EXACT_INT <= value <= _EXACT_INT
+                                      for value in values if isinstance(value, int) and not isinstance(value, bool)):
+            array = np.fromiter((value if isinstance(value, (int, float)) else 0.0 for value in values),
+                                float, self.size)
+            return _Column("number", array, present, missing)
+        if ranks == {_STRING}:
+            array = np.array([value if isinstance(value, str) else "" for value in values], dtype=str)
+            return _Column("string", array, present, missing)
+        return _Column(None, None, present, missing)
+
+ColumnMatcher = Callable[[ColumnarBatch], Any]
+
+def _column_kind(value: Any) -> Optional[str]:
+    rank = _rank(value)
+    return "number" if rank == _NUMBER else "string" if rank == _STRING else None
+
+def _row_mask(field: str, condition: Any, fold: Optional[Callable[[str], str]]) -> ColumnMatcher:
+    """Evaluate one field's condition document by document, for what columns cannot express."""
+    np = _numpy()
+    get, test = _getter(field), _conditions(condition, fold)
+    return lambda batch: np.fromiter((test(get(document)) for document in batch.documents), bool, batch.size)
+
+def _column_operator(field: str, operator: str, target: Any,
+                     fold: Optional[Callable[[str], str]]) -> Optional[ColumnMatcher]:
+    """Vectorize one operator, or return None to use the row path."""
+    np = _numpy()
+    comparisons = {"$eq": np.equal, "$gt": np.greater, "$gte": np.greater_equal,
+                   "$lt": np.less, "$lte": np.less_equal}
+    if operator in ("$eq", "$ne") and target is None:
+        if operator == "$eq":
+            return lambda batch: ~batch.column(field).present
+        return lambda batch: batch.column(field).present.copy()
+    if operator == "$exists":
+        return (lambda batch: ~batch.column(field).missing) if target else (lambda batch: batch.column(field).missing.copy())
+    if operator in comparisons or operator == "$ne":
+        kind = _column_kind(target)
+        if kind is None:
+            return None
+        key = fold(target) if fold is not None and kind == "string" else target
+        compare = comparisons.get(operator, np.equal)
+
+        def compare_column(batch: ColumnarBatch) -> Any:
+            column = batch.column(field)
+            if column.kind is None:
+                raise _RowFallback
+            if column.kind != kind:
+                mask = np.zeros(batch.size, bool)
+            else:
+                mask = column.present & compare(column.folded(fold if kind == "string" else None), key)
+            return ~mask if operator == "$ne" else mask
+        return compare_column
+    if operator in ("$in", "$nin"):
+        targets = list(target)
+        if any(_column_kind(item) is None and item is not None for item in targets):
+            return None
+        numbers = [item for item in targets if _column_kind(item) == "number"]
+        strings = [item for item in targets if _column_kind(item) == "string"]
+        if fold is not None:
+            strings = [fold(item) for item in strings]
+        null = any(item is None for item in targets)
+
+        def member(batch: ColumnarBatch) -> Any:
+            column = batch.column(field)
+            if column.kind is None:
+                raise _RowFallback
+            values = numbers if column.kind == "number" else strings
+            mask = column.present & np.isin(column.folded(fold if column.kind == "string" else None), values) \
+                if values else np.zeros(batch.size, bool)
+            if null:
+                mask |= ~column.present
+            return ~mask if operator == "$nin" else mask
+        return member
+    if operator == "$not":
+        inner = _column_conditions(field, target, fold)
+        return None if inner is None else (lambda batch: ~inner(batch))
+    return None
+
+class _RowFallback(Exception):
+    """Raised when a column holds mixed types and the row path must decide."""
+
+def _column_conditions(field: str, condition: Any, fold: Optional[Callable[[str], str]]) -> Optional[ColumnMatcher]:
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        if "$options" in condition:
+            return None
+        items = list(condition.items())
+    else:
+        items = [("$eq", condition)]
+    masks = [_column_operator(field, operator, target, fold) for operator, target in items]
+    if any(mask is None for mask in masks):
+        return None
+    if len(masks) == 1:
+        return masks[0]
+
+    def all_of(batch: ColumnarBatch) -> Any:
+        result = masks[0](batch)
+        for mask in masks[1:]:
+            result = result & mask(batch)
+        return result
+    return all_of
+
+def _compile_columnar(query_filter: Dict[str, Any], fold: Optional[Callable[[str], str]]) -> ColumnMatcher:
+    np = _numpy()
+    matchers: List[ColumnMatcher] = []
+    for key, condition in query_filter.items():
+        if key in ("$and", "$or", "$nor"):
+            children = [_compile_columnar(child, fold) for child in condition]
+            combine = np.logical_and.reduce if key == "$and" else np.logical_or.reduce
+
+            def logical(batch: ColumnarBatch, children=children, combine=combine, negate=key == "$nor") -> Any:
+                mask = combine([child(batch) for child in children])
+                return ~mask if negate else mask
+            matchers.append(logical)
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported query operator {key}")
+        else:
+            vectorized = _column_conditions(key, condition, fold)
+            rows = _row_mask(key, condition, fold)
+            if vectorized is None:
+                matchers.append(rows)
+            else:
+                def leaf(batch: ColumnarBatch, vectorized=vectorized, rows=rows) -> Any:
+                    try:
+                        return vectorized(batch)
+                    except _RowFallback:
+                        return rows(batch)
+                matchers.append(leaf)
+    if not matchers:
+        return lambda batch: np.ones(batch.size, bool)
+    if len(matchers) == 1:
+        return matchers[0]
+    return lambda batch: np.logical_and.reduce([matcher(batch) for matcher in matchers])
+
+def compile_filter_columnar(query_filter: Optional[Dict[str, Any]],
+                            collation: Optional[Dict[str, Any]] = None) -> ColumnMatcher:
+    """
+    Compile a filter into a function returning the boolean mask of a ColumnarBatch.
+
+    Comparisons, $in/$nin, null tests and $exists on numeric and string
+    columns run as NumPy array operations; anything else, such as $regex or
+    fields mixing types, falls back to the row closures per field, so the
+    result always equals compile_filter's.
+
+    Raises:
+        ImportError: If NumPy is not installed
+    """
+    _numpy()
+    return _compile_columnar(query_filter or {}, _folder(collation))
+
+def _lexsort_order(batch: ColumnarBatch, indexes: Any, sort: Dict[str, int],
+                   fold: Optional[Callable[[str], str]]) -> Optional[Any]:
+    """Order the selected rows with one stable np.lexsort, or None if a sort field mixes types."""
+    np = _numpy()
+    keys = []
+    for field, direction in sort.items():
+        column = batch.column(field)
+        if column.kind is None:
+            return None
+        values = column.folded(fold if column.kind == "string" else None)[indexes]
+        # Dense ranks turn strings into numbers that can be negated for descending order
+        _, ranks = np.unique(values, return_inverse=True)
+        ranks = np.where(column.present[indexes], ranks + 1, 0)
+        keys.append(-ranks if direction < 0 else ranks)
+    # lexsort treats its last key as the primary one
+    return np.lexsort(keys[::-1]) if keys else np.arange(len(indexes))
+
+def compile_query_columnar(mongodb_query: Dict[str, Any]) -> Callable[[ColumnarBatch], List[Dict[str, Any]]]:
+    """
+    Compile a translated find query into a function running it over a ColumnarBatch.
+
+    Filtering and, where the sort fields have one type, sorting are
+    vectorized; results equal those of compile_query on the same documents.
+    """
+    options = _find_options(mongodb_query)
+    collation = options.get("collation")
+    fold = _folder(collation)
+    mask = compile_filter_columnar(mongodb_query.get("filter"), collation)
+    sort = options.get("sort")
+    row_sort = compile_sort(sort, collation) if sort else None
+    project = compile_projection(mongodb_query.get("projection"))
+    skip = options.get("skip", 0)
+    limit = options.get("limit")
+
+    def run(batch: ColumnarBatch) -> List[Dict[str, Any]]:
+        np = _numpy()
+        indexes = np.flatnonzero(mask(batch))
+        if sort:
+            order = _lexsort_order(batch, indexes, sort, fold)
+            if order is None:
+                selected = row_sort([batch.documents[index] for index in indexes])
+            else:
+                selected = [batch.documents[index] for index in indexes[order]]
+        else:
+            selected = [batch.documents[index] for index in indexes]
+        selected = selected[skip:skip + limit] if limit else selected[skip:]
+        return [project(document) for document in selected]
+    return run
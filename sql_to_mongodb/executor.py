@@ -0,0 +1,312 @@
+import threading
+from typing import Dict, List, Any, Optional, Iterable, Iterator, AsyncIterator
+from pymongo import MongoClient, InsertOne, UpdateOne, UpdateMany, DeleteMany
+from .pagination import next_page_token
+
+DEFAULT_URI = "mongodb://localhost:27017"
+
+_clients: Dict[Any, Any] = {}
+_clients_lock = threading.Lock()
+
+def get_client(uri: str = DEFAULT_URI, max_pool_size: int = 100, **options) -> MongoClient:
+    """
+    Get a process-wide MongoClient for a URI.
+
+    MongoClient is thread-safe and maintains its own connection pool, so one
+    client per URI is shared by every executor in the process.
+
+    Args:
+        uri (str): MongoDB connection string
+        max_pool_size (int): Maximum connections in the pool
+        **options: Extra MongoClient keyword arguments
+
+    Returns:
+        MongoClient: The shared client
+    """
+    key = ("sync", uri, max_pool_size, tuple(sorted(options.items())))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = MongoClient(uri, maxPoolSize=max_pool_size, **options)
+            _clients[key] = client
+        return client
+
+def get_async_client(uri: str = DEFAULT_URI, max_pool_size: int = 100, **options):
+    """
+    Get a process-wide Motor client for a URI.
+
+    Args:
+        uri (str): MongoDB connection string
+        max_pool_size (int): Maximum connections in the pool
+        **options: Extra AsyncIOMotorClient keyword arguments
+
+    Returns:
+        AsyncIOMotorClient: The shared client
+    """
+    try:
+        from motor.motor_asyncio import AsyncIOMotorClient
+    except ImportError:
+        raise ImportError("The async executor requires motor: pip install motor")
+    key = ("async", uri, max_pool_size, tuple(sorted(options.items())))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = AsyncIOMotorClient(uri, maxPoolSize=max_pool_size, **options)
+            _clients[key] = client
+        return client
+
+WRITE_OPERATIONS = ("insert", "update", "delete", "bulk_update")
+
+def to_write_requests(mongodb_query: Dict[str, Any]) -> List[Any]:
+    """
+    Convert a translated write query into pymongo bulk write requests.
+
+    Args:
+        mongodb_query (Dict[str, Any]): A translated insert, update or delete
+            query, or a bulk_update batch from coalesce_updates
+
+    Returns:
+        List[Any]: InsertOne/UpdateOne/UpdateMany/DeleteMany requests
+    """
+    operation = mongodb_query["operation"]
+    if operation == "insert":
+        return [InsertOne(document) for document in mongodb_query["documents"]]
+    if operation == "update":
+        options = mongodb_query.get("options", {})
+        request = UpdateMany if options.get("multi") else UpdateOne
+        return [request(mongodb_query["filter"], mongodb_query["update"], upsert=options.get("upsert", False),
+                        collation=options.get("collation"))]
+    if operation == "bulk_update":
+        return [request for update in mongodb_query["updates"]
+                for request in to_write_requests(dict(update, operation="update"))]
+    if operation == "delete":
+        return [DeleteMany(mongodb_query["filter"], collation=mongodb_query.get("options", {}).get("collation"))]
+    raise ValueError(f"Not a write operation: {operation}")
+
+def _find_arguments(mongodb_query: Dict[str, Any], batch_size: int) -> Dict[str, Any]:
+    """Build collection.find() keyword arguments for a translated find query."""
+    options = mongodb_query.get("options", {})
+    kwargs = {
+        "filter": mongodb_query.get("filter") or {},
+        # An empty projection would return only _id, so pass None for all fields
+        "projection": mongodb_query.get("projection") or None,
+        "batch_size": batch_size
+    }
+    if options.get("sort"):
+        kwargs["sort"] = list(options["sort"].items())
+    if options.get("skip"):
+        kwargs["skip"] = options["skip"]
+    if options.get("limit"):
+        kwargs["limit"] = options["limit"]
+    if options.get("collation"):
+        kwargs["collation"] = options["collation"]
+    return kwargs
+
+def _aggregate_arguments(mongodb_query: Dict[str, Any], batch_size: int) -> Dict[str, Any]:
+    """Build collection.aggregate() keyword arguments for a translated aggregate query."""
+    kwargs = {"batchSize": batch_size}
+    collation = mongodb_query.get("options", {}).get("collation")
+    if collation:
+        kwargs["collation"] = collation
+    return kwargs
+
+def _group_writes(mongodb_queries: Iterable[Dict[str, Any]], max_batch_size: int,
+                  ordered: bool) -> Iterator[Any]:
+    """
+    Group consecutive writes into (collection, requests, ordered) bulk_write batches.
+
+    A batch only holds one kind of write to one collection: the server runs an
+    unordered bulk write grouped by operation type, so a DELETE sent with the
+    INSERT written before it could run first. Inserts and deletes of a run
+    commute, as do the updates of one bulk_update from coalesce_updates, so
+    those batches use the executor's ordering; separate UPDATE statements may
+    not commute and a batch of several is always sent ordered.
+    """
+    key = None
+    requests: List[Any] = []
+    for index, query in enumerate(mongodb_queries):
+        operation = query.get("operation")
+        if operation not in WRITE_OPERATIONS:
+            raise ValueError(f"execute_many only runs write operations, got {operation!r}")
+        # Consecutive bulk_update batches were split because they do not commute
+        query_key = (query["collection"], (operation, index) if operation == "bulk_update" else operation)
+        if requests and query_key != key:
+            yield key[0], requests, ordered or key[1] == "update" and len(requests) > 1
+            requests = []
+        key = query_key
+        for request in to_write_requests(query):
+            requests.append(request)
+            if len(requests) >= max_batch_size:
+                yield key[0], requests, ordered or key[1] == "update" and len(requests) > 1
+                requests = []
+    if requests:
+        yield key[0], requests, ordered or key[1] == "update" and len(requests) > 1
+
+class WriteSummary:
+    """Totals accumulated over the bulk writes of an execute_many call."""
+
+    def __init__(self):
+        self.bulk_writes = 0
+        self.inserted = 0
+        self.matched = 0
+        self.modified = 0
+        self.deleted = 0
+        self.upserted = 0
+
+    def add(self, result: Any) -> None:
+        self.bulk_writes += 1
+        self.inserted += result.inserted_count
+        self.matched += result.matched_count
+        self.modified += result.modified_count
+        self.deleted += result.deleted_count
+        self.upserted += result.upserted_count
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+class QueryExecutor:
+    """
+    Run translated queries against MongoDB.
+
+    Any client exposing the pymongo database/collection interface can be
+    passed in, which allows an in-process fake to stand in for a server.
+    """
+
+    def __init__(self, database: str, client: Any = None, uri: str = DEFAULT_URI,
+                 batch_size: int = 1000, ordered: bool = False):
+        """
+        Args:
+            database (str): Database holding the translated collections
+            client: MongoClient-compatible client; defaults to the shared client for uri
+            uri (str): Connection string used when no client is given
+            batch_size (int): Cursor batch size for finds and requests per bulk write
+            ordered (bool): Whether bulk writes stop at the first error, in order
+        """
+        self.client = client if client is not None else get_client(uri)
+        self.db = self.client[database]
+        self.batch_size = batch_size
+        self.ordered = ordered
+
+    def execute(self, mongodb_query: Dict[str, Any]) -> Any:
+        """
+        Execute a single translated query.
+
+        Args:
+            mongodb_query (Dict[str, Any]): Output of SQLToMongoDBTranslator.translate
+
+        Returns:
+            Any: A document iterator for finds and aggregations, otherwise a write summary dict
+        """
+        if mongodb_query["operation"] == "find":
+            return self.find(mongodb_query)
+        if mongodb_query["operation"] == "aggregate":
+            return self.aggregate(mongodb_query)
+        return self.execute_many([mongodb_query])
+
+    def find(self, mongodb_query: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the documents matched by a translated find query.
+
+        Args:
+            mongodb_query (Dict[str, Any]): A translated find query
+
+        Returns:
+            Iterator[Dict[str, Any]]: Cursor fetching batch_size documents per round trip
+        """
+        collection = self.db[mongodb_query["collection"]]
+        return collection.find(**_find_arguments(mongodb_query, self.batch_size))
+
+    def find_page(self, mongodb_query: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fetch one page of a query rewritten for keyset pagination.
+
+        Args:
+            mongodb_query (Dict[str, Any]): Output of SQLToMongoDBTranslator.translate_page
+
+        Returns:
+            Dict[str, Any]: The page's documents and the next_page_token, None on the last page
+        """
+        documents = list(self.find(mongodb_query))
+        token = next_page_token(mongodb_query, documents)
+        added = mongodb_query["pagination"]["added_fields"]
+        if added:
+            # Sort keys fetched only to build the token are not part of the result
+            documents = [{key: value for key, value in document.items() if key not in added}
+                         for document in documents]
+        return {"documents": documents, "next_page_token": token}
+
+    def aggregate(self, mongodb_query: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the results of a translated aggregation pipeline.
+
+        Args:
+            mongodb_query (Dict[str, Any]): A translated aggregate query
+
+        Returns:
+            Iterator[Dict[str, Any]]: Cursor fetching batch_size documents per round trip
+        """
+        collection = self.db[mongodb_query["collection"]]
+        return collection.aggregate(mongodb_query["pipeline"], **_aggregate_arguments(mongodb_query, self.batch_size))
+
+    def execute_many(self, mongodb_queries: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Execute a stream of translated writes using bulk writes.
+
+        Consecutive writes of one kind to the same collection are sent
+        together in bulk_write calls of up to batch_size requests, so writes
+        still take effect in the order given. With ordered=False the server
+        may apply the requests of one call in any order; that is only used
+        for inserts, deletes and bulk_update batches, whose requests commute.
+
+        Args:
+            mongodb_queries (Iterable[Dict[str, Any]]): Translated insert/update/delete queries
+
+        Returns:
+            Dict[str, int]: Totals of bulk writes issued and documents affected
+        """
+        summary = WriteSummary()
+        for collection, requests, ordered in _group_writes(mongodb_queries, self.batch_size, self.ordered):
+            summary.add(self.db[collection].bulk_write(requests, ordered=ordered))
+        return summary.to_dict()
+
+class AsyncQueryExecutor:
+    """
+    asyncio variant of QueryExecutor built on Motor, for use from FastAPI.
+
+    Any client exposing the Motor database/collection interface can be passed in.
+    """
+
+    def __init__(self, database: str, client: Any = None, uri: str = DEFAULT_URI,
+                 batch_size: int = 1000, ordered: bool = False):
+        self.client = client if client is not None else get_async_client(uri)
+        self.db = self.client[database]
+        self.batch_size = batch_size
+        self.ordered = ordered
+
+    async def execute(self, mongodb_query: Dict[str, Any]) -> Any:
+        """Execute a single translated query; finds and aggregations return a document list."""
+        if mongodb_query["operation"] == "find":
+            return [document async for document in self.find(mongodb_query)]
+        if mongodb_query["operation"] == "aggregate":
+            return [document async for document in self.aggregate(mongodb_query)]
+        return await self.execute_many([mongodb_query])
+
+    async def find(self, mongodb_query: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the documents matched by a translated find query."""
+        collection = self.db[mongodb_query["collection"]]
+        async for document in collection.find(**_find_arguments(mongodb_query, self.batch_size)):
+            yield document
+
+    async def aggregate(self, mongodb_query: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the results of a translated aggregation pipeline."""
+        collection = self.db[mongodb_query["collection"]]
+        async for document in collection.aggregate(mongodb_query["pipeline"],
+                                                   **_aggregate_arguments(mongodb_query, self.batch_size)):
+            yield document
+
+    async def execute_many(self, mongodb_queries: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Execute a stream of translated writes using bulk writes."""
+        summary = WriteSummary()
+        for collection, requests, ordered in _group_writes(mongodb_queries, self.batch_size, self.ordered):
+            summary.add(await self.db[collection].bulk_write(requests, ordered=ordered))
+        return summary.to_dict()
@@ -0,0 +1,202 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from functools import partial
+from typing import Dict, List, Any, Optional, Callable, Awaitable, AsyncIterator, Union
+from .cache import LRUCache, SQLiteCache
+from .fingerprint import fingerprint, fingerprint_hash, query_shape
+
+DEFAULT_TTL = 7 * 24 * 3600
+
+class ExplanationCache:
+    """
+    Cache of LLM explanations keyed on the shape of the SQL and its translation.
+
+    Queries that differ only in their literal values share an explanation, so
+    one LLM call serves every query of the same shape. Concurrent requests for
+    an explanation that is still being generated wait for the in-flight call
+    instead of starting their own.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = DEFAULT_TTL,
+                 max_entries: int = 10000, max_bytes: Optional[int] = 64 * 1024 * 1024):
+        """
+        Args:
+            path (Optional[str]): SQLite file shared across processes; in-memory if None
+            ttl (Optional[float]): Seconds before an explanation is regenerated
+            max_entries (int): Maximum number of cached explanations
+            max_bytes (Optional[int]): Maximum total size of cached explanations
+        """
+        if path:
+            self.cache = SQLiteCache(path, max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+        else:
+            self.cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.llm_calls = 0
+        self.coalesced = 0
+
+    def key(self, sql_query: str, mongodb_query: Dict[str, Any]) -> str:
+        """Cache key for the explanation of a query and its translation."""
+        return "explain:" + fingerprint_hash(fingerprint(sql_query), query_shape(mongodb_query))
+
+    def _join(self, key: str):
+        """Return (future, leader); the leader is the caller that must compute the value."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._in_flight[key] = Future()
+            return future, True
+
+    def _finish(self, key: str, future: Future, value: Any = None, error: Optional[BaseException] = None,
+                calls: int = 1) -> None:
+        if error is None:
+            self.cache.set(key, value)
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+        with self._lock:
+            self.llm_calls += calls
+            del self._in_flight[key]
+
+    def _offload(self, func: Callable, *args: Any) -> Awaitable[Any]:
+        """Run a cache call from async code; SQLite file I/O goes to a thread."""
+        if isinstance(self.cache, SQLiteCache):
+            return asyncio.get_running_loop().run_in_executor(None, func, *args)
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(func(*args))
+        return future
+
+    def get_or_compute(self, key: str, compute: Callable[[], str]) -> str:
+        """
+        Return the cached explanation for key, calling compute on a miss.
+
+        Args:
+            key (str): Cache key from key()
+            compute (Callable[[], str]): Generates the explanation
+
+        Returns:
+            str: The explanation
+        """
+        value = self.cache.get(key)
+        if value is not None:
+            return value
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            value = compute()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, value)
+        return value
+
+    async def aget_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """Async variant of get_or_compute; compute returns an awaitable."""
+        value = await self.aget(key)
+        if value is not None:
+            return value
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            value = await compute()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        await self._offload(self._finish, key, future, value)
+        return value
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached explanation for key, or None."""
+        return self.cache.get(key)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Async variant of get."""
+        return await self._offload(self.cache.get, key)
+
+    async def aget_or_compute_many(self, keys: List[str],
+                                   compute: Callable[[List[str]], Awaitable[Dict[str, Any]]]
+                                   ) -> Dict[str, Union[str, Exception]]:
+        """
+        Batch variant of aget_or_compute.
+
+        compute is called once with the keys that are neither cached nor
+        being generated by another request, and returns {key: explanation};
+        a key mapped to an exception, or left out, fails on its own without
+        failing the others. Keys in flight elsewhere are awaited.
+
+        Returns:
+            Dict[str, Union[str, Exception]]: The explanation of every key, or
+                the exception it failed with
+        """
+        values: Dict[str, Union[str, Exception]] = {}
+        leading: Dict[str, Future] = {}
+        waiting: Dict[str, Future] = {}
+        for key in keys:
+            value = await self.aget(key)
+            if value is not None:
+                values[key] = value
+                continue
+            future, leader = self._join(key)
+            (leading if leader else waiting)[key] = future
+        if leading:
+            try:
+                computed = await compute(list(leading))
+            except BaseException as e:
+                for key, future in leading.items():
+                    self._finish(key, future, error=e, calls=0)
+                raise
+            calls = 1
+            for key, future in leading.items():
+                value = computed.get(key, KeyError(f"No explanation generated for {key}"))
+                if isinstance(value, Exception):
+                    self._finish(key, future, error=value, calls=0)
+                else:
+                    await self._offload(partial(self._finish, key, future, value, calls=calls))
+                    calls = 0
+                values[key] = value
+        for key, future in waiting.items():
+            try:
+                values[key] = await asyncio.wrap_future(future)
+            except Exception as e:
+                values[key] = e
+        return values
+
+    async def astream_or_compute(self, key: str, stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """
+        Streaming variant of aget_or_compute.
+
+        Yields the chunks of stream() as they arrive and caches their
+        concatenation; a cached or in-flight explanation is yielded whole.
+        """
+        value = await self.aget(key)
+        if value is not None:
+            yield value
+            return
+        future, leader = self._join(key)
+        if not leader:
+            yield await asyncio.wrap_future(future)
+            return
+        chunks: List[str] = []
+        try:
+            async for chunk in stream():
+                chunks.append(chunk)
+                yield chunk
+        except BaseException as e:
+            # A client that disconnects closes the stream; requests waiting on it get an error
+            if not isinstance(e, Exception):
+                e = RuntimeError("Explanation stream was closed before it finished")
+            self._finish(key, future, error=e)
+            raise
+        await self._offload(self._finish, key, future, "".join(chunks))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the cache statistics plus LLM calls made and requests coalesced."""
+        stats = self.cache.stats()
+        stats["llm_calls"] = self.llm_calls
+        stats["coalesced"] = self.coalesced
+        return stats
@@ -0,0 +1,839 @@
+import re
+from typing import Dict, List, Any, Optional, Tuple
+from .sql_parser import ParsedSQL, QueryType, SQLSyntaxError
+from .prepared import Placeholder
+from .schema import SchemaRegistry, parse_datetime
+from .predicates import (Predicate, Comparison, And, Or, Like, TRUE, FALSE, compare, negate, simplify, to_filter,
+                         compare_constants, compile_likes, pinned_fields)
+
+# Token kinds
+IDENT = "IDENT"
+QIDENT = "QIDENT"
+KEYWORD = "KEYWORD"
+NUMBER = "NUMBER"
+STRING = "STRING"
+OP = "OP"
+PUNCT = "PUNCT"
+PARAM = "PARAM"
+EOF = "EOF"
+
+KEYWORDS = frozenset([
+    "SELECT", "FROM", "WHERE", "AND", "OR", "NOT", "IN", "LIKE", "ILIKE", "ORDER", "BY",
+    "ASC", "DESC", "LIMIT", "OFFSET", "INSERT", "INTO", "VALUES", "UPDATE", "SET",
+    "DELETE", "NULL", "TRUE", "FALSE", "AS", "IS", "BETWEEN", "GROUP", "HAVING",
+    "JOIN", "INNER", "LEFT", "RIGHT", "OUTER", "ON", "DISTINCT", "UNION",
+])
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<number>\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)
+  | (?P<string>'(?:[^'\\]|\\.|'')*')
+  | (?P<qident>"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\])
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<param>\?|:[A-Za-z_][A-Za-z0-9_]*|\$\d+)
+  | (?P<op><=|>=|<>|!=|=|<|>)
+  | (?P<punct>[(),.*;\-+])
+""", re.VERBOSE | re.DOTALL)
+
+Token = Tuple[str, str, str]
+
+_ESCAPE_RE = re.compile(r"\\(.)|''", re.DOTALL)
+# MySQL keeps the backslash of \% and \_ so LIKE patterns can still escape wildcards
+_ESCAPES = {"0": "\0", "n": "\n", "r": "\r", "t": "\t", "b": "\b", "Z": "\x1a", "%": "\\%", "_": "\\_"}
+
+AGGREGATE_FUNCTIONS = frozenset(["COUNT", "SUM", "AVG", "MIN", "MAX"])
+
+# SET values MongoDB fills in with the server's clock through $currentDate
+CURRENT_TIME_FUNCTIONS = frozenset(["CURRENT_TIMESTAMP", "CURRENT_DATE", "NOW", "LOCALTIMESTAMP"])
+
+def tokenize(sql_query: str) -> List[Token]:
+    """
+    Split a SQL query into (kind, text, upper-cased text) tuples in a single pass.
+
+    Args:
+        sql_query (str): The SQL query to tokenize
+
+    Returns:
+        List[Token]: The tokens, terminated by an EOF token
+    """
+    tokens = []
+    append = tokens.append
+    pos = 0
+    end = len(sql_query)
+    match = _TOKEN_RE.match
+    while pos < end:
+        m = match(sql_query, pos)
+        if m is None:
+            raise SQLSyntaxError(f"Unexpected character {sql_query[pos]!r} at position {pos}")
+        kind = m.lastgroup
+        text = m.group()
+        pos = m.end()
+        if kind == "ws" or kind == "comment":
+            continue
+        if kind == "ident":
+            upper = text.upper()
+            append((KEYWORD if upper in KEYWORDS else IDENT, text, upper))
+        elif kind == "qident":
+            append((QIDENT, text[1:-1], text[1:-1]))
+        else:
+            append((kind.upper(), text, text))
+    append((EOF, "", ""))
+    return tokens
+
+def unquote(text: str) -> str:
+    """Return the value of a quoted string literal, with escapes resolved."""
+    body = text[1:-1]
+    if "\\" not in body and "''" not in body:
+        return body
+    return _ESCAPE_RE.sub(lambda m: "'" if m.group(1) is None else _ESCAPES.get(m.group(1), m.group(1)), body)
+
+def number_value(text: str) -> Any:
+    """Return the int or float value of a numeric literal."""
+    if text.isdigit():
+        return int(text)
+    return float(text)
+
+def literal_value(text: str) -> Any:
+    """
+    Return the typed value of a literal given as source text.
+
+    Raises:
+        SQLSyntaxError: If the text is not a literal, e.g. a column reference
+            or a function call, which must not be compared as a string
+    """
+    parser = _StatementParser(tokenize(text), {})
+    value = parser._parse_literal()
+    parser.expect_end()
+    return value
+
+class FastSQLParser:
+    """
+    Recursive-descent parser for the SELECT/INSERT/UPDATE/DELETE subset
+    understood by the MongoDB builder.
+
+    Statements outside that subset raise SQLSyntaxError so that callers can
+    fall back to the general purpose sqlparse path.
+    """
+
+    def __init__(self, supported_operators: Dict[str, str], schema: Optional[SchemaRegistry] = None):
+        self.supported_operators = supported_operators
+        self.schema = schema
+
+    def parse(self, sql_query: str) -> ParsedSQL:
+        """
+        Parse a SQL query into a structured format in one pass.
+
+        Args:
+            sql_query (str): The SQL query to parse
+
+        Returns:
+            ParsedSQL: Structured representation of the SQL query
+        """
+        return _StatementParser(tokenize(sql_query), self.supported_operators, self.schema).parse_statement()
+
+    def parse_predicate(self, condition: str, table_name: Optional[str] = None) -> Predicate:
+        """
+        Parse the text of a WHERE condition, without the WHERE keyword.
+
+        Args:
+            condition (str): The condition, e.g. "age > 18 AND (a = 1 OR b = 2)"
+            table_name (Optional[str]): Table whose schema types the literals
+
+        Returns:
+            Predicate: The condition's expression tree, not yet simplified
+        """
+        parser = _StatementParser(tokenize(condition), self.supported_operators, self.schema)
+        parser._table = table_name
+        predicate = parser.parse_expression()
+        parser.expect_end()
+        return predicate
+
+class _StatementParser:
+    """Parsing state for a single statement."""
+
+    def __init__(self, tokens: List[Token], supported_operators: Dict[str, str],
+                 schema: Optional[SchemaRegistry] = None):
+        self.supported_operators = supported_operators
+        self._schema = schema
+        self._table: Optional[str] = None
+        # Maps the document path prefix of joined tables to the table name
+        self._joined: Dict[str, str] = {}
+        self._tokens = tokens
+        self._pos = 0
+        self._positional_params = 0
+        # Maps table names/aliases to the document path their columns live under
+        self._qualifiers: Dict[str, str] = {}
+        self._aggregates: List[Dict[str, Any]] = []
+        self._has_like = False
+        # Set when the WHERE clause is compiled
+        self._collation: Optional[Dict[str, Any]] = None
+        self._text_search: List[str] = []
+
+    def parse_statement(self) -> ParsedSQL:
+        kind, text, upper = self._tokens[0]
+        if kind != KEYWORD:
+            raise SQLSyntaxError(f"Unsupported statement starting with {text!r}")
+        if upper == "SELECT":
+            parsed = self._parse_select()
+        elif upper == "INSERT":
+            parsed = self._parse_insert()
+        elif upper == "UPDATE":
+            parsed = self._parse_update()
+        elif upper == "DELETE":
+            parsed = self._parse_delete()
+        else:
+            raise SQLSyntaxError(f"Unsupported statement type: {upper}")
+        self.expect_end()
+        return parsed
+
+    def expect_end(self) -> None:
+        self._accept_punct(";")
+        if self._tokens[self._pos][0] != EOF:
+            raise SQLSyntaxError(f"Unexpected token {self._tokens[self._pos][1]!r}")
+
+    # Token helpers
+
+    def _peek(self) -> Token:
+        return self._tokens[self._pos]
+
+    def _advance(self) -> Token:
+        token = self._tokens[self._pos]
+        self._pos += 1
+        return token
+
+    def _accept_keyword(self, keyword: str) -> bool:
+        token = self._tokens[self._pos]
+        if token[0] == KEYWORD and token[2] == keyword:
+            self._pos += 1
+            return True
+        return False
+
+    def _expect_keyword(self, keyword: str) -> None:
+        if not self._accept_keyword(keyword):
+            raise SQLSyntaxError(f"Expected {keyword}, found {self._peek()[1]!r}")
+
+    def _accept_punct(self, punct: str) -> bool:
+        token = self._tokens[self._pos]
+        if token[0] == PUNCT and token[1] == punct:
+            self._pos += 1
+            return True
+        return False
+
+    def _expect_punct(self, punct: str) -> None:
+        if not self._accept_punct(punct):
+            raise SQLSyntaxError(f"Expected {punct!r}, found {self._peek()[1]!r}")
+
+    # Grammar
+
+    def _parse_select(self) -> ParsedSQL:
+        self._advance()
+        if self._peek()[2] == "DISTINCT":
+            raise SQLSyntaxError("DISTINCT is not supported by the fast parser")
+        columns = self._parse_select_list()
+        self._expect_keyword("FROM")
+        table_name, alias = self._parse_table_ref()
+        self._table = table_name
+        self._qualifiers[table_name] = ""
+        self._qualifiers[alias] = ""
+        joins = self._parse_joins()
+        columns = [self._resolve(column) for column in columns]
+        for aggregate in self._aggregates:
+            aggregate["field"] = self._resolve(aggregate["field"])
+        where = self._parse_where()
+        group_by = self._parse_group_by()
+        having = self._parse_having()
+        order_by = self._parse_order_by()
+        limit, offset = self._parse_limit()
+        # A collation would also change how $lookup and $group compare strings, and
+        # how ORDER BY sorts them, so sorting is only allowed on fields known not to be strings
+        where_clause = self._where_filter(where, not (joins or group_by or self._aggregates) and all(
+            self._schema is not None
+            and self._schema.field_type(table_name, item["field"]) not in (None, "string")
+            for item in order_by or []
+        ))
+        for aggregate in self._aggregates:
+            self._aggregate_alias(aggregate)
+        if group_by or self._aggregates:
+            self._check_grouped(columns, group_by or [], order_by or [])
+        return ParsedSQL(
+            query_type=QueryType.SELECT,
+            table_name=table_name,
+            columns=columns,
+            where_clause=where_clause,
+            order_by=order_by,
+            limit=limit,
+            values=None,
+            group_by=group_by,
+            having=having,
+            joins=joins or None,
+            aggregates=self._aggregates or None,
+            collation=self._collation,
+            text_search=self._text_search or None,
+            offset=offset
+        )
+
+    def _parse_insert(self) -> ParsedSQL:
+        self._advance()
+        self._expect_keyword("INTO")
+        table_name = self._parse_table_name()
+        self._table = table_name
+        columns = []
+        if self._accept_punct("("):
+            columns.append(self._parse_identifier())
+            while self._accept_punct(","):
+                columns.append(self._parse_identifier())
+            self._expect_punct(")")
+        self._expect_keyword("VALUES")
+        rows = [self._parse_value_row()]
+        while self._accept_punct(","):
+            rows.append(self._parse_value_row())
+        if self._schema is not None and columns:
+            rows = [[self._coerce(column, value) for column, value in zip(columns, row)] + row[len(columns):]
+                    for row in rows]
+        return ParsedSQL(
+            query_type=QueryType.INSERT,
+            table_name=table_name,
+            columns=columns,
+            where_clause=None,
+            order_by=None,
+            limit=None,
+            values=rows
+        )
+
+    def _parse_update(self) -> ParsedSQL:
+        self._advance()
+        table_name, alias = self._parse_table_ref()
+        self._qualifiers[table_name] = self._qualifiers[alias] = ""
+        self._table = table_name
+        self._expect_keyword("SET")
+        columns = []
+        values = []
+        operators = []
+        while True:
+            column = self._parse_field()
+            if column in columns:
+                raise SQLSyntaxError(f"Column {column!r} is assigned more than once")
+            token = self._advance()
+            if token[0] != OP or token[1] != "=":
+                raise SQLSyntaxError(f"Expected '=' in SET, found {token[1]!r}")
+            operator, value = self._parse_assignment(column)
+            if self._schema is not None and operator in ("$set", "$min", "$max"):
+                value = self._coerce(column, value)
+            columns.append(column)
+            values.append(value)
+            operators.append(operator)
+            if not self._accept_punct(","):
+                break
+        where_clause = self._where_filter(self._parse_where())
+        return ParsedSQL(
+            query_type=QueryType.UPDATE,
+            table_name=table_name,
+            columns=columns,
+            where_clause=where_clause,
+            order_by=None,
+            limit=None,
+            values=values,
+            collation=self._collation,
+            text_search=self._text_search or None,
+            update_operators=operators,
+            single_row=self._pins_unique_key(where_clause)
+        )
+
+    def _parse_assignment(self, column: str) -> Tuple[str, Any]:
+        """
+        Parse the value of `column = ...` in SET as a MongoDB update operator and
+        its argument, so that the server applies the change atomically:
+        `views + 1` is $inc, `price * 2` $mul, LEAST/GREATEST $min/$max, NULL
+        $unset and CURRENT_TIMESTAMP/NOW() $currentDate.
+        """
+        kind, _, upper = self._peek()
+        if kind == IDENT and upper in CURRENT_TIME_FUNCTIONS:
+            self._advance()
+            if self._accept_punct("("):
+                self._expect_punct(")")
+            return "$currentDate", True
+        if kind == IDENT and upper in ("LEAST", "GREATEST") and self._tokens[self._pos + 1][1] == "(":
+            self._advance()
+            self._expect_punct("(")
+            if self._at_column():
+                self._expect_same_column(column)
+                self._expect_punct(",")
+                value = self._parse_literal()
+            else:
+                value = self._parse_literal()
+                self._expect_punct(",")
+                self._expect_same_column(column)
+            self._expect_punct(")")
+            return "$min" if upper == "LEAST" else "$max", value
+        if self._at_column():
+            self._expect_same_column(column)
+            kind, text, _ = self._advance()
+            if kind != PUNCT or text not in ("+", "-", "*"):
+                raise SQLSyntaxError(f"Unsupported SET expression operator {text!r}")
+            value = self._numeric_operand(column)
+            if text == "-":
+                if isinstance(value, Placeholder):
+                    raise SQLSyntaxError(f"Write {column} = {column} + ? with a negated parameter instead of - ?")
+                value = -value
+            return "$mul" if text == "*" else "$inc", value
+        value = self._parse_literal()
+        kind, text, _ = self._peek()
+        if kind == PUNCT and text in ("+", "*"):
+            # `1 + views` reads the same as `views + 1`
+            self._advance()
+            self._expect_same_column(column)
+            self._check_numeric(column, value)
+            return "$mul" if text == "*" else "$inc", value
+        if value is None:
+            return "$unset", ""
+        return "$set", value
+
+    def _at_column(self) -> bool:
+        kind, _, upper = self._peek()
+        if kind == QIDENT:
+            return True
+        # DATE '...' and TIMESTAMP '...' are typed literals, not columns
+        return kind == IDENT and not ((upper == "DATE" or upper == "TIMESTAMP")
+                                      and self._tokens[self._pos + 1][0] == STRING)
+
+    def _expect_same_column(self, column: str) -> None:
+        field = self._parse_field()
+        if field != column:
+            raise SQLSyntaxError(f"SET {column} can only be computed from {column} itself, found {field!r}")
+
+    def _numeric_operand(self, column: str) -> Any:
+        value = self._parse_literal()
+        self._check_numeric(column, value)
+        return value
+
+    def _check_numeric(self, column: str, value: Any) -> None:
+        if isinstance(value, bool) or not isinstance(value, (int, float, Placeholder)):
+            raise SQLSyntaxError(f"Arithmetic on {column} needs a numeric operand, found {value!r}")
+
+    def _pins_unique_key(self, where_clause: Optional[Dict[str, Any]]) -> bool:
+        """Whether the filter fixes every field of a unique key, so at most one row matches."""
+        if not where_clause:
+            return False
+        pinned = pinned_fields(where_clause)
+        if not pinned:
+            return False
+        keys = self._schema.unique_keys(self._table) if self._schema is not None else [("_id",)]
+        return any(all(field in pinned for field in key) for key in keys)
+
+    def _parse_delete(self) -> ParsedSQL:
+        self._advance()
+        self._expect_keyword("FROM")
+        table_name, alias = self._parse_table_ref()
+        self._qualifiers[table_name] = self._qualifiers[alias] = ""
+        self._table = table_name
+        where_clause = self._where_filter(self._parse_where())
+        return ParsedSQL(
+            query_type=QueryType.DELETE,
+            table_name=table_name,
+            columns=[],
+            where_clause=where_clause,
+            order_by=None,
+            limit=None,
+            values=None,
+            collation=self._collation,
+            text_search=self._text_search or None
+        )
+
+    def _parse_select_list(self) -> List[str]:
+        if self._accept_punct("*"):
+            return ["*"]
+        columns = []
+        while True:
+            column = self._parse_select_item()
+            if column is not None:
+                columns.append(column)
+            if not self._accept_punct(","):
+                return columns
+
+    def _parse_select_item(self) -> Optional[str]:
+        """Parse a select list entry; aggregates are recorded and return None."""
+        if self._at_aggregate():
+            aggregate = self._parse_aggregate_call()
+            alias = self._parse_alias()
+            if alias:
+                aggregate["alias"] = alias
+            self._aggregates.append(aggregate)
+            return None
+        column = self._parse_column()
+        self._parse_alias()
+        return column
+
+    def _at_aggregate(self) -> bool:
+        kind, _, upper = self._peek()
+        return (kind == IDENT and upper in AGGREGATE_FUNCTIONS
+                and self._tokens[self._pos + 1][1] == "(")
+
+    def _parse_aggregate_call(self) -> Dict[str, Any]:
+        """Parse COUNT(*), COUNT(col), SUM(col), AVG(col), MIN(col) or MAX(col)."""
+        function = self._advance()[2]
+        self._expect_punct("(")
+        if self._peek()[2] == "DISTINCT":
+            raise SQLSyntaxError("DISTINCT aggregates are not supported by the fast parser")
+        if function == "COUNT" and self._accept_punct("*"):
+            field = "*"
+        else:
+            field = self._parse_column()
+        self._expect_punct(")")
+        return {"function": function, "field": field, "alias": None, "hidden": False}
+
+    def _aggregate_name(self, function: str, field: str) -> str:
+        """Find or register the aggregate used by HAVING/ORDER BY and return its output name."""
+        for aggregate in self._aggregates:
+            if aggregate["function"] == function and aggregate["field"] == field:
+                return self._aggregate_alias(aggregate)
+        aggregate = {"function": function, "field": field, "alias": None, "hidden": True}
+        self._aggregates.append(aggregate)
+        return self._aggregate_alias(aggregate)
+
+    def _aggregate_alias(self, aggregate: Dict[str, Any]) -> str:
+        if not aggregate["alias"]:
+            if aggregate["field"] == "*":
+                aggregate["alias"] = aggregate["function"].lower()
+            else:
+                field = aggregate["field"].replace(".", "_")
+                aggregate["alias"] = f"{aggregate['function'].lower()}_{field}"
+        return aggregate["alias"]
+
+    def _parse_alias(self) -> Optional[str]:
+        if self._accept_keyword("AS"):
+            return self._parse_identifier()
+        if self._peek()[0] in (IDENT, QIDENT):
+            return self._advance()[1]
+        return None
+
+    def _parse_identifier(self) -> str:
+        token = self._advance()
+        if token[0] != IDENT and token[0] != QIDENT:
+            raise SQLSyntaxError(f"Expected identifier, found {token[1]!r}")
+        return token[1]
+
+    def _parse_qualified_name(self) -> List[str]:
+        parts = [self._parse_identifier()]
+        while self._accept_punct("."):
+            parts.append(self._parse_identifier())
+        return parts
+
+    def _parse_column(self) -> str:
+        """Parse a possibly qualified column name, keeping its table qualifier."""
+        return ".".join(self._parse_qualified_name()[-2:])
+
+    def _parse_field(self) -> str:
+        """Parse a column name and resolve it to a document field path."""
+        return self._resolve(self._parse_column())
+
+    def _coerce_value(self, field: str, value: Any) -> Any:
+        """Coerce a literal compared with field when there is a schema."""
+        return self._coerce(field, value) if self._schema is not None else value
+
+    def _coerce(self, field: str, value: Any) -> Any:
+        """Give a literal the schema type of the field it is compared with or stored in."""
+        if "." in field:
+            prefix, name = field.split(".", 1)
+            table = self._joined.get(prefix + ".")
+            if table is not None:
+                return self._schema.coerce(table, name, value)
+        return self._schema.coerce(self._table, field, value)
+
+    def _resolve(self, column: str) -> str:
+        """
+        Map a column to its document field path.
+
+        Columns of the queried table are top-level fields; columns of a joined
+        table live under the join alias. Unknown qualifiers are dropped.
+        """
+        if "." not in column:
+            return column
+        qualifier, name = column.split(".", 1)
+        return self._qualifiers.get(qualifier, "") + name
+
+    def _parse_table_name(self) -> str:
+        return self._parse_qualified_name()[-1]
+
+    def _parse_table_ref(self) -> Tuple[str, str]:
+        """Parse a table reference and return its (real name, alias)."""
+        table_name = self._parse_table_name()
+        alias = self._parse_alias()
+        return table_name, alias or table_name
+
+    def _parse_joins(self) -> List[Dict[str, Any]]:
+        joins = []
+        while True:
+            upper = self._peek()[2]
+            if upper == "JOIN" or upper == "INNER":
+                join_type = "INNER"
+            elif upper == "LEFT":
+                join_type = "LEFT"
+            else:
+                return joins
+            self._advance()
+            if join_type == "LEFT":
+                self._accept_keyword("OUTER")
+            if upper != "JOIN":
+                self._expect_keyword("JOIN")
+            table_name, alias = self._parse_table_ref()
+            self._expect_keyword("ON")
+            left = self._parse_column()
+            token = self._advance()
+            if token[0] != OP or token[1] != "=":
+                raise SQLSyntaxError("Only equality join conditions are supported")
+            right = self._parse_column()
+            # The side qualified with the joined table is the foreign field
+            if right.split(".", 1)[0] == alias:
+                local, foreign = left, right
+            elif left.split(".", 1)[0] == alias:
+                local, foreign = right, left
+            else:
+                raise SQLSyntaxError(f"Join condition does not reference {alias!r}")
+            joins.append({
+                "table": table_name,
+                "alias": alias,
+                "type": join_type,
+                "local_field": self._resolve(local),
+                "foreign_field": foreign.split(".", 1)[1]
+            })
+            self._qualifiers[alias] = alias + "."
+            self._joined[alias + "."] = table_name
+
+    def _parse_where(self) -> Optional[Predicate]:
+        if not self._accept_keyword("WHERE"):
+            return None
+        return self.parse_expression()
+
+    def _where_filter(self, predicate: Optional[Predicate], allow_collation: bool = True) -> Optional[Dict[str, Any]]:
+        """Compile LIKEs, simplify and render the WHERE condition, noting the collation it needs."""
+        if predicate is None:
+            return None
+        if self._has_like:
+            predicate, self._collation, self._text_search = compile_likes(predicate, allow_collation)
+        return to_filter(simplify(predicate))
+
+    def parse_expression(self) -> Predicate:
+        """Parse a boolean condition; NOT binds tighter than AND, and AND tighter than OR."""
+        predicate = self._parse_conjunction()
+        if self._peek()[2] != "OR":
+            return predicate
+        children = [predicate]
+        while self._accept_keyword("OR"):
+            children.append(self._parse_conjunction())
+        return Or(children)
+
+    def _parse_conjunction(self) -> Predicate:
+        predicate = self._parse_negation()
+        if self._peek()[2] != "AND":
+            return predicate
+        children = [predicate]
+        while self._accept_keyword("AND"):
+            children.append(self._parse_negation())
+        return And(children)
+
+    def _parse_negation(self) -> Predicate:
+        if self._accept_keyword("NOT"):
+            return negate(self._parse_negation())
+        if self._accept_punct("("):
+            predicate = self.parse_expression()
+            self._expect_punct(")")
+            return predicate
+        kind, _, upper = self._peek()
+        if kind == KEYWORD and (upper == "TRUE" or upper == "FALSE") and self._tokens[self._pos + 1][0] != OP:
+            self._advance()
+            return TRUE if upper == "TRUE" else FALSE
+        if kind in (NUMBER, STRING, PUNCT) or kind == KEYWORD and upper in ("TRUE", "FALSE"):
+            return self._parse_constant_comparison()
+        return self._parse_condition()
+
+    def _parse_constant_comparison(self) -> Predicate:
+        """Parse a comparison of two literals, such as the `1 = 1` of generated queries."""
+        left = self._parse_literal()
+        kind, text, _ = self._advance()
+        if kind != OP:
+            raise SQLSyntaxError(f"Expected comparison operator, found {text!r}")
+        operator = self.supported_operators["!=" if text == "<>" else text]
+        try:
+            return compare_constants(left, operator, self._parse_literal())
+        except ValueError as e:
+            raise SQLSyntaxError(str(e))
+
+    def _parse_condition(self) -> Predicate:
+        field = self._parse_field()
+        kind, text, upper = self._advance()
+        negated = False
+        if kind == KEYWORD and upper == "NOT":
+            negated = True
+            kind, text, upper = self._advance()
+            if kind != KEYWORD or upper not in ("IN", "LIKE", "ILIKE", "BETWEEN"):
+                raise SQLSyntaxError(f"Unsupported operator NOT {text!r}")
+        if kind == OP:
+            operator = "!=" if text == "<>" else text
+            predicate = compare(field, self.supported_operators[operator],
+                                self._coerce_value(field, self._parse_literal()))
+        elif kind == KEYWORD and upper == "IN":
+            predicate = compare(field, self.supported_operators["IN"],
+                                self._coerce_value(field, self._parse_literal_list()))
+        elif kind == KEYWORD and (upper == "LIKE" or upper == "ILIKE"):
+            return self._parse_like(field, upper == "ILIKE", negated)
+        elif kind == KEYWORD and upper == "BETWEEN":
+            low = self._parse_literal()
+            self._expect_keyword("AND")
+            high = self._parse_literal()
+            predicate = And([compare(field, "$gte", self._coerce_value(field, low)),
+                             compare(field, "$lte", self._coerce_value(field, high))])
+        elif kind == KEYWORD and upper == "IS":
+            predicate = Comparison(field, "$ne" if self._accept_keyword("NOT") else "$eq", None)
+            self._expect_keyword("NULL")
+        else:
+            raise SQLSyntaxError(f"Unsupported condition operator {text!r}")
+        return negate(predicate) if negated else predicate
+
+    def _parse_like(self, field: str, case_insensitive: bool, negated: bool) -> Like:
+        pattern = self._parse_literal()
+        if not isinstance(pattern, str):
+            # The pattern decides between equality, range and regex, so it must be known
+            raise SQLSyntaxError(f"LIKE patterns must be string literals, found {pattern!r}")
+        escape = "\\"
+        if self._peek()[2] == "ESCAPE":
+            self._advance()
+            escape = self._parse_literal()
+            if not isinstance(escape, str) or len(escape) > 1:
+                raise SQLSyntaxError(f"ESCAPE must be a single character, found {escape!r}")
+            # ESCAPE '' turns escaping off
+            escape = escape or None
+        self._has_like = True
+        return Like(field, pattern, escape, case_insensitive, negated)
+
+    def _parse_literal(self) -> Any:
+        """Parse a literal and return its typed value."""
+        kind, text, upper = self._tokens[self._pos]
+        self._pos += 1
+        if kind == STRING:
+            return unquote(text)
+        if kind == NUMBER:
+            return int(text) if text.isdigit() else float(text)
+        if kind == PARAM:
+            return self._make_placeholder(text)
+        if kind == KEYWORD:
+            if upper == "NULL":
+                return None
+            if upper == "TRUE" or upper == "FALSE":
+                return upper == "TRUE"
+        if kind == IDENT and (upper == "DATE" or upper == "TIMESTAMP") and self._peek()[0] == STRING:
+            # Typed literal: DATE '2024-01-31' or TIMESTAMP '2024-01-31 12:00:00'
+            value = unquote(self._advance()[1])
+            try:
+                return parse_datetime(value)
+            except ValueError:
+                raise SQLSyntaxError(f"Invalid {upper} literal {value!r}")
+        if kind == PUNCT and text in ("-", "+"):
+            number = self._advance()
+            if number[0] == NUMBER:
+                value = number_value(number[1])
+                return -value if text == "-" else value
+        raise SQLSyntaxError(f"Expected literal, found {text!r}")
+
+    def _make_placeholder(self, text: str) -> Placeholder:
+        if text == "?":
+            placeholder = Placeholder(self._positional_params)
+            self._positional_params += 1
+            return placeholder
+        if text[0] == "$":
+            # PostgreSQL numbers its positional parameters from $1
+            return Placeholder(int(text[1:]) - 1)
+        return Placeholder(text[1:])
+
+    def _parse_literal_list(self) -> List[Any]:
+        self._expect_punct("(")
+        values = [self._parse_literal()]
+        while self._accept_punct(","):
+            values.append(self._parse_literal())
+        self._expect_punct(")")
+        return values
+
+    def _parse_value_row(self) -> List[Any]:
+        return self._parse_literal_list()
+
+    def _parse_order_by(self) -> Optional[List[Dict[str, str]]]:
+        if not self._accept_keyword("ORDER"):
+            return None
+        self._expect_keyword("BY")
+        order_by = []
+        while True:
+            if self._at_aggregate():
+                call = self._parse_aggregate_call()
+                field = self._aggregate_name(call["function"], self._resolve(call["field"]))
+            else:
+                field = self._parse_field()
+            direction = "ASC"
+            if self._accept_keyword("DESC"):
+                direction = "DESC"
+            else:
+                self._accept_keyword("ASC")
+            order_by.append({"field": field, "direction": direction})
+            if not self._accept_punct(","):
+                return order_by
+
+    def _parse_group_by(self) -> Optional[List[str]]:
+        if not self._accept_keyword("GROUP"):
+            return None
+        self._expect_keyword("BY")
+        group_by = [self._parse_field()]
+        while self._accept_punct(","):
+            group_by.append(self._parse_field())
+        return group_by
+
+    def _check_grouped(self, columns: List[str], group_by: List[str], order_by: List[Dict[str, str]]) -> None:
+        """Reject select and sort fields that are neither grouped nor aggregated."""
+        aliases = {aggregate["alias"] for aggregate in self._aggregates}
+        for column in columns:
+            if column not in group_by:
+                raise SQLSyntaxError(f"Column {column!r} must appear in GROUP BY or be used in an aggregate")
+        for item in order_by:
+            if item["field"] not in group_by and item["field"] not in aliases:
+                raise SQLSyntaxError(f"ORDER BY {item['field']!r} must appear in GROUP BY or be used in an aggregate")
+
+    def _parse_having(self) -> Optional[Dict[str, Any]]:
+        """
+        Parse HAVING conditions keyed by aggregate output name or group column.
+        """
+        if not self._accept_keyword("HAVING"):
+            return None
+        conditions = []
+        while True:
+            if self._at_aggregate():
+                call = self._parse_aggregate_call()
+                field = self._aggregate_name(call["function"], self._resolve(call["field"]))
+                token = self._advance()
+                if token[0] != OP:
+                    raise SQLSyntaxError(f"Unsupported HAVING operator {token[1]!r}")
+                operator = "!=" if token[1] == "<>" else token[1]
+                conditions.append(Comparison(field, self.supported_operators[operator], self._parse_literal()))
+            else:
+                conditions.append(self._parse_condition())
+            if not self._accept_keyword("AND"):
+                # Collations apply to the whole pipeline, so HAVING ILIKEs stay regexes
+                return to_filter(simplify(compile_likes(And(conditions), False)[0]))
+
+    def _parse_limit(self) -> Tuple[Optional[int], Optional[int]]:
+        """Parse `LIMIT n [OFFSET m]`, MySQL's `LIMIT m, n` or `OFFSET m [LIMIT n]` as (limit, offset)."""
+        limit = offset = None
+        if self._accept_keyword("LIMIT"):
+            limit = self._parse_count("LIMIT")
+            if self._accept_punct(","):
+                offset, limit = limit, self._parse_count("LIMIT")
+            elif self._accept_keyword("OFFSET"):
+                offset = self._parse_count("OFFSET")
+        elif self._accept_keyword("OFFSET"):
+            offset = self._parse_count("OFFSET")
+            if self._accept_keyword("LIMIT"):
+                limit = self._parse_count("LIMIT")
+        return limit, offset
+
+    def _parse_count(self, clause: str) -> int:
+        kind, text, _ = self._advance()
+        if kind != NUMBER or not text.isdigit():
+            raise SQLSyntaxError(f"Expected integer {clause}, found {text!r}")
+        return int(text)
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import re
+from typing import Dict, List, Any, Tuple
+from .fast_parser import tokenize, KEYWORD, NUMBER, STRING, PARAM, OP, QIDENT, EOF
+from .sql_parser import SQLSyntaxError
+
+# Tokens after which a "-" is a sign rather than a subtraction
+_SIGN_CONTEXT = frozenset([OP, KEYWORD])
+
+# Lexes like fast_parser.tokenize, but only captures the tokens that may
+# contain quotes or digits; number and string literals match without a
+# capture. Every alternative starts with different characters, so the
+# tokens found are the tokenizer's.
+_LITERAL_SPLIT_RE = re.compile(r"""
+    (--[^\n]*|/\*.*?\*/
+    |"(?:[^"]|"")*"|`(?:[^`]|``)*`|\[[^\]]*\]
+    |[A-Za-z_][A-Za-z0-9_$]*
+    |\?|:[A-Za-z_][A-Za-z0-9_]*|\$\d+)
+  | \d+(?:\.\d*)?(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?
+  | '(?:[^'\\]|\\.|'')*'
+""", re.VERBOSE | re.DOTALL)
+
+def literal_skeleton(sql_query: str) -> Tuple[Any, ...]:
+    """
+    The text of a query around its literals, computed in a single regex pass.
+
+    Queries with equal skeletons differ only in their literal values, so they
+    have the same fingerprint; this makes a cheap key for memoizing
+    fingerprint() over logs that repeat a few shapes many times.
+    """
+    return tuple(_LITERAL_SPLIT_RE.split(sql_query))
+
+def fingerprint(sql_query: str) -> str:
+    """
+    Normalize a SQL query to its shape.
+
+    Literals and placeholders become "?", keywords are upper-cased, whitespace
+    and comments are dropped, and IN lists and multi-row VALUES collapse to a
+    single "?" and a single row, so queries that differ only in their values
+    share a fingerprint.
+
+    Args:
+        sql_query (str): The SQL query
+
+    Returns:
+        str: The normalized query text
+    """
+    try:
+        tokens = tokenize(sql_query)
+    except SQLSyntaxError:
+        return " ".join(sql_query.split())
+
+    parts: List[str] = []
+    kinds: List[str] = []
+    for kind, text, upper in tokens:
+        if kind == EOF:
+            break
+        if kind in (NUMBER, STRING, PARAM):
+            if parts and parts[-1] == "-" and (len(parts) == 1 or kinds[-2] in _SIGN_CONTEXT or parts[-2] in ("(", ",")):
+                parts.pop()
+                kinds.pop()
+            if len(parts) >= 2 and parts[-1] == "," and parts[-2] == "?":
+                # Collapse "?, ?, ?" lists into one "?"
+                parts.pop()
+                kinds.pop()
+                continue
+            text = "?"
+        elif text == ")" and parts[-3:] == [",", "(", "?"] and parts[-6:-3] == ["(", "?", ")"]:
+            # Collapse "(?), (?)" rows into one row
+            del parts[-3:]
+            del kinds[-3:]
+            continue
+        elif kind == KEYWORD:
+            text = upper
+        elif kind == QIDENT:
+            text = f'"{text}"'
+        parts.append(text)
+        kinds.append(kind)
+
+    if parts and parts[-1] == ";":
+        parts.pop()
+    sql = []
+    for index, part in enumerate(parts):
+        if index and part not in (")", ",", ".") and parts[index - 1] not in ("(", "."):
+            sql.append(" ")
+        sql.append(part)
+    return "".join(sql)
+
+def _normalize_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    # Sort directions and flags such as multi change what the query does, not just its values
+    return {key: item if key == "sort" or isinstance(item, bool) else _normalize_values(item)
+            for key, item in options.items()}
+
+def _normalize_values(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _normalize_options(item) if key == "options" and isinstance(item, dict)
+                else item if key == "$sort" else _normalize_values(item)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        items = [_normalize_values(item) for item in value]
+        # Lists of scalars (IN lists, VALUES rows) vary in length, not shape
+        return ["?"] if items and all(item == "?" for item in items) else items
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+def query_shape(mongodb_query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replace the literal values in a translated query with "?", keeping field
+    paths, operators, sort directions and boolean options.
+    """
+    shape = _normalize_values(mongodb_query)
+    shape["collection"] = mongodb_query.get("collection")
+    shape["operation"] = mongodb_query.get("operation")
+    return shape
+
+def fingerprint_hash(*parts: Any) -> str:
+    """Stable hex digest of one or more fingerprints or JSON-serializable shapes."""
+    data = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
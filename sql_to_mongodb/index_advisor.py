@@ -0,0 +1,243 @@
+import json
+from collections import Counter
+from typing import Dict, List, Any, Optional, Iterable, Tuple, Union
+from .translator import SQLToMongoDBTranslator
+
+# Operators that match many index keys; $type and $exists scan the field's whole bounds
+RANGE_OPERATORS = frozenset(["$gt", "$gte", "$lt", "$lte", "$ne", "$nin", "$regex", "$exists", "$type"])
+
+IndexKey = Tuple[Tuple[str, int], ...]
+
+class QueryShape:
+    """The fields one query filters on equality, sorts on and filters on ranges."""
+
+    def __init__(self, collection: str, sql_query: str, weight: float,
+                 collation: Optional[Dict[str, Any]] = None):
+        self.collection = collection
+        self.sql_query = sql_query
+        self.weight = weight
+        # Only an index with the query's collation can serve its string comparisons
+        self.collation = collation
+        self.equality: List[str] = []
+        self.sort: List[Tuple[str, int]] = []
+        self.range: List[str] = []
+
+def _classify_filter(conditions: Dict[str, Any], shape: QueryShape, has_sort: bool) -> None:
+    for field, condition in conditions.items():
+        if field == "$and":
+            for clause in condition:
+                _classify_filter(clause, shape, has_sort)
+            continue
+        if field.startswith("$"):
+            continue
+        operators = set(condition) if isinstance(condition, dict) else {"$eq"}
+        if operators & RANGE_OPERATORS:
+            target = shape.range
+        elif "$in" in operators and has_sort:
+            # $in returns several key ranges, so it cannot feed a sort
+            target = shape.range
+        else:
+            target = shape.equality
+        if field not in target:
+            target.append(field)
+
+def extract_shapes(mongodb_query: Dict[str, Any], sql_query: str, weight: float = 1.0) -> List[QueryShape]:
+    """
+    Extract the index-relevant shapes of a translated query.
+
+    Args:
+        mongodb_query (Dict[str, Any]): Output of SQLToMongoDBTranslator.translate
+        sql_query (str): The SQL the query was translated from
+        weight (float): Relative frequency or cost of the query
+
+    Returns:
+        List[QueryShape]: One shape per index the query could use; each branch
+            of a top-level $or and each $lookup target get their own shape
+    """
+    operation = mongodb_query["operation"]
+    collection = mongodb_query["collection"]
+    collation = (mongodb_query.get("options") or {}).get("collation")
+    filters: List[Dict[str, Any]] = []
+    sort: Dict[str, int] = {}
+    shapes: List[QueryShape] = []
+
+    if operation in ("find", "update", "delete"):
+        filters.append(mongodb_query.get("filter") or {})
+        sort = mongodb_query.get("options", {}).get("sort") or {}
+    elif operation == "aggregate":
+        conditions: Dict[str, Any] = {}
+        leading = True
+        for stage in mongodb_query["pipeline"]:
+            name, spec = next(iter(stage.items()))
+            if leading and name == "$match":
+                conditions.update(spec)
+            elif leading and name == "$sort":
+                sort = spec
+                leading = False
+            elif name == "$lookup" and "localField" in spec:
+                lookup = QueryShape(spec["from"], sql_query, weight)
+                lookup.equality.append(spec["foreignField"])
+                shapes.append(lookup)
+                leading = False
+            elif name != "$project":
+                leading = False
+        filters.append(conditions)
+    else:
+        return shapes
+
+    if len(filters[0]) == 1 and "$or" in filters[0]:
+        filters = filters[0]["$or"]
+
+    for conditions in filters:
+        shape = QueryShape(collection, sql_query, weight, collation)
+        _classify_filter(conditions, shape, bool(sort))
+        shape.sort = [(field, direction) for field, direction in sort.items()
+                      if field not in shape.equality]
+        if shape.equality or shape.sort or shape.range:
+            shapes.append(shape)
+    return shapes
+
+class IndexRecommendation:
+    """A recommended compound index and the workload queries it serves."""
+
+    def __init__(self, collection: str, keys: IndexKey, collation: Optional[Dict[str, Any]] = None):
+        self.collection = collection
+        self.keys = keys
+        self.collation = collation
+        self.weight = 0.0
+        self.queries: List[str] = []
+
+    @property
+    def command(self) -> str:
+        keys = ", ".join(f"{json.dumps(field)}: {direction}" for field, direction in self.keys)
+        options = f", {{\"collation\": {json.dumps(self.collation)}}}" if self.collation else ""
+        return f"db.getCollection({json.dumps(self.collection)}).createIndex({{{keys}}}{options})"
+
+    def covers(self, other: "IndexRecommendation") -> bool:
+        """Whether this index makes other redundant (same collation, other's keys a prefix of ours)."""
+        if (other.collection != self.collection or other.collation != self.collation
+                or len(other.keys) > len(self.keys)):
+            return False
+        prefix = self.keys[:len(other.keys)]
+        inverted = tuple((field, -direction) for field, direction in other.keys)
+        return prefix == other.keys or prefix == inverted
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "collection": self.collection,
+            "keys": dict(self.keys),
+            "collation": self.collation,
+            "command": self.command,
+            "weight": self.weight,
+            "queries": self.queries
+        }
+
+class IndexAdvisor:
+    """
+    Recommend compound indexes for a weighted SQL workload.
+
+    Each query's keys are ordered by the equality-sort-range rule: fields
+    compared for equality first, then the sort fields, then range fields.
+    Equality fields are ordered by how often the workload filters on them
+    so that related queries share index prefixes, and indexes that are a
+    prefix of another recommendation are folded into it.
+    """
+
+    def __init__(self, translator: Optional[SQLToMongoDBTranslator] = None):
+        self.translator = translator or SQLToMongoDBTranslator()
+        self.shapes: List[QueryShape] = []
+        self.failures: List[Dict[str, str]] = []
+
+    def add(self, sql_query: str, weight: float = 1.0) -> None:
+        """
+        Add a query to the workload.
+
+        Args:
+            sql_query (str): The SQL query
+            weight (float): Relative frequency or cost of the query
+        """
+        try:
+            mongodb_query = self.translator.translate(sql_query)
+        except Exception as e:
+            self.failures.append({"sql_query": sql_query, "message": str(e)})
+            return
+        self.shapes.extend(extract_shapes(mongodb_query, sql_query, weight))
+
+    def add_workload(self, workload: Iterable[Union[str, Tuple[str, float]]]) -> None:
+        """Add queries given as SQL strings or (SQL, weight) pairs."""
+        for item in workload:
+            if isinstance(item, str):
+                self.add(item)
+            else:
+                self.add(item[0], item[1])
+
+    def _index_key(self, shape: QueryShape, frequency: Counter) -> IndexKey:
+        equality = sorted(shape.equality, key=lambda field: (-frequency[(shape.collection, field)], field))
+        keys = [(field, 1) for field in equality]
+        seen = set(equality)
+        for field, direction in shape.sort:
+            if field not in seen:
+                keys.append((field, direction))
+                seen.add(field)
+        for field in shape.range:
+            if field not in seen:
+                keys.append((field, 1))
+                seen.add(field)
+        return tuple(keys)
+
+    def recommend(self) -> List[IndexRecommendation]:
+        """
+        Compute index recommendations for the workload added so far.
+
+        Returns:
+            List[IndexRecommendation]: Recommendations, heaviest workload share first
+        """
+        frequency: Counter = Counter()
+        for shape in self.shapes:
+            for field in shape.equality:
+                frequency[(shape.collection, field)] += shape.weight
+
+        candidates: Dict[Tuple[str, IndexKey, str], IndexRecommendation] = {}
+        for shape in self.shapes:
+            keys = self._index_key(shape, frequency)
+            if keys == (("_id", 1),):
+                continue
+            candidate = (shape.collection, keys, json.dumps(shape.collation, sort_keys=True))
+            recommendation = candidates.get(candidate)
+            if recommendation is None:
+                recommendation = candidates[candidate] = IndexRecommendation(shape.collection, keys,
+                                                                            shape.collation)
+            recommendation.weight += shape.weight
+            if shape.sql_query not in recommendation.queries:
+                recommendation.queries.append(shape.sql_query)
+
+        # Fold prefix-redundant indexes into the longest index covering them
+        ordered = sorted(candidates.values(), key=lambda r: -len(r.keys))
+        kept: List[IndexRecommendation] = []
+        for recommendation in ordered:
+            covering = next((index for index in kept if index.covers(recommendation)), None)
+            if covering is None:
+                kept.append(recommendation)
+                continue
+            covering.weight += recommendation.weight
+            for sql_query in recommendation.queries:
+                if sql_query not in covering.queries:
+                    covering.queries.append(sql_query)
+
+        return sorted(kept, key=lambda r: (-r.weight, r.collection, r.keys))
+
+def recommend_indexes(workload: Iterable[Union[str, Tuple[str, float]]],
+                      translator: Optional[SQLToMongoDBTranslator] = None) -> List[Dict[str, Any]]:
+    """
+    Recommend compound indexes for a weighted SQL workload.
+
+    Args:
+        workload: SQL strings or (SQL, weight) pairs
+        translator (Optional[SQLToMongoDBTranslator]): Translator to use
+
+    Returns:
+        List[Dict[str, Any]]: createIndex commands with the queries each index serves
+    """
+    advisor = IndexAdvisor(translator)
+    advisor.add_workload(workload)
+    return [recommendation.to_dict() for recommendation in advisor.recommend()]
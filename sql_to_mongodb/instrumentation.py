@@ -0,0 +1,236 @@
+import functools
+import threading
+import time
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+# A hook receives (stage, seconds, labels, error); error is None on success
+Hook = Callable[[str, float, Dict[str, str], Optional[BaseException]], None]
+
+_hooks: List[Hook] = []
+
+def add_hook(hook: Hook) -> None:
+    """Register a hook called after every instrumented stage."""
+    if hook not in _hooks:
+        _hooks.append(hook)
+        if len(_hooks) == 1:
+            _install(True)
+
+def remove_hook(hook: Hook) -> None:
+    """Unregister a hook; instrumentation is free again once none are left."""
+    if hook in _hooks:
+        _hooks.remove(hook)
+        if not _hooks:
+            _install(False)
+
+def record(stage: str, seconds: float, labels: Optional[Dict[str, str]] = None,
+           error: Optional[BaseException] = None) -> None:
+    """Report a stage timed elsewhere, e.g. by a LangChain callback."""
+    for hook in list(_hooks):
+        hook(stage, seconds, labels or {}, error)
+
+class _Span:
+    """Times one stage and reports it to the registered hooks."""
+
+    __slots__ = ("stage", "labels", "start")
+
+    def __init__(self, stage: str, labels: Dict[str, str]):
+        self.stage = stage
+        self.labels = labels
+
+    def __bool__(self) -> bool:
+        return True
+
+    def set(self, **labels: str) -> None:
+        """Add labels discovered while the stage runs, e.g. the query type."""
+        self.labels.update(labels)
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        elapsed = time.perf_counter() - self.start
+        for hook in list(_hooks):
+            hook(self.stage, elapsed, self.labels, exc)
+        return False
+
+class _NoopSpan:
+    """Stands in for _Span while no hooks are registered."""
+
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def set(self, **labels: str) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+_NOOP = _NoopSpan()
+
+def timed(stage: str, **labels: str):
+    """
+    Time a stage for the registered hooks.
+
+    With no hooks registered a shared no-op span is returned. Spans are
+    falsy when disabled, which lets callers skip computing labels:
+
+        with timed("agent.llm") as span:
+            if span:
+                span.set(model=...)
+
+    Prefer the instrumented decorator on hot paths; it is free when disabled.
+    """
+    if not _hooks:
+        return _NOOP
+    return _Span(stage, labels)
+
+# (owner class, attribute name, plain function, timed wrapper) of instrumented methods
+_methods: List[Tuple[type, str, Callable, Callable]] = []
+
+def _install(enabled: bool) -> None:
+    for owner, name, func, wrapper in _methods:
+        setattr(owner, name, wrapper if enabled else func)
+
+class instrumented:
+    """
+    Decorator timing every call of a method as a stage.
+
+    The plain method stays on the class while no hooks are registered and the
+    timed wrapper is swapped in when the first hook is added, so disabled
+    instrumentation costs nothing on the hot path.
+
+    Args:
+        stage (str): Stage name reported to the hooks
+        labels: Called with the method's arguments to compute labels
+        result_labels: Called with the return value to compute more labels
+        fallback: Exception types that hand the work to another path; calls
+            raising them are labelled result="fallback" instead of counted
+            as errors, and other calls result="ok"
+    """
+
+    def __init__(self, stage: str, labels: Optional[Callable[..., Dict[str, str]]] = None,
+                 result_labels: Optional[Callable[[Any], Dict[str, str]]] = None,
+                 fallback: Tuple[type, ...] = ()):
+        self.stage = stage
+        self.labels = labels
+        self.result_labels = result_labels
+        self.fallback = fallback
+
+    def __call__(self, func: Callable) -> "instrumented":
+        self.func = func
+        return self
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        func, stage, labels, result_labels = self.func, self.stage, self.labels, self.result_labels
+        fallback = self.fallback
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(stage, labels(*args, **kwargs) if labels else {}) as span:
+                try:
+                    result = func(*args, **kwargs)
+                except fallback as e:
+                    # Leave the with block first so the hooks see no error
+                    span.set(result="fallback")
+                    handoff = e
+                else:
+                    if fallback:
+                        span.set(result="ok")
+                    if result_labels:
+                        span.set(**result_labels(result))
+                    return result
+            raise handoff
+
+        _methods.append((owner, name, func, wrapper))
+        setattr(owner, name, wrapper if _hooks else func)
+
+def statement_kind(sql_query: str) -> str:
+    """Low-cardinality query type label from a statement's leading keyword."""
+    keyword = sql_query.lstrip().split(None, 1)[0].upper() if sql_query.strip() else ""
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * buckets
+        self.total = 0.0
+        self.count = 0
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{key}="{_escape(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class PrometheusMetrics:
+    """
+    Hook that aggregates stage timings into Prometheus metrics.
+
+    Every stage gets a latency histogram, whose _count doubles as a throughput
+    counter, and an error counter, labelled by stage and by whatever labels
+    the stage reported (query type, cache result, tool name).
+    """
+
+    def __init__(self, namespace: str = "sql_to_mongodb", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = buckets
+        self._histograms: Dict[Tuple[Tuple[str, str], ...], _Histogram] = {}
+        self._errors: Dict[Tuple[Tuple[str, str], ...], int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, stage: str, seconds: float, labels: Dict[str, str],
+                 error: Optional[BaseException]) -> None:
+        key = (("stage", stage),) + tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(len(self.buckets))
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram.counts[index] += 1
+                    break
+            histogram.total += seconds
+            histogram.count += 1
+            if error is not None:
+                error_key = key + (("error", type(error).__name__),)
+                self._errors[error_key] = self._errors.get(error_key, 0) + 1
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        duration = f"{self.namespace}_stage_duration_seconds"
+        errors = f"{self.namespace}_stage_errors_total"
+        lines = [
+            f"# HELP {duration} Time spent in each translation, cache and agent stage.",
+            f"# TYPE {duration} histogram",
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            error_counts = sorted(self._errors.items())
+            for labels, histogram in histograms:
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram.counts):
+                    cumulative += count
+                    bucket = _format_labels(labels, 'le="%s"' % bound)
+                    lines.append(f"{duration}_bucket{bucket} {cumulative}")
+                bucket = _format_labels(labels, 'le="+Inf"')
+                lines.append(f"{duration}_bucket{bucket} {histogram.count}")
+                lines.append(f"{duration}_sum{_format_labels(labels)} {histogram.total}")
+                lines.append(f"{duration}_count{_format_labels(labels)} {histogram.count}")
+        lines.append(f"# HELP {errors} Stages that raised, by exception type.")
+        lines.append(f"# TYPE {errors} counter")
+        for labels, count in error_counts:
+            lines.append(f"{errors}{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
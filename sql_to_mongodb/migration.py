@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+Copy the rows of a SQL database into MongoDB collections.
+
+Tables are read in primary key order, one bounded batch per query, mapped
+to documents with the translator's schema and written to a pluggable sink.
+Several tables are copied in parallel, and a checkpoint file records the
+last key written per table so an interrupted run resumes where it stopped.
+"""
+
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, Iterator, TextIO, Tuple
+from .output import _extended_json
+from .schema import SchemaRegistry, coerce_value
+from .translator import SQLToMongoDBTranslator
+
+# BSON types of SQLite declared types, matched by substring as SQLite's affinity rules do
+_DECLARED_TYPES = (
+    ("INT", "long"), ("CHAR", "string"), ("CLOB", "string"), ("TEXT", "string"),
+    ("REAL", "double"), ("FLOA", "double"), ("DOUB", "double"),
+    ("BOOL", "bool"), ("DATE", "date"), ("TIME", "date"),
+)
+
+# Types SQLite already returns as the matching Python type
+_NATIVE_TYPES = frozenset(["int", "long", "double", "string"])
+
+def _convert(value: Any, bson_type: str, name: str) -> Any:
+    # SQLite has no date type; dates stored as numbers are Unix times
+    if bson_type == "date" and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+    return coerce_value(value, bson_type, name)
+
+def _declared_bson_type(declared: str) -> Optional[str]:
+    declared = declared.upper()
+    for marker, bson_type in _DECLARED_TYPES:
+        if marker in declared:
+            return bson_type
+    return None
+
+class TableSpec:
+    """Columns of a source table and the key it is read in order of."""
+
+    def __init__(self, name: str, columns: List[str], types: Dict[str, Optional[str]],
+                 primary_key: List[str], key: List[str]):
+        """
+        Args:
+            name (str): Table name, also the collection name
+            columns (List[str]): Column names, in select order
+            types (Dict[str, Optional[str]]): BSON type of each column, None if unknown
+            primary_key (List[str]): Primary key columns, empty if there are none
+            key (List[str]): Unique columns ordering the scan, e.g. ["rowid"]
+        """
+        self.name = name
+        self.columns = columns
+        self.types = types
+        self.primary_key = primary_key
+        self.key = key
+
+class SQLiteSource:
+    """
+    Reads tables from a SQLite database file.
+
+    Rows are fetched in key order with one `WHERE key > ? ORDER BY key LIMIT n`
+    query per batch, so every batch is a bounded index range scan, memory
+    stays flat regardless of table size and a scan can restart at any key.
+    Each scan opens its own read-only connection, so tables can be read
+    from several threads.
+    """
+
+    def __init__(self, path: str):
+        if not os.path.exists(path):
+            raise ValueError(f"No SQLite database at {path}")
+        self.path = path
+        self._uri = Path(path).absolute().as_uri() + "?mode=ro"
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._uri, uri=True)
+
+    def tables(self) -> List[str]:
+        with closing(self.connect()) as connection:
+            rows = connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def table(self, name: str) -> TableSpec:
+        with closing(self.connect()) as connection:
+            info = connection.execute(f"PRAGMA table_info({_quote(name)})").fetchall()
+            if not info:
+                raise ValueError(f"No table {name!r} in {self.path}")
+            try:
+                connection.execute(f"SELECT rowid FROM {_quote(name)} LIMIT 0")
+                has_rowid = True
+            except sqlite3.OperationalError:
+                has_rowid = False
+        columns = [row[1] for row in info]
+        primary_key = [row[1] for row in sorted((row for row in info if row[5]), key=lambda row: row[5])]
+        return TableSpec(
+            name,
+            columns,
+            {row[1]: _declared_bson_type(row[2] or "") for row in info},
+            primary_key,
+            # WITHOUT ROWID tables always have a primary key
+            ["rowid"] if has_rowid else primary_key
+        )
+
+    def estimate_rows(self, spec: TableSpec) -> int:
+        """Cheap upper bound of the row count, used to start the largest tables first."""
+        if spec.key != ["rowid"]:
+            return 0
+        with closing(self.connect()) as connection:
+            return connection.execute(f"SELECT max(rowid) FROM {_quote(spec.name)}").fetchone()[0] or 0
+
+    def batches(self, spec: TableSpec, after: Optional[List[Any]] = None,
+                batch_size: int = 1000) -> Iterator[Tuple[List[Tuple[Any, ...]], List[List[Any]]]]:
+        """
+        Yield (rows, keys) batches in key order.
+
+        Args:
+            spec (TableSpec): The table to read
+            after (Optional[List[Any]]): Key to resume after; None starts at the beginning
+            batch_size (int): Rows per batch
+
+        Yields:
+            Tuple: Rows with spec.columns values, and the spec.key values of each row
+        """
+        key = ", ".join(_quote(column) for column in spec.key)
+        columns = ", ".join(_quote(column) for column in spec.columns)
+        table = _quote(spec.name)
+        # Row values compare lexicographically, which matches ORDER BY on every key column
+        seek = f"({key}) > ({', '.join('?' * len(spec.key))})"
+        first = f"SELECT {key}, {columns} FROM {table} ORDER BY {key} LIMIT ?"
+        following = f"SELECT {key}, {columns} FROM {table} WHERE {seek} ORDER BY {key} LIMIT ?"
+        width = len(spec.key)
+        connection = self.connect()
+        try:
+            while True:
+                if after is None:
+                    rows = connection.execute(first, (batch_size,)).fetchall()
+                else:
+                    rows = connection.execute(following, (*after, batch_size)).fetchall()
+                if not rows:
+                    return
+                keys = [list(row[:width]) for row in rows]
+                after = keys[-1]
+                yield [row[width:] for row in rows], keys
+                if len(rows) < batch_size:
+                    return
+        finally:
+            connection.close()
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+class TableMapping:
+    """
+    Maps the rows of one table to documents.
+
+    Columns keep their names, so translated queries find them, and take the
+    BSON type from the translator's schema registry, falling back to the
+    column's declared type. The primary key is also copied to `_id`
+    ({column: value} for compound keys), which makes replaying a batch after
+    a crash insert nothing new; tables without one use the scan key, their
+    rowid, instead.
+    """
+
+    def __init__(self, spec: TableSpec, translator: SQLToMongoDBTranslator):
+        self.spec = spec
+        self.collection = spec.name
+        self._build_documents = translator.mongodb_builder._build_documents
+        schema: Optional[SchemaRegistry] = translator.schema
+        # Only columns whose values SQLite cannot already return in the right type are converted
+        self._conversions: List[Tuple[int, str, str]] = []
+        for index, column in enumerate(spec.columns):
+            declared = schema.field_type(spec.name, column) if schema is not None else None
+            bson_type = declared or spec.types.get(column)
+            if bson_type and (declared or bson_type not in _NATIVE_TYPES):
+                self._conversions.append((index, bson_type, f"{spec.name}.{column}"))
+        self._key_indexes = [spec.columns.index(column) for column in spec.primary_key]
+
+    def documents(self, rows: List[Tuple[Any, ...]],
+                  keys: Optional[List[List[Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Build the documents of a batch of rows.
+
+        Args:
+            rows (List[Tuple[Any, ...]]): Rows with spec.columns values
+            keys (Optional[List[List[Any]]]): spec.key values of each row, the
+                _id of tables without a primary key
+
+        Raises:
+            ValueError: If a value cannot be converted to its column's type
+        """
+        if self._conversions:
+            converted = []
+            for row in rows:
+                row = list(row)
+                for index, bson_type, name in self._conversions:
+                    row[index] = _convert(row[index], bson_type, name)
+                converted.append(row)
+        else:
+            converted = [list(row) for row in rows]
+        documents = self._build_documents(self.spec.columns, converted)
+        if len(self._key_indexes) == 1:
+            index = self._key_indexes[0]
+            for document, row in zip(documents, converted):
+                document["_id"] = row[index]
+        elif self._key_indexes:
+            for document, row in zip(documents, converted):
+                document["_id"] = {self.spec.columns[index]: row[index] for index in self._key_indexes}
+        elif keys is not None:
+            for document, key in zip(documents, keys):
+                document["_id"] = key[0] if len(key) == 1 else dict(zip(self.spec.key, key))
+        return documents
+
+class MemorySink:
+    """
+    Collects documents in memory, for tests and dry runs.
+
+    Like a collection with a unique _id index, documents whose _id was
+    already written are ignored.
+    """
+
+    def __init__(self):
+        self.collections: Dict[str, List[Dict[str, Any]]] = {}
+        self._ids: Dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    def write(self, collection: str, documents: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            stored = self.collections.setdefault(collection, [])
+            ids = self._ids.setdefault(collection, set())
+            for document in documents:
+                if "_id" in document:
+                    key = json.dumps(document["_id"], sort_keys=True, default=str)
+                    if key in ids:
+                        continue
+                    ids.add(key)
+                stored.append(document)
+
+    def close(self) -> None:
+        pass
+
+class NDJSONSink:
+    """
+    Appends documents to one `<collection>.ndjson` file per collection, for
+    `mongoimport --mode insert`. Files are flushed after every batch so the
+    checkpoint never runs ahead of the data.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._files: Dict[str, TextIO] = {}
+        self._lock = threading.Lock()
+
+    def write(self, collection: str, documents: List[Dict[str, Any]]) -> None:
+        data = "".join(json.dumps(document, separators=(",", ":"), default=_extended_json) + "\n"
+                       for document in documents)
+        with self._lock:
+            output = self._files.get(collection)
+            if output is None:
+                path = os.path.join(self.directory, f"{collection}.ndjson")
+                output = self._files[collection] = open(path, "a", encoding="utf-8")
+        # Each collection is written by one table worker at a time
+        output.write(data)
+        output.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            for output in self._files.values():
+                output.close()
+            self._files.clear()
+
+class MongoSink:
+    """
+    Writes documents to MongoDB with unordered bulk inserts.
+
+    Duplicate key errors are ignored: they only occur when a batch written
+    before an interruption is replayed, and the stored documents are the same.
+    """
+
+    def __init__(self, database: str, client: Any = None, uri: Optional[str] = None):
+        """
+        Args:
+            database (str): Database receiving the collections
+            client: MongoClient-compatible client; defaults to the shared client for uri
+            uri (Optional[str]): Connection string used when no client is given
+        """
+        from .executor import DEFAULT_URI, get_client
+        self.db = (client if client is not None else get_client(uri or DEFAULT_URI))[database]
+
+    def write(self, collection: str, documents: List[Dict[str, Any]]) -> None:
+        from pymongo.errors import BulkWriteError
+        from .executor import to_write_requests
+
+        requests = to_write_requests({"collection": collection, "operation": "insert", "documents": documents})
+        try:
+            self.db[collection].bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+            if e.details.get("writeConcernErrors"):
+                raise
+
+    def close(self) -> None:
+        pass
+
+class Checkpoint:
+    """
+    Progress of each table: the key of the last row written and the rows copied.
+
+    The file is rewritten atomically after every batch, so it always
+    describes batches the sink has accepted.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path (Optional[str]): JSON file to persist to; None keeps progress in memory
+        """
+        self.path = path
+        self._tables: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._tables = json.load(f).get("tables", {})
+
+    def get(self, table: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._tables.get(table)
+            return dict(state) if state else None
+
+    def update(self, table: str, key: List[str], after: Optional[List[Any]], rows: int,
+               done: bool = False) -> None:
+        with self._lock:
+            self._tables[table] = {"key": key, "after": after, "rows": rows, "done": done}
+            if self.path:
+                temporary = self.path + ".tmp"
+                with open(temporary, "w", encoding="utf-8") as f:
+                    json.dump({"tables": self._tables}, f, default=str)
+                os.replace(temporary, self.path)
+
+class MigrationStats:
+    """Counters for a migration run."""
+
+    def __init__(self):
+        self.tables: Dict[str, Dict[str, Any]] = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _table(self, table: str) -> Dict[str, Any]:
+        return self.tables.setdefault(table, {"status": "pending", "rows": 0, "copied": 0, "batches": 0})
+
+    def set(self, table: str, **values: Any) -> None:
+        with self._lock:
+            self._table(table).update(values)
+
+    def add(self, table: str, rows: int) -> None:
+        with self._lock:
+            counters = self._table(table)
+            counters["rows"] += rows
+            counters["copied"] += rows
+            counters["batches"] += 1
+
+    @property
+    def rows(self) -> int:
+        return sum(counters["rows"] for counters in self.tables.values())
+
+    @property
+    def failed(self) -> List[str]:
+        return [table for table, counters in self.tables.items() if counters["status"] == "failed"]
+
+    def report(self) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        with self._lock:
+            statuses = [counters["status"] for counters in self.tables.values()]
+            # Rows resumed from a checkpoint count towards the total but not the rate
+            copied = sum(counters["copied"] for counters in self.tables.values())
+        done = statuses.count("done") + statuses.count("skipped")
+        return (f"{self.rows:,} rows ({copied / elapsed:,.0f}/s) | tables {done}/{len(statuses)} done, "
+                f"{statuses.count('running')} running, {statuses.count('failed')} failed")
+
+_END = object()
+
+def _put(batches: "queue.Queue", item: Any, stop: threading.Event) -> bool:
+    """Put an item on a bounded queue, giving up once the consumer has stopped."""
+    while not stop.is_set():
+        try:
+            batches.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def _copy_table(source: Any, spec: TableSpec, mapping: TableMapping, sink: Any, checkpoint: Checkpoint,
+                stats: MigrationStats, batch_size: int, max_in_flight: int) -> None:
+    """
+    Copy one table, reading and mapping the next batches while the current one is written.
+
+    At most max_in_flight mapped batches wait for the sink, which bounds the
+    memory a table can hold however far reading runs ahead of writing.
+    """
+    state = checkpoint.get(spec.name)
+    if state and state["key"] != spec.key:
+        raise ValueError(f"Checkpoint of {spec.name!r} was taken with key {state['key']}, not {spec.key}")
+    if state and state["done"]:
+        stats.set(spec.name, status="skipped", rows=state["rows"])
+        return
+    after = state["after"] if state else None
+    rows = state["rows"] if state else 0
+    stats.set(spec.name, status="running", rows=rows)
+
+    batches: "queue.Queue" = queue.Queue(max_in_flight)
+    stop = threading.Event()
+
+    def read() -> None:
+        try:
+            for batch, keys in source.batches(spec, after, batch_size):
+                if not _put(batches, (mapping.documents(batch, keys), keys[-1]), stop):
+                    return
+            _put(batches, _END, stop)
+        except BaseException as e:
+            _put(batches, e, stop)
+
+    reader = threading.Thread(target=read, name=f"migrate-read-{spec.name}", daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = batches.get()
+            if item is _END:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            documents, after = item
+            sink.write(mapping.collection, documents)
+            rows += len(documents)
+            checkpoint.update(spec.name, spec.key, after, rows)
+            stats.add(spec.name, len(documents))
+        checkpoint.update(spec.name, spec.key, after, rows, done=True)
+        stats.set(spec.name, status="done")
+    finally:
+        stop.set()
+        reader.join()
+
+def migrate(source: Any, sink: Any, translator: Optional[SQLToMongoDBTranslator] = None,
+            tables: Optional[Iterable[str]] = None, batch_size: int = 1000, workers: int = 4,
+            max_in_flight: int = 2, checkpoint: Optional[Checkpoint] = None,
+            progress: Optional[TextIO] = None, progress_interval: float = 2.0,
+            stats: Optional[MigrationStats] = None) -> MigrationStats:
+    """
+    Copy tables from a source database into a sink, resuming from a checkpoint.
+
+    Delivery is at least once: a batch written just before an interruption
+    may be written again on resume, which the _id copied from the primary
+    key (or rowid) turns into a no-op. A table that fails is reported in the stats and
+    its checkpoint keeps the progress made; the other tables carry on.
+
+    Args:
+        source: Table reader such as SQLiteSource
+        sink: Document writer such as MongoSink, NDJSONSink or MemorySink
+        translator (Optional[SQLToMongoDBTranslator]): Supplies the schema
+            registry and document builder; defaults to one without a schema
+        tables (Optional[Iterable[str]]): Tables to copy; defaults to all
+        batch_size (int): Rows per source query and per sink write
+        workers (int): Tables copied in parallel
+        max_in_flight (int): Batches each table may read ahead of its writes
+        checkpoint (Optional[Checkpoint]): Progress to resume from and update
+        progress (Optional[TextIO]): Stream for periodic progress reports
+        progress_interval (float): Seconds between progress reports
+        stats (Optional[MigrationStats]): Counters to update
+
+    Returns:
+        MigrationStats: Counters for the run
+    """
+    translator = translator or SQLToMongoDBTranslator(cache_size=0)
+    checkpoint = checkpoint or Checkpoint()
+    stats = stats or MigrationStats()
+    specs = [source.table(name) for name in (tables if tables is not None else source.tables())]
+    # Starting the largest tables first keeps the slowest one from running alone at the end
+    specs.sort(key=source.estimate_rows, reverse=True)
+    for spec in specs:
+        stats.set(spec.name, status="pending")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="migrate") as pool:
+        futures = {
+            pool.submit(_copy_table, source, spec, TableMapping(spec, translator), sink, checkpoint,
+                        stats, batch_size, max(1, max_in_flight)): spec.name
+            for spec in specs
+        }
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, timeout=progress_interval if progress else None,
+                                     return_when=FIRST_EXCEPTION)
+            for future in finished:
+                if future.exception() is not None:
+                    stats.set(futures[future], status="failed", error=str(future.exception()))
+            if progress is not None and pending:
+                progress.write(stats.report() + "\n")
+                progress.flush()
+    return stats
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        prog="sql-to-mongodb-migrate",
+        description="Copy the tables of a SQLite database into MongoDB."
+    )
+    arg_parser.add_argument("source", help="SQLite database file")
+    target = arg_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--database", help="MongoDB database to write to")
+    target.add_argument("--ndjson", metavar="DIRECTORY",
+                        help="write one <collection>.ndjson file per table instead, for mongoimport")
+    arg_parser.add_argument("--uri", default=None, help="MongoDB connection string (default: localhost)")
+    arg_parser.add_argument("--tables", help="comma separated tables to copy (default: all)")
+    arg_parser.add_argument("--schema", help="JSON file of collection field types used to type values")
+    arg_parser.add_argument("--checkpoint", help="file recording progress; rerun with it to resume")
+    arg_parser.add_argument("--batch-size", type=int, default=1000, help="rows per batch (default: 1000)")
+    arg_parser.add_argument("--workers", type=int, default=4, help="tables copied in parallel (default: 4)")
+    arg_parser.add_argument("--max-in-flight", type=int, default=2,
+                            help="batches each table reads ahead of its writes (default: 2)")
+    arg_parser.add_argument("--progress-interval", type=float, default=2.0,
+                            help="seconds between progress reports on stderr (default: 2)")
+    arg_parser.add_argument("-q", "--quiet", action="store_true", help="suppress progress reports")
+    args = arg_parser.parse_args(argv)
+
+    sink = NDJSONSink(args.ndjson) if args.ndjson else MongoSink(args.database, uri=args.uri)
+    progress = None if args.quiet else sys.stderr
+    try:
+        stats = migrate(
+            SQLiteSource(args.source),
+            sink,
+            SQLToMongoDBTranslator(cache_size=0, schema=args.schema),
+            tables=args.tables.split(",") if args.tables else None,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            max_in_flight=args.max_in_flight,
+            checkpoint=Checkpoint(args.checkpoint),
+            progress=progress,
+            progress_interval=args.progress_interval
+        )
+    finally:
+        sink.close()
+    for table in stats.failed:
+        sys.stderr.write(f"failed: {table}: {stats.tables[table]['error']}\n")
+    if progress is not None:
+        progress.write("done: " + stats.report() + "\n")
+    return 1 if stats.failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
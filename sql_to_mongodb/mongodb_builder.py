@@ -1,7 +1,13 @@
 from typing import Dict, List, Any, Optional
 from .sql_parser import ParsedSQL, QueryType
+from .pipeline import optimize_pipeline, rename_filter
+from .instrumentation import instrumented
 
 class MongoDBQueryBuilder:
+    def __init__(self, optimize_pipelines: bool = True):
+        self.optimize_pipelines = optimize_pipelines
+
+    @instrumented("build", labels=lambda self, parsed_sql: {"query_type": parsed_sql.query_type.value})
     def build(self, parsed_sql: ParsedSQL) -> Dict[str, Any]:
         """
         Build a MongoDB query from parsed SQL.
@@ -13,6 +19,8 @@ class MongoDBQueryBuilder:
             Dict[str, Any]: The MongoDB query
         """
         if parsed_sql.query_type == QueryType.SELECT:
+            if parsed_sql.group_by or parsed_sql.aggregates or parsed_sql.joins:
+                return self._build_aggregate_query(parsed_sql)
             return self._build_find_query(parsed_sql)
         elif parsed_sql.query_type == QueryType.INSERT:
             return self._build_insert_query(parsed_sql)
@@ -35,16 +43,115 @@ class MongoDBQueryBuilder:
         
         if parsed_sql.order_by:
             query["options"]["sort"] = self._build_sort(parsed_sql.order_by)
-            
+
+        if parsed_sql.offset:
+            query["options"]["skip"] = parsed_sql.offset
+
         if parsed_sql.limit:
             query["options"]["limit"] = parsed_sql.limit
-            
-        return query
+
+        return self._add_match_hints(query, parsed_sql)
+
+    def _build_aggregate_query(self, parsed_sql: ParsedSQL) -> Dict[str, Any]:
+        """Build a MongoDB aggregation pipeline for GROUP BY, aggregates and JOINs."""
+        pipeline: List[Dict[str, Any]] = []
+
+        for join in parsed_sql.joins or []:
+            pipeline.append({"$lookup": {
+                "from": join["table"],
+                "localField": join["local_field"],
+                "foreignField": join["foreign_field"],
+                "as": join["alias"]
+            }})
+            pipeline.append({"$unwind": {
+                "path": "$" + join["alias"],
+                "preserveNullAndEmptyArrays": join["type"] == "LEFT"
+            }})
+
+        if parsed_sql.where_clause:
+            pipeline.append({"$match": parsed_sql.where_clause})
+
+        if parsed_sql.group_by or parsed_sql.aggregates:
+            pipeline.extend(self._build_group_stages(parsed_sql))
+        else:
+            if parsed_sql.order_by:
+                pipeline.append({"$sort": self._build_sort(parsed_sql.order_by)})
+            if parsed_sql.offset:
+                pipeline.append({"$skip": parsed_sql.offset})
+            if parsed_sql.limit:
+                pipeline.append({"$limit": parsed_sql.limit})
+            projection = self._build_projection(parsed_sql.columns)
+            if projection:
+                pipeline.append({"$project": projection})
+
+        if self.optimize_pipelines:
+            pipeline = optimize_pipeline(pipeline)
+
+        return self._add_match_hints({
+            "collection": parsed_sql.table_name,
+            "operation": "aggregate",
+            "pipeline": pipeline,
+            "options": {}
+        }, parsed_sql)
+
+    def _build_group_stages(self, parsed_sql: ParsedSQL) -> List[Dict[str, Any]]:
+        """Build $group, HAVING $match, $sort, $limit and $project stages."""
+        group_keys = {field: self._group_key(field) for field in parsed_sql.group_by or []}
+        group: Dict[str, Any] = {
+            "_id": {key: "$" + field for field, key in group_keys.items()} if group_keys else None
+        }
+        for aggregate in parsed_sql.aggregates or []:
+            group[aggregate["alias"]] = self._build_accumulator(aggregate)
+        stages = [{"$group": group}]
+
+        if parsed_sql.having:
+            renames = {field: "_id." + key for field, key in group_keys.items()}
+            stages.append({"$match": rename_filter(parsed_sql.having, renames)})
+
+        # Sort before projecting so grouped fields and aggregates left out of the select list can be used
+        if parsed_sql.order_by:
+            stages.append({"$sort": {
+                ("_id." + group_keys[item["field"]] if item["field"] in group_keys else item["field"]):
+                    1 if item["direction"] == "ASC" else -1
+                for item in parsed_sql.order_by
+            }})
+        if parsed_sql.offset:
+            stages.append({"$skip": parsed_sql.offset})
+        if parsed_sql.limit:
+            stages.append({"$limit": parsed_sql.limit})
+
+        projection: Dict[str, Any] = {"_id": 0}
+        for field in parsed_sql.columns:
+            if field in group_keys:
+                projection[group_keys[field]] = "$_id." + group_keys[field]
+        for aggregate in parsed_sql.aggregates or []:
+            if not aggregate["hidden"]:
+                projection[aggregate["alias"]] = 1
+        stages.append({"$project": projection})
+        return stages
+
+    def _group_key(self, field: str) -> str:
+        """Name under _id for a grouped field; dots are not allowed in field names."""
+        return field.rsplit(".", 1)[-1]
+
+    def _build_accumulator(self, aggregate: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a $group accumulator for a SQL aggregate function."""
+        function = aggregate["function"]
+        field = aggregate["field"]
+        if function == "COUNT":
+            if field == "*":
+                return {"$sum": 1}
+            # COUNT(column) skips NULLs
+            return {"$sum": {"$cond": [{"$gt": ["$" + field, None]}, 1, 0]}}
+        operators = {"SUM": "$sum", "AVG": "$avg", "MIN": "$min", "MAX": "$max"}
+        return {operators[function]: "$" + field}
 
     def _build_insert_query(self, parsed_sql: ParsedSQL) -> Dict[str, Any]:
         """Build a MongoDB insert query."""
         if not parsed_sql.values:
             raise ValueError("No values provided for INSERT query")
+        if not parsed_sql.columns:
+            raise ValueError("INSERT queries need an explicit column list to name document fields")
             
         return {
             "collection": parsed_sql.table_name,
@@ -54,21 +161,34 @@ class MongoDBQueryBuilder:
 
     def _build_update_query(self, parsed_sql: ParsedSQL) -> Dict[str, Any]:
         """Build a MongoDB update query."""
-        return {
+        return self._add_match_hints({
             "collection": parsed_sql.table_name,
             "operation": "update",
             "filter": parsed_sql.where_clause or {},
-            "update": self._build_update_document(parsed_sql.columns, parsed_sql.values),
-            "options": {"multi": True}
-        }
+            "update": self._build_update_document(parsed_sql.columns, parsed_sql.values,
+                                                  parsed_sql.update_operators),
+            # A WHERE pinning a unique key matches at most one document
+            "options": {"multi": not parsed_sql.single_row}
+        }, parsed_sql)
 
     def _build_delete_query(self, parsed_sql: ParsedSQL) -> Dict[str, Any]:
         """Build a MongoDB delete query."""
-        return {
+        query = {
             "collection": parsed_sql.table_name,
             "operation": "delete",
             "filter": parsed_sql.where_clause or {}
         }
+        if parsed_sql.collation:
+            query["options"] = {}
+        return self._add_match_hints(query, parsed_sql)
+
+    def _add_match_hints(self, query: Dict[str, Any], parsed_sql: ParsedSQL) -> Dict[str, Any]:
+        """Add the collation the filter needs and flag LIKEs that only a text index can serve."""
+        if parsed_sql.collation:
+            query["options"]["collation"] = parsed_sql.collation
+        if parsed_sql.text_search:
+            query["text_search_candidates"] = parsed_sql.text_search
+        return query
 
     def _build_projection(self, columns: List[str]) -> Dict[str, int]:
         """Build MongoDB projection from column list."""
@@ -94,9 +214,15 @@ class MongoDBQueryBuilder:
             # Single row
             return [{col: val for col, val in zip(columns, values)}]
 
-    def _build_update_document(self, columns: List[str], values: List[Any]) -> Dict[str, Any]:
-        """Build MongoDB update document."""
+    def _build_update_document(self, columns: List[str], values: List[Any],
+                               operators: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Build MongoDB update document, grouping columns by update operator."""
         if not values:
             return {}
-            
-        return {"$set": {col: val for col, val in zip(columns, values)}} 
\ No newline at end of file
+        if operators is None:
+            return {"$set": {col: val for col, val in zip(columns, values)}}
+
+        update: Dict[str, Dict[str, Any]] = {}
+        for col, val, operator in zip(columns, values, operators):
+            update.setdefault(operator, {})[col] = val
+        return update 
\ No newline at end of file
@@ -0,0 +1,90 @@
+import base64
+import json
+from datetime import datetime
+from typing import Dict, Any
+
+def _extended_json(value: Any) -> Any:
+    """Encode the BSON types JSON lacks as MongoDB extended JSON, which mongoimport reads."""
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat() + "Z"}
+    if isinstance(value, bytes):
+        return {"$binary": {"base64": base64.b64encode(value).decode(), "subType": "00"}}
+    name = type(value).__name__
+    if name == "ObjectId":
+        return {"$oid": str(value)}
+    if name == "Decimal128":
+        return {"$numberDecimal": str(value)}
+    return str(value)
+
+def to_ndjson(mongodb_query: Dict[str, Any]) -> str:
+    """
+    Serialize a translated query as a single NDJSON line.
+
+    Args:
+        mongodb_query (Dict[str, Any]): The translated MongoDB query
+
+    Returns:
+        str: The query as compact JSON followed by a newline
+    """
+    return json.dumps(mongodb_query, separators=(",", ":"), default=_extended_json) + "\n"
+
+def _js(value: Any) -> str:
+    """Render a value as a mongosh (JavaScript) literal."""
+    if isinstance(value, datetime):
+        return f'ISODate("{value.isoformat()}")'
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{json.dumps(str(k))}: {_js(v)}" for k, v in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_js(v) for v in value) + "]"
+    return json.dumps(value, default=str)
+
+def _collation(mongodb_query: Dict[str, Any]) -> str:
+    """The options argument carrying a query's collation, if it has one."""
+    collation = mongodb_query.get("options", {}).get("collation")
+    return f", {_js({'collation': collation})}" if collation else ""
+
+def to_mongosh(mongodb_query: Dict[str, Any]) -> str:
+    """
+    Render a translated query as a mongosh statement.
+
+    Args:
+        mongodb_query (Dict[str, Any]): The translated MongoDB query
+
+    Returns:
+        str: A mongosh statement followed by a newline
+    """
+    collection = f"db.getCollection({json.dumps(mongodb_query['collection'])})"
+    operation = mongodb_query["operation"]
+    if operation == "find":
+        statement = f"{collection}.find({_js(mongodb_query['filter'])}, {_js(mongodb_query['projection'])})"
+        options = mongodb_query.get("options", {})
+        if "collation" in options:
+            statement += f".collation({_js(options['collation'])})"
+        if "sort" in options:
+            statement += f".sort({_js(options['sort'])})"
+        if "skip" in options:
+            statement += f".skip({int(options['skip'])})"
+        if "limit" in options:
+            statement += f".limit({int(options['limit'])})"
+    elif operation == "aggregate":
+        statement = f"{collection}.aggregate({_js(mongodb_query['pipeline'])}{_collation(mongodb_query)})"
+    elif operation == "insert":
+        statement = f"{collection}.insertMany({_js(mongodb_query['documents'])})"
+    elif operation == "update":
+        method = "updateMany" if mongodb_query.get("options", {}).get("multi") else "updateOne"
+        statement = (f"{collection}.{method}({_js(mongodb_query['filter'])}, "
+                     f"{_js(mongodb_query['update'])}{_collation(mongodb_query)})")
+    elif operation == "bulk_update":
+        requests = []
+        for update in mongodb_query["updates"]:
+            options = update.get("options", {})
+            spec = {"filter": update["filter"], "update": update["update"]}
+            if options.get("collation"):
+                spec["collation"] = options["collation"]
+            requests.append({"updateMany" if options.get("multi") else "updateOne": spec})
+        statement = f"{collection}.bulkWrite({_js(requests)}, {_js({'ordered': mongodb_query['ordered']})})"
+    elif operation == "delete":
+        statement = f"{collection}.deleteMany({_js(mongodb_query['filter'])}{_collation(mongodb_query)})"
+    else:
+        raise ValueError(f"Unsupported operation: {operation}")
+    return statement + ";\n"
@@ -0,0 +1,237 @@
+import base64
+import hashlib
+import json
+from copy import deepcopy
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+from .predicates import NEVER_MATCHES
+
+# Unique field appended to the sort so that rows with equal sort keys keep a total order
+TIEBREAKER = "_id"
+
+SortKeys = List[Tuple[str, int]]
+
+def _encode_value(value: Any) -> Any:
+    """Make a sort key value JSON serializable, tagging BSON types as extended JSON does."""
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    name = type(value).__name__
+    if name == "ObjectId":
+        return {"$oid": str(value)}
+    if name == "Decimal128":
+        return {"$numberDecimal": str(value)}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$date" in value:
+            return datetime.fromisoformat(value["$date"])
+        if "$oid" in value:
+            from bson.objectid import ObjectId
+            return ObjectId(value["$oid"])
+        if "$numberDecimal" in value:
+            from bson.decimal128 import Decimal128
+            return Decimal128(value["$numberDecimal"])
+    return value
+
+def _field_value(document: Dict[str, Any], field: str) -> Any:
+    """Value of a dotted field path; missing fields sort like NULL."""
+    value: Any = document
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def _sort_keys(mongodb_query: Dict[str, Any], tiebreaker: str) -> SortKeys:
+    keys = list(mongodb_query.get("options", {}).get("sort", {}).items())
+    if tiebreaker not in (field for field, _ in keys):
+        keys.append((tiebreaker, keys[-1][1] if keys else 1))
+    return keys
+
+def _digest(mongodb_query: Dict[str, Any], keys: SortKeys) -> str:
+    """Identify the result order a token belongs to, so it cannot resume a different query."""
+    data = json.dumps(
+        [mongodb_query["collection"], mongodb_query.get("filter"), mongodb_query.get("projection"), keys],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha1(data.encode()).hexdigest()[:16]
+
+def encode_page_token(values: List[Any], offset: int, digest: str) -> str:
+    """Pack the last row's sort key values into an opaque continuation token."""
+    data = json.dumps({"v": [_encode_value(value) for value in values], "o": offset, "q": digest},
+                      separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+def decode_page_token(token: str) -> Dict[str, Any]:
+    """
+    Unpack a continuation token.
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        return {"values": [_decode_value(value) for value in data["v"]], "offset": int(data["o"]),
+                "digest": data["q"]}
+    except Exception:
+        raise ValueError("Invalid page token")
+
+# $type names of the BSON types in the order MongoDB sorts them, after null and
+# missing; MinKey and MaxKey are never stored as data
+_SORT_TYPES = [["int", "long", "double", "decimal"], ["string", "symbol"], ["object"], ["array"],
+               ["binData"], ["objectId"], ["bool"], ["date"], ["timestamp"], ["regex"]]
+
+def _sort_type(value: Any) -> Optional[int]:
+    """Position of a value's type in _SORT_TYPES, or None if it is not known."""
+    if isinstance(value, bool):
+        return 6
+    if isinstance(value, (int, float)):
+        return 0
+    if isinstance(value, str):
+        return 1
+    if isinstance(value, dict):
+        return 2
+    if isinstance(value, list):
+        return 3
+    if isinstance(value, bytes):
+        return 4
+    if isinstance(value, datetime):
+        return 7
+    return {"Decimal128": 0, "ObjectId": 5, "Timestamp": 8, "Regex": 9}.get(type(value).__name__)
+
+def _after(value: Any, direction: int) -> List[Any]:
+    """Conditions on one sort key matching the values that sort after value."""
+    if value is None:
+        # Null and missing sort first: everything follows them ascending, nothing descending
+        return [{"$ne": None}] if direction > 0 else []
+    # $gt and $lt only match values of the same type, so the types that sort
+    # after it are matched separately
+    conditions: List[Any] = [{"$gt" if direction > 0 else "$lt": value}]
+    rank = _sort_type(value)
+    if rank is not None:
+        types = _SORT_TYPES[rank + 1:] if direction > 0 else _SORT_TYPES[:rank]
+        names = [name for group in types for name in group]
+        if names:
+            conditions.append({"$type": names})
+    if direction < 0:
+        conditions.append(None)
+    return conditions
+
+def seek_filter(keys: SortKeys, values: List[Any]) -> Dict[str, Any]:
+    """
+    Build the filter matching the rows that sort after a given row.
+
+    For keys (a, b, _id) this is `a > va OR (a = va AND b > vb) OR (a = va
+    AND b = vb AND _id > vid)`, with < for descending keys. Each branch is a
+    bounded scan of an index on the sort keys. MongoDB sorts values by type
+    first, with NULL and missing fields lowest, so a key also matches the
+    types sorting after its value: NULLs follow every value in descending
+    order, and every non-NULL value follows a NULL in ascending order.
+
+    Args:
+        keys (SortKeys): (field, 1 or -1) sort keys, ending with a unique field
+        values (List[Any]): The values of the keys in the last row returned
+
+    Returns:
+        Dict[str, Any]: The filter document
+    """
+    branches = []
+    for index, (field, direction) in enumerate(keys):
+        for condition in _after(values[index], direction):
+            branch = {key: previous for (key, _), previous in zip(keys[:index], values[:index])}
+            branch[field] = condition
+            branches.append(branch)
+    if not branches:
+        # The last row sorted lowest on every key in descending order
+        return dict(NEVER_MATCHES)
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+def keyset_query(mongodb_query: Dict[str, Any], page_token: Optional[str] = None,
+                 tiebreaker: str = TIEBREAKER) -> Dict[str, Any]:
+    """
+    Rewrite an OFFSET/LIMIT find query into keyset (seek) pagination.
+
+    The sort gets a unique tiebreaker so the order is total. Without a token
+    the query runs as translated, skipping OFFSET rows once; with the token
+    returned for the previous page the skip is replaced by a range filter
+    starting after that page's last row, so every later page costs the same
+    as the first. Pass the result and its documents to next_page_token() to
+    get the token for the following page.
+
+    Args:
+        mongodb_query (Dict[str, Any]): A translated find query with a LIMIT
+        page_token (Optional[str]): Token returned for the previous page
+        tiebreaker (str): Unique field ending the sort
+
+    Returns:
+        Dict[str, Any]: The rewritten query, with a "pagination" section
+
+    Raises:
+        ValueError: If the query cannot be paged or the token belongs to
+            another query or page
+    """
+    if mongodb_query.get("operation") != "find":
+        raise ValueError(f"Keyset pagination supports find queries, not {mongodb_query.get('operation')!r}")
+    limit = mongodb_query.get("options", {}).get("limit")
+    if not limit:
+        raise ValueError("Keyset pagination needs a LIMIT as the page size")
+
+    query = deepcopy(mongodb_query)
+    options = query["options"]
+    keys = _sort_keys(query, tiebreaker)
+    options["sort"] = dict(keys)
+    digest = _digest(query, keys)
+    offset = options.get("skip", 0)
+
+    if page_token is not None:
+        token = decode_page_token(page_token)
+        if token["digest"] != digest:
+            raise ValueError("Page token was issued for a different query")
+        if offset and token["offset"] != offset:
+            raise ValueError(f"Page token continues at offset {token['offset']}, not {offset}")
+        offset = token["offset"]
+        seek = seek_filter(keys, token["values"])
+        query["filter"] = {"$and": [query["filter"], seek]} if query.get("filter") else seek
+        options.pop("skip", None)
+
+    # The next token is built from the last row, so it must carry the sort keys;
+    # added_fields lists the top-level fields to drop from the rows again
+    added = []
+    projection = query.get("projection")
+    if projection:
+        roots = {field.split(".", 1)[0] for field in projection}
+        for field, _ in keys:
+            if field not in projection and field != "_id":
+                projection[field] = 1
+                root = field.split(".", 1)[0]
+                if root not in roots:
+                    roots.add(root)
+                    added.append(root)
+
+    query["pagination"] = {
+        "mode": "keyset",
+        "sort": [[field, direction] for field, direction in keys],
+        "offset": offset,
+        "limit": limit,
+        "digest": digest,
+        "added_fields": added
+    }
+    return query
+
+def next_page_token(mongodb_query: Dict[str, Any], documents: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Return the token for the page after `documents`, or None after the last page.
+
+    Args:
+        mongodb_query (Dict[str, Any]): The query returned by keyset_query()
+        documents (List[Dict[str, Any]]): The documents it returned, unmodified
+    """
+    pagination = mongodb_query.get("pagination")
+    if pagination is None:
+        raise ValueError("Query was not rewritten by keyset_query")
+    if not documents or len(documents) < pagination["limit"]:
+        return None
+    last = documents[-1]
+    values = [_field_value(last, field) for field, _ in pagination["sort"]]
+    return encode_page_token(values, pagination["offset"] + len(documents), pagination["digest"])
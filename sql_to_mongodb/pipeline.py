@@ -0,0 +1,271 @@
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+def optimize_pipeline(pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Rewrite an aggregation pipeline so that it does less work.
+
+    Three passes are applied:
+
+    1. $match stages are pushed ahead of $sort, $lookup/$unwind and $group
+       (for conditions on group keys) so that documents are discarded before
+       joining or grouping, and a leading $match can use an index.
+    2. A $sort/$limit that follows a renaming $project is moved ahead of it
+       so that $sort and $limit are adjacent, which MongoDB executes as a
+       top-k sort that only keeps `limit` documents in memory.
+    3. When the pipeline ends in a $group or $project, a $project keeping only
+       the fields later stages read is inserted right after the leading
+       $match stages, so joins and groups carry no unused fields.
+
+    Args:
+        pipeline (List[Dict[str, Any]]): The pipeline to optimize
+
+    Returns:
+        List[Dict[str, Any]]: An equivalent, optimized pipeline
+    """
+    pipeline = [dict(stage) for stage in pipeline]
+    pipeline = _push_down_matches(pipeline)
+    pipeline = _coalesce_sort_limit(pipeline)
+    pipeline = _prune_fields(pipeline)
+    return pipeline
+
+def _stage(stage: Dict[str, Any]) -> Tuple[str, Any]:
+    return next(iter(stage.items()))
+
+def filter_fields(conditions: Dict[str, Any]) -> Optional[Set[str]]:
+    """Fields referenced by a query filter, or None if they cannot be determined."""
+    fields: Set[str] = set()
+    for key, value in conditions.items():
+        if key in ("$and", "$or", "$nor"):
+            for clause in value:
+                nested = filter_fields(clause)
+                if nested is None:
+                    return None
+                fields |= nested
+        elif key.startswith("$"):
+            return None
+        else:
+            fields.add(key)
+    return fields
+
+def _expression_fields(expression: Any, fields: Set[str]) -> None:
+    """Collect the "$field" paths referenced by an aggregation expression."""
+    if isinstance(expression, str):
+        if expression.startswith("$") and not expression.startswith("$$"):
+            fields.add(expression[1:])
+    elif isinstance(expression, dict):
+        for value in expression.values():
+            _expression_fields(value, fields)
+    elif isinstance(expression, list):
+        for value in expression:
+            _expression_fields(value, fields)
+
+def _under(field: str, prefix: str) -> bool:
+    return field == prefix or field.startswith(prefix + ".")
+
+def _merge_filters(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    if not first:
+        return dict(second)
+    if not second:
+        return dict(first)
+    if set(first).isdisjoint(second):
+        merged = dict(first)
+        merged.update(second)
+        return merged
+    return {"$and": [first, second]}
+
+def _split_conditions(conditions: Dict[str, Any], movable) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Split a filter into the conditions that may move past a stage and the rest."""
+    moved: Dict[str, Any] = {}
+    kept: Dict[str, Any] = {}
+    for key, value in conditions.items():
+        fields = filter_fields({key: value})
+        if fields is not None and all(movable(field) for field in fields):
+            moved[key] = value
+        else:
+            kept[key] = value
+    return moved, kept
+
+def rename_filter(conditions: Dict[str, Any], renames: Dict[str, str]) -> Dict[str, Any]:
+    """Rename the fields of a query filter, including those inside $and/$or/$nor."""
+    renamed = {}
+    for key, value in conditions.items():
+        if key in ("$and", "$or", "$nor"):
+            renamed[key] = [rename_filter(clause, renames) for clause in value]
+        else:
+            renamed[renames.get(key, key)] = value
+    return renamed
+
+def _group_key_sources(group: Dict[str, Any]) -> Dict[str, str]:
+    """Map "_id.key" paths of a $group output to the input fields they copy."""
+    group_id = group.get("_id")
+    sources = {}
+    if isinstance(group_id, str) and group_id.startswith("$"):
+        sources["_id"] = group_id[1:]
+    elif isinstance(group_id, dict):
+        for key, value in group_id.items():
+            if isinstance(value, str) and value.startswith("$") and not value.startswith("$$"):
+                sources["_id." + key] = value[1:]
+    return sources
+
+def _project_sources(projection: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """Map the fields of an inclusion $project to the input fields they copy."""
+    sources = {}
+    for key, value in projection.items():
+        if value is True or value == 1:
+            sources[key] = key
+        elif isinstance(value, str) and value.startswith("$") and not value.startswith("$$"):
+            sources[key] = value[1:]
+        elif key == "_id" and (value is False or value == 0):
+            continue
+        else:
+            return None
+    return sources
+
+def _move_past(conditions: Dict[str, Any], stage: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Work out which conditions of a $match can move ahead of a preceding stage.
+
+    Returns:
+        (conditions valid before the stage, conditions that must stay after it)
+    """
+    name, spec = _stage(stage)
+    if name == "$sort":
+        return conditions, {}
+    if name == "$lookup":
+        alias = spec["as"]
+        return _split_conditions(conditions, lambda field: not _under(field, alias))
+    if name == "$unwind":
+        path = spec["path"] if isinstance(spec, dict) else spec
+        alias = path[1:]
+        return _split_conditions(conditions, lambda field: not _under(field, alias))
+    if name == "$group":
+        sources = _group_key_sources(spec)
+        moved, kept = _split_conditions(conditions, lambda field: field in sources)
+        return rename_filter(moved, sources), kept
+    if name == "$project":
+        sources = _project_sources(spec)
+        if sources is None:
+            return {}, conditions
+        moved, kept = _split_conditions(conditions, lambda field: field in sources)
+        return rename_filter(moved, sources), kept
+    return {}, conditions
+
+def _push_down_matches(pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    result: List[Dict[str, Any]] = []
+    for stage in pipeline:
+        name, spec = _stage(stage)
+        if name != "$match":
+            result.append(stage)
+            continue
+        conditions = dict(spec)
+        position = len(result)
+        # Walk backwards, carrying whatever can move past each earlier stage
+        while position > 0 and conditions:
+            previous_name, previous_spec = _stage(result[position - 1])
+            if previous_name == "$match":
+                result[position - 1] = {"$match": _merge_filters(previous_spec, conditions)}
+                conditions = {}
+                break
+            moved, kept = _move_past(conditions, result[position - 1])
+            if not moved:
+                break
+            if kept:
+                result.insert(position, {"$match": kept})
+            conditions = moved
+            position -= 1
+        if conditions:
+            result.insert(position, {"$match": conditions})
+    return result
+
+def _coalesce_sort_limit(pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    result = list(pipeline)
+    index = 1
+    while index < len(result):
+        name, spec = _stage(result[index])
+        previous_name, previous_spec = _stage(result[index - 1])
+        if name == "$limit" and previous_name == "$limit":
+            result[index - 1] = {"$limit": min(spec, previous_spec)}
+            del result[index]
+            continue
+        if name == "$sort" and previous_name == "$project":
+            sources = _project_sources(previous_spec)
+            if sources is not None and all(key in sources for key in spec):
+                moved = [{"$sort": {sources[key]: direction for key, direction in spec.items()}}]
+                # Carry the page ($skip then $limit) along so the sort stays top-k
+                for name in ("$skip", "$limit"):
+                    if index + 1 < len(result) and _stage(result[index + 1])[0] == name:
+                        moved.append(result[index + 1])
+                        del result[index + 1]
+                result[index - 1:index + 1] = moved + [result[index - 1]]
+                index = max(index - 1, 1)
+                continue
+        index += 1
+    return result
+
+def _required_fields(stages: List[Dict[str, Any]]) -> Optional[Set[str]]:
+    """
+    Top-level input fields read by a sequence of stages, or None if the stages
+    pass whole documents through or read fields that cannot be determined.
+    """
+    required: Set[str] = set()
+    produced: List[str] = []
+
+    def need(field: str) -> None:
+        if not any(_under(field, alias) for alias in produced):
+            required.add(field.split(".", 1)[0])
+
+    for stage in stages:
+        name, spec = _stage(stage)
+        if name == "$match":
+            fields = filter_fields(spec)
+            if fields is None:
+                return None
+            for field in fields:
+                need(field)
+        elif name == "$lookup":
+            if "localField" not in spec:
+                return None
+            need(spec["localField"])
+            produced.append(spec["as"])
+        elif name == "$unwind":
+            continue
+        elif name == "$sort":
+            for field in spec:
+                need(field)
+        elif name in ("$limit", "$skip"):
+            continue
+        elif name == "$group":
+            fields: Set[str] = set()
+            _expression_fields(spec, fields)
+            for field in fields:
+                need(field)
+            return required
+        elif name == "$project":
+            if _project_sources(spec) is None:
+                return None
+            fields = set()
+            for key, value in spec.items():
+                if key == "_id":
+                    continue
+                fields.add(key if value is True or value == 1 else value[1:])
+            for field in fields:
+                need(field)
+            return required
+        else:
+            return None
+    return None
+
+def _prune_fields(pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    start = 0
+    while start < len(pipeline) and _stage(pipeline[start])[0] == "$match":
+        start += 1
+    rest = pipeline[start:]
+    if not any(_stage(stage)[0] in ("$lookup", "$group") for stage in rest):
+        return pipeline
+    if rest and _stage(rest[0])[0] == "$project":
+        return pipeline
+    required = _required_fields(rest)
+    if required is None:
+        return pipeline
+    projection = {field: 1 for field in sorted(required)} or {"_id": 1}
+    return pipeline[:start] + [{"$project": projection}] + rest
@@ -0,0 +1,637 @@
+import re
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+from .prepared import Placeholder
+
+# Filter that no document matches; every document has an _id
+NEVER_MATCHES = {"_id": {"$exists": False}}
+
+RANGE_OPERATORS = ("$gt", "$gte", "$lt", "$lte")
+
+_NEGATIONS = {
+    "$eq": "$ne", "$ne": "$eq",
+    "$gt": "$lte", "$lte": "$gt",
+    "$lt": "$gte", "$gte": "$lt",
+    "$in": "$nin", "$nin": "$in",
+}
+
+_UNORDERED = 3
+
+# Collation comparing strings case-insensitively; indexes must be built with it to be used
+CASE_INSENSITIVE_COLLATION = {"locale": "en", "strength": 2}
+
+# U+FFFF sorts after every character in ICU collations, so it bounds prefix ranges
+_COLLATION_MAX = "\uffff"
+
+class Predicate:
+    """A node of a WHERE clause expression tree."""
+
+    __slots__ = ()
+
+class Comparison(Predicate):
+    """`field <operator> value`, with the operator given as its MongoDB name."""
+
+    __slots__ = ("field", "operator", "value")
+
+    def __init__(self, field: str, operator: str, value: Any):
+        self.field = field
+        self.operator = operator
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"Comparison({self.field!r}, {self.operator!r}, {self.value!r})"
+
+class And(Predicate):
+    __slots__ = ("children",)
+
+    def __init__(self, children: List[Predicate]):
+        self.children = children
+
+    def __repr__(self) -> str:
+        return f"And({self.children!r})"
+
+class Or(Predicate):
+    __slots__ = ("children",)
+
+    def __init__(self, children: List[Predicate]):
+        self.children = children
+
+    def __repr__(self) -> str:
+        return f"Or({self.children!r})"
+
+class Constant(Predicate):
+    """
+    A condition known to be always true or always false, such as `1 = 1`, or
+    always unknown (None), such as `a = NULL`.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Optional[bool]):
+        self.value = value
+
+    def __repr__(self) -> str:
+        return "UNKNOWN" if self.value is None else "TRUE" if self.value else "FALSE"
+
+TRUE = Constant(True)
+FALSE = Constant(False)
+# SQL compares NULL as unknown; NOT keeps it unknown, and a WHERE clause drops unknown rows
+UNKNOWN = Constant(None)
+
+class Like(Predicate):
+    """
+    `field [NOT] LIKE/ILIKE pattern`, kept as written until compile_likes()
+    knows the whole condition and can pick the cheapest equivalent filter.
+    """
+
+    __slots__ = ("field", "pattern", "escape", "case_insensitive", "negated")
+
+    def __init__(self, field: str, pattern: str, escape: Optional[str] = "\\",
+                 case_insensitive: bool = False, negated: bool = False):
+        self.field = field
+        self.pattern = pattern
+        self.escape = escape
+        self.case_insensitive = case_insensitive
+        self.negated = negated
+
+    def __repr__(self) -> str:
+        operator = ("NOT " if self.negated else "") + ("ILIKE" if self.case_insensitive else "LIKE")
+        return f"Like({self.field!r}, {operator}, {self.pattern!r})"
+
+def value_key(value: Any) -> Tuple[int, Any]:
+    """
+    Return a key that compares literal values the way MongoDB would.
+
+    Numbers, strings and dates each get their own rank, and keys of the same
+    rank can be ordered; MongoDB never matches a range across types. Anything
+    else (placeholders, NULL, booleans) only equals itself.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value)
+    if isinstance(value, datetime):
+        return (2, value)
+    return (_UNORDERED, value)
+
+def _ordered(key: Tuple[int, Any]) -> bool:
+    return key[0] != _UNORDERED
+
+def negate(predicate: Predicate) -> Predicate:
+    """Push a NOT down to the comparisons using De Morgan's laws."""
+    if isinstance(predicate, Constant):
+        return predicate if predicate.value is None else FALSE if predicate.value else TRUE
+    if isinstance(predicate, And):
+        return Or([negate(child) for child in predicate.children])
+    if isinstance(predicate, Or):
+        return And([negate(child) for child in predicate.children])
+    if isinstance(predicate, Like):
+        return Like(predicate.field, predicate.pattern, predicate.escape,
+                    predicate.case_insensitive, not predicate.negated)
+    operator = predicate.operator
+    if operator in _NEGATIONS:
+        return Comparison(predicate.field, _NEGATIONS[operator], predicate.value)
+    if operator == "$not":
+        operator, value = next(iter(predicate.value.items()))
+        return Comparison(predicate.field, operator, value)
+    return Comparison(predicate.field, "$not", {operator: predicate.value})
+
+def compare_constants(left: Any, operator: str, right: Any) -> Constant:
+    """
+    Evaluate a comparison between two literals, e.g. the `1 = 1` that query
+    builders put in front of optional conditions.
+    """
+    left_key, right_key = value_key(left), value_key(right)
+    if not _ordered(left_key) or not _ordered(right_key):
+        raise ValueError("Comparisons between literals need constant values")
+    if operator == "$eq":
+        return Constant(left_key == right_key)
+    if operator == "$ne":
+        return Constant(left_key != right_key)
+    if left_key[0] != right_key[0]:
+        raise ValueError("Cannot order values of different types")
+    result = {
+        "$gt": left_key > right_key,
+        "$gte": left_key >= right_key,
+        "$lt": left_key < right_key,
+        "$lte": left_key <= right_key,
+    }[operator]
+    return Constant(result)
+
+# Wildcard markers among the literal runs of a split LIKE pattern
+_ANY = object()
+_ONE = object()
+
+def _like_parts(pattern: str, escape: Optional[str]) -> List[Any]:
+    """Split a LIKE pattern into literal strings and the _ANY (%) and _ONE (_) wildcards."""
+    parts: List[Any] = []
+    literal: List[str] = []
+    chars = iter(pattern)
+    for char in chars:
+        if char == escape:
+            literal.append(next(chars, char))
+        elif char == "%" or char == "_":
+            if literal:
+                parts.append("".join(literal))
+                literal = []
+            # Consecutive % match the same as one
+            if char == "_":
+                parts.append(_ONE)
+            elif not parts or parts[-1] is not _ANY:
+                parts.append(_ANY)
+        else:
+            literal.append(char)
+    if literal:
+        parts.append("".join(literal))
+    return parts
+
+def _like_kind(parts: List[Any]) -> str:
+    """Classify a pattern as "exact", "prefix" (literal then one trailing %) or "regex"."""
+    wildcards = sum(1 for part in parts if part is _ANY or part is _ONE)
+    if not wildcards:
+        return "exact"
+    if wildcards == 1 and parts[-1] is _ANY:
+        return "prefix"
+    return "regex"
+
+def _successor(prefix: str) -> Optional[str]:
+    """The smallest string greater than every string starting with prefix, in code point order."""
+    while prefix:
+        code = ord(prefix[-1]) + 1
+        if code == 0xD800:
+            # Surrogates cannot be encoded in BSON strings
+            code = 0xE000
+        if code <= 0x10FFFF:
+            return prefix[:-1] + chr(code)
+        prefix = prefix[:-1]
+    return None
+
+def _like_regex(parts: List[Any], case_insensitive: bool) -> str:
+    """Build an anchored regular expression with escaped literals; wildcards also match newlines."""
+    pattern = [] if parts[0] is _ANY else ["^"]
+    dotall = False
+    for index, part in enumerate(parts):
+        if part is _ONE:
+            pattern.append(".")
+            dotall = True
+        elif part is _ANY:
+            # Leading and trailing % are left unanchored instead
+            if 0 < index < len(parts) - 1:
+                pattern.append(".*")
+                dotall = True
+        else:
+            pattern.append(re.escape(part))
+    if parts[-1] is not _ANY:
+        pattern.append("$")
+    flags = ("i" if case_insensitive else "") + ("s" if dotall else "")
+    return (f"(?{flags})" if flags else "") + "".join(pattern)
+
+def _compile_like(like: Like, kind: str, parts: List[Any], collation: bool) -> Predicate:
+    field = like.field
+    if kind == "exact" and (collation or not like.case_insensitive):
+        text = "".join(parts)
+        predicate: Predicate = Comparison(field, "$eq", text.lower() if like.case_insensitive else text)
+    elif kind == "prefix" and len(parts) == 1:
+        # A lone % matches every string
+        predicate = Comparison(field, "$type", "string")
+    elif kind == "prefix" and (collation or not like.case_insensitive):
+        if like.case_insensitive:
+            prefix = parts[0].lower()
+            upper: Optional[str] = prefix + _COLLATION_MAX
+        else:
+            prefix = parts[0]
+            upper = _successor(prefix)
+        predicate = Comparison(field, "$gte", prefix)
+        if upper is not None:
+            predicate = And([predicate, Comparison(field, "$lt", upper)])
+    else:
+        predicate = Comparison(field, "$regex", _like_regex(parts, like.case_insensitive))
+    return negate(predicate) if like.negated else predicate
+
+def _nodes(predicate: Predicate) -> List[Predicate]:
+    if isinstance(predicate, (And, Or)):
+        return [node for child in predicate.children for node in _nodes(child)]
+    return [predicate]
+
+def _compares_strings(comparison: Comparison) -> bool:
+    values = comparison.value if isinstance(comparison.value, list) else [comparison.value]
+    return any(isinstance(value, (str, Placeholder)) for value in values)
+
+def compile_likes(predicate: Predicate, allow_collation: bool = True
+                  ) -> Tuple[Predicate, Optional[Dict[str, Any]], List[str]]:
+    """
+    Replace the LIKE and ILIKE conditions of a predicate with index-friendly ones.
+
+    Patterns without wildcards become equalities and `'abc%'` becomes the
+    range `$gte: "abc", $lt: "abd"`, both of which use an index's bounds.
+    Other patterns become anchored regular expressions with escaped literals.
+    ILIKE equalities and prefixes are compared under a case-insensitive
+    collation instead of a /i regex, which no index can bound. The collation
+    applies to the whole query, so it is only used when no other condition
+    compares strings case-sensitively; otherwise ILIKE falls back to `(?i)`.
+
+    Args:
+        predicate (Predicate): The parsed condition
+        allow_collation (bool): Whether the query can take a collation
+
+    Returns:
+        Tuple[Predicate, Optional[Dict[str, Any]], List[str]]: The condition,
+            the collation the query needs (or None), and the fields matched
+            with a leading wildcard, which only a text index can serve
+    """
+    nodes = _nodes(predicate)
+    likes = {}
+    for node in nodes:
+        if isinstance(node, Like):
+            parts = _like_parts(node.pattern, node.escape)
+            likes[id(node)] = (_like_kind(parts), parts)
+    if not likes:
+        return predicate, None, []
+
+    collation = allow_collation and any(
+        node.case_insensitive and likes[id(node)][0] != "regex" for node in nodes if isinstance(node, Like)
+    ) and not any(
+        _compares_strings(node) if isinstance(node, Comparison)
+        else isinstance(node, Like) and not node.case_insensitive and likes[id(node)][0] != "regex"
+        for node in nodes
+    )
+    text_search: List[str] = []
+    for node in nodes:
+        if isinstance(node, Like):
+            parts = likes[id(node)][1]
+            if len(parts) > 1 and parts[0] is _ANY and node.field not in text_search:
+                text_search.append(node.field)
+
+    def replace(node: Predicate) -> Predicate:
+        if isinstance(node, Like):
+            kind, parts = likes[id(node)]
+            return _compile_like(node, kind, parts, collation)
+        if isinstance(node, And):
+            return And([replace(child) for child in node.children])
+        if isinstance(node, Or):
+            return Or([replace(child) for child in node.children])
+        return node
+
+    return replace(predicate), dict(CASE_INSENSITIVE_COLLATION) if collation else None, text_search
+
+def _signature(predicate: Predicate) -> Any:
+    """Hashable identity of a predicate, used to drop duplicates."""
+    if isinstance(predicate, Comparison):
+        value = predicate.value
+        if isinstance(value, list):
+            value = tuple(value_key(item) for item in value)
+        elif isinstance(value, dict):
+            value = repr(value)
+        else:
+            value = value_key(value)
+        return (predicate.field, predicate.operator, value)
+    if isinstance(predicate, Constant):
+        return predicate.value
+    return (type(predicate).__name__, tuple(_signature(child) for child in predicate.children))
+
+def _unique(values: List[Any]) -> List[Any]:
+    seen = {}
+    for value in values:
+        seen.setdefault(value_key(value), value)
+    return list(seen.values())
+
+def simplify(predicate: Predicate) -> Predicate:
+    """
+    Simplify a predicate tree.
+
+    Nested ANDs and ORs are flattened, constant conditions are folded away,
+    range conditions on the same field are merged into one bounded range,
+    equalities ORed on one field become a single $in, and conditions that
+    cannot hold together (`a = 1 AND a = 2`, `a > 5 AND a < 3`) collapse to
+    FALSE. Comparisons with NULL were parsed as UNKNOWN; with every NOT already
+    pushed down they select no rows, so they fold to FALSE. Columns are taken
+    to hold scalars, as they do in SQL.
+
+    Args:
+        predicate (Predicate): The parsed condition
+
+    Returns:
+        Predicate: An equivalent, usually smaller, condition
+    """
+    if isinstance(predicate, Comparison):
+        return _simplify_comparison(predicate)
+    if isinstance(predicate, And):
+        return _simplify_and(predicate)
+    if isinstance(predicate, Or):
+        return _simplify_or(predicate)
+    if isinstance(predicate, Constant) and predicate.value is None:
+        return FALSE
+    return predicate
+
+def _simplify_comparison(comparison: Comparison) -> Predicate:
+    operator = comparison.operator
+    if operator == "$in" or operator == "$nin":
+        values = _unique(comparison.value)
+        if not values:
+            return FALSE if operator == "$in" else TRUE
+        if len(values) == 1:
+            return Comparison(comparison.field, "$eq" if operator == "$in" else "$ne", values[0])
+        if len(values) != len(comparison.value):
+            return Comparison(comparison.field, operator, values)
+    return comparison
+
+def _flatten(children: List[Predicate], kind: type) -> List[Predicate]:
+    flat = []
+    for child in children:
+        child = simplify(child)
+        if isinstance(child, kind):
+            flat.extend(child.children)
+        else:
+            flat.append(child)
+    return flat
+
+def _simplify_and(predicate: And) -> Predicate:
+    by_field: Dict[str, List[Comparison]] = {}
+    others: List[Predicate] = []
+    seen = set()
+    for child in _flatten(predicate.children, And):
+        if isinstance(child, Constant):
+            if not child.value:
+                return FALSE
+        elif isinstance(child, Comparison):
+            by_field.setdefault(child.field, []).append(child)
+        else:
+            signature = _signature(child)
+            if signature not in seen:
+                seen.add(signature)
+                others.append(child)
+
+    children: List[Predicate] = []
+    for field, comparisons in by_field.items():
+        merged = comparisons if len(comparisons) == 1 else _merge_conjuncts(field, comparisons)
+        if merged is None:
+            return FALSE
+        children.extend(merged)
+    children.extend(others)
+    if not children:
+        return TRUE
+    return children[0] if len(children) == 1 else And(children)
+
+def _simplify_or(predicate: Or) -> Predicate:
+    equalities: Dict[str, List[Any]] = {}
+    children: List[Predicate] = []
+    seen = set()
+    for child in _flatten(predicate.children, Or):
+        if isinstance(child, Constant):
+            if child.value:
+                return TRUE
+            continue
+        if isinstance(child, Comparison) and child.operator in ("$eq", "$in"):
+            values = equalities.get(child.field)
+            if values is None:
+                values = equalities[child.field] = []
+                # Placeholder keeping the field's position among the branches
+                children.append(child.field)
+            values.extend([child.value] if child.operator == "$eq" else child.value)
+            continue
+        signature = _signature(child)
+        if signature not in seen:
+            seen.add(signature)
+            children.append(child)
+
+    children = [
+        _simplify_comparison(Comparison(child, "$in", equalities[child])) if isinstance(child, str) else child
+        for child in children
+    ]
+    if not children:
+        return FALSE
+    return children[0] if len(children) == 1 else Or(children)
+
+class _Bound:
+    __slots__ = ("key", "value", "inclusive")
+
+    def __init__(self, key: Tuple[int, Any], value: Any, inclusive: bool):
+        self.key = key
+        self.value = value
+        self.inclusive = inclusive
+
+def _admits(key: Tuple[int, Any], lower: Optional[_Bound], upper: Optional[_Bound]) -> bool:
+    """Whether a value lies within the bounds; MongoDB ranges never cross types."""
+    if lower is not None:
+        if key[0] != lower.key[0] or key < lower.key or (key == lower.key and not lower.inclusive):
+            return False
+    if upper is not None:
+        if key[0] != upper.key[0] or key > upper.key or (key == upper.key and not upper.inclusive):
+            return False
+    return True
+
+def _merge_conjuncts(field: str, comparisons: List[Comparison]) -> Optional[List[Comparison]]:
+    """
+    Merge the ANDed comparisons on one field.
+
+    Returns:
+        Optional[List[Comparison]]: The merged comparisons, or None if they
+            contradict each other
+    """
+    allowed: Optional[Dict[Tuple[int, Any], Any]] = None
+    excluded: Dict[Tuple[int, Any], Any] = {}
+    lower: Optional[_Bound] = None
+    upper: Optional[_Bound] = None
+    rest: List[Comparison] = []
+
+    for comparison in comparisons:
+        operator, value = comparison.operator, comparison.value
+        if operator in ("$eq", "$in", "$ne", "$nin"):
+            values = value if isinstance(value, list) else [value]
+            keys = [value_key(item) for item in values]
+            if all(_ordered(key) for key in keys):
+                if operator == "$eq" or operator == "$in":
+                    found = dict(zip(keys, values))
+                    allowed = found if allowed is None else {key: allowed[key] for key in allowed if key in found}
+                else:
+                    excluded.update(zip(keys, values))
+                continue
+        elif operator in RANGE_OPERATORS:
+            key = value_key(value)
+            inclusive = operator.endswith("e")
+            if operator.startswith("$g"):
+                if lower is None:
+                    lower = _Bound(key, value, inclusive)
+                    continue
+                if _ordered(key) and key[0] == lower.key[0]:
+                    if key > lower.key or (key == lower.key and not inclusive):
+                        lower = _Bound(key, value, inclusive)
+                    continue
+            else:
+                if upper is None:
+                    upper = _Bound(key, value, inclusive)
+                    continue
+                if _ordered(key) and key[0] == upper.key[0]:
+                    if key < upper.key or (key == upper.key and not inclusive):
+                        upper = _Bound(key, value, inclusive)
+                    continue
+        rest.append(comparison)
+
+    # Bounds on placeholders cannot be compared, so they are kept as given
+    merged: List[Comparison] = []
+    if lower is not None and not _ordered(lower.key):
+        merged.append(Comparison(field, "$gte" if lower.inclusive else "$gt", lower.value))
+        lower = None
+    if upper is not None and not _ordered(upper.key):
+        merged.append(Comparison(field, "$lte" if upper.inclusive else "$lt", upper.value))
+        upper = None
+
+    if lower is not None and upper is not None and lower.key[0] == upper.key[0]:
+        if lower.key > upper.key or (lower.key == upper.key and not (lower.inclusive and upper.inclusive)):
+            return None
+        if lower.key == upper.key and allowed is None:
+            allowed = {lower.key: lower.value}
+
+    if allowed is not None:
+        values = [value for key, value in allowed.items() if key not in excluded and _admits(key, lower, upper)]
+        if not values:
+            return None
+        merged.append(Comparison(field, "$eq", values[0]) if len(values) == 1 else Comparison(field, "$in", values))
+    else:
+        if lower is not None:
+            merged.append(Comparison(field, "$gte" if lower.inclusive else "$gt", lower.value))
+        if upper is not None:
+            merged.append(Comparison(field, "$lte" if upper.inclusive else "$lt", upper.value))
+        # Exclusions outside the range are implied by it
+        values = [value for key, value in excluded.items() if _admits(key, lower, upper)]
+        if values:
+            merged.append(Comparison(field, "$ne", values[0]) if len(values) == 1 else Comparison(field, "$nin", values))
+    return merged + rest
+
+def pinned_fields(conditions: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return the fields a filter fixes to one non-NULL value, with their values.
+
+    Only top-level (or $and-ed) equalities count; a field compared inside an
+    $or can still take several values.
+    """
+    pinned: Dict[str, Any] = {}
+    for field, condition in conditions.items():
+        if field == "$and":
+            for clause in condition:
+                pinned.update(pinned_fields(clause))
+            continue
+        if field.startswith("$"):
+            continue
+        if isinstance(condition, dict):
+            if "$eq" not in condition:
+                continue
+            condition = condition["$eq"]
+        if condition is not None and not isinstance(condition, (dict, list)):
+            pinned[field] = condition
+    return pinned
+
+def compare(field: str, operator: str, value: Any) -> Predicate:
+    """
+    Build `field <operator> value` with SQL's NULL semantics.
+
+    A comparison with a NULL literal is UNKNOWN whatever the operator, and
+    NULL in an IN list adds an UNKNOWN alternative, so that `NOT IN (1, NULL)`
+    never holds. IS [NOT] NULL is a plain $eq / $ne None comparison instead.
+    """
+    if value is None:
+        return UNKNOWN
+    if operator == "$in" and None in value:
+        values = [item for item in value if item is not None]
+        return Or([Comparison(field, "$in", values), UNKNOWN]) if values else UNKNOWN
+    return Comparison(field, operator, value)
+
+def _sql_operators(comparison: Comparison) -> List[Tuple[str, Any]]:
+    """
+    The operators rendering a comparison with SQL's NULL semantics.
+
+    In SQL a comparison with NULL is unknown, so `a != 1`, `a NOT IN (1, 2)`
+    and `a NOT LIKE 'x%'` never select rows where a is NULL, whereas $ne,
+    $nin and $not match null and missing fields. Those operators exclude
+    null explicitly; the others never match it.
+    """
+    operator, value = comparison.operator, comparison.value
+    if operator == "$ne" and value is not None:
+        return [("$nin", [value, None])]
+    if operator == "$nin" and None not in value:
+        return [("$nin", list(value) + [None])]
+    if operator == "$not":
+        return [("$not", value), ("$ne", None)]
+    return [(operator, value)]
+
+def to_filter(predicate: Predicate) -> Dict[str, Any]:
+    """
+    Render a predicate as a MongoDB query filter.
+
+    Conditions on one field share a single operator document, e.g.
+    `{"age": {"$gte": 18, "$lt": 65}}`, so the planner sees one index range.
+    Negative comparisons exclude NULLs as SQL does, e.g. `a != 1` becomes
+    `{"a": {"$nin": [1, None]}}`.
+
+    Args:
+        predicate (Predicate): A (usually simplified) condition
+
+    Returns:
+        Dict[str, Any]: The filter document
+    """
+    if isinstance(predicate, Constant):
+        return {} if predicate.value else dict(NEVER_MATCHES)
+    if isinstance(predicate, Comparison):
+        return {predicate.field: dict(_sql_operators(predicate))}
+    if isinstance(predicate, Or):
+        return {"$or": [to_filter(child) for child in predicate.children]}
+
+    conditions: Dict[str, Any] = {}
+    extra: List[Dict[str, Any]] = []
+    for child in predicate.children:
+        if isinstance(child, Comparison):
+            rendered = _sql_operators(child)
+            operators = conditions.get(child.field)
+            if operators is None:
+                conditions[child.field] = dict(rendered)
+                continue
+            if all(operator not in operators or operators[operator] == value for operator, value in rendered):
+                operators.update(rendered)
+                continue
+        elif isinstance(child, Or) and "$or" not in conditions:
+            conditions["$or"] = to_filter(child)["$or"]
+            continue
+        extra.append(to_filter(child))
+    if extra:
+        conditions["$and"] = extra
+    return conditions
@@ -0,0 +1,110 @@
+from typing import Dict, List, Any, Callable, Mapping, Optional, Sequence, Union
+
+class Placeholder:
+    """A `?`, `$n` or `:name` parameter slot left in a parsed query."""
+
+    __slots__ = ("key", "coerce")
+
+    def __init__(self, key: Union[int, str], coerce: Optional[Callable[[Any], Any]] = None):
+        # Positional placeholders are keyed by index, named ones by name
+        self.key = key
+        # Converts the bound value to the schema type of the slot's field
+        self.coerce = coerce
+
+    @property
+    def is_named(self) -> bool:
+        return isinstance(self.key, str)
+
+    def typed(self, coerce: Callable[[Any], Any]) -> "Placeholder":
+        """Return this slot with bound values converted by coerce."""
+        return Placeholder(self.key, coerce)
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Placeholder) and other.key == self.key
+
+    def __hash__(self) -> int:
+        return hash(("Placeholder", self.key))
+
+    def __repr__(self) -> str:
+        return f":{self.key}" if self.is_named else "?"
+
+Builder = Callable[[Any], Any]
+
+def _compile(node: Any, slots: List[Placeholder]) -> Builder:
+    """Compile a query template into a closure that rebuilds it with bound values."""
+    if isinstance(node, Placeholder):
+        slots.append(node)
+        key = node.key
+        coerce = node.coerce
+        if coerce is not None:
+            return lambda params: coerce(params[key])
+        return lambda params: params[key]
+    if isinstance(node, dict):
+        items = [(key, _compile(value, slots)) for key, value in node.items()]
+        return lambda params: {key: build(params) for key, build in items}
+    if isinstance(node, list):
+        builders = [_compile(value, slots) for value in node]
+        return lambda params: [build(params) for build in builders]
+    # Scalars are immutable and can be shared between bound queries
+    return lambda params: node
+
+class PreparedQuery:
+    """
+    A SQL query parsed and translated once, with literal slots that can be
+    filled in repeatedly without going back through the parser.
+    """
+
+    def __init__(self, sql_query: str, template: Dict[str, Any]):
+        self.sql_query = sql_query
+        self.template = template
+        slots: List[Placeholder] = []
+        self._build = _compile(template, slots)
+        named = {slot.key for slot in slots if slot.is_named}
+        positional = {slot.key for slot in slots if not slot.is_named}
+        self.param_names = sorted(named)
+        # $n placeholders may repeat or come in any order; every number up to the highest must be used
+        self.positional_count = max(positional) + 1 if positional else 0
+        unused = sorted(set(range(self.positional_count)) - positional)
+        if unused:
+            raise ValueError(f"Positional parameters must be numbered without gaps; "
+                             f"${unused[0] + 1} is not used")
+        self.param_count = self.positional_count + len(named)
+
+    def bind(self, params: Union[Sequence[Any], Mapping[Union[int, str], Any], None] = None,
+             named: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Fill the placeholders with concrete values.
+
+        Templates may mix `?` and `:name` placeholders: pass the positional
+        values as a sequence and the named ones as `named`, or everything in a
+        single mapping keyed by position (from 0) and by name.
+
+        Args:
+            params: A sequence of values for `?` placeholders, or a mapping of
+                positions and names to values
+            named: Values for `:name` placeholders when params is a sequence
+
+        Returns:
+            Dict[str, Any]: The MongoDB query with the values substituted
+
+        Raises:
+            ValueError: If parameters are missing or a value cannot take its field's schema type
+        """
+        if isinstance(params, Mapping):
+            if named is not None:
+                raise ValueError("Pass named parameters either in params or in named, not both")
+            values = dict(params)
+        else:
+            values = dict(enumerate(params or ()))
+            if len(values) != self.positional_count:
+                raise ValueError(f"Expected {self.positional_count} positional parameters")
+            values.update(named or {})
+        if any(index not in values for index in range(self.positional_count)):
+            raise ValueError(f"Expected {self.positional_count} positional parameters")
+        missing = [name for name in self.param_names if name not in values]
+        if missing:
+            raise ValueError(f"Missing parameters: {', '.join(missing)}")
+        return self._build(values)
+
+    def __repr__(self) -> str:
+        return f"PreparedQuery({self.sql_query!r})"
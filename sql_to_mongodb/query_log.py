@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Size a migration from production query logs.
+
+Streams a MySQL general or slow query log, or a pg_stat_statements CSV
+export, groups the statements by fingerprint and translates one example of
+each fingerprint, reporting how often each shape runs, its share of the
+logged time, whether it translates and the MongoDB query it becomes.
+"""
+
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+from itertools import chain, islice
+from typing import Dict, List, Any, Optional, Iterable, Iterator, TextIO, Tuple
+from .fingerprint import fingerprint, fingerprint_hash, literal_skeleton, query_shape
+from .instrumentation import statement_kind
+from .translator import SQLToMongoDBTranslator
+
+# (statement, seconds spent in it or None, number of executions)
+LogEntry = Tuple[str, Optional[float], int]
+
+LOG_FORMATS = ("mysql-general", "mysql-slow", "pg-csv")
+
+# "2024-01-01T10:00:00.123456Z\t   12 Query\tSELECT ..." (5.7+), "240101 10:00:00\t   12 Query\t..."
+# (5.6) or "\t\t   12 Query\t..." for later entries of the same second
+_GENERAL_ENTRY_RE = re.compile(
+    r"^(?:\d{4}-\d\d-\d\dT\S+|\d{6}\s+\d{1,2}:\d\d:\d\d)?\s+\d+\s+([A-Za-z]+(?: [A-Za-z]+)?)\t(.*)$"
+)
+# Lines mysqld writes when it opens or rotates a log
+_LOG_HEADER_RE = re.compile(r"^(?:\S+, Version: |Tcp port: |Time\s+Id\s+Command\s+Argument)")
+_QUERY_TIME_RE = re.compile(r"Query_time:\s*([\d.]+)")
+# Session statements the slow log writes before each logged query
+_SLOW_PREAMBLE_RE = re.compile(r"^(?:SET timestamp=\d+|use [^;]+);$", re.IGNORECASE)
+
+def mysql_general_log(lines: Iterable[str]) -> Iterator[LogEntry]:
+    """Yield the Query and Execute statements of a MySQL general query log."""
+    statement: Optional[List[str]] = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        match = _GENERAL_ENTRY_RE.match(line)
+        if match is None:
+            if statement is not None and not _LOG_HEADER_RE.match(line):
+                # Statements spanning several lines continue without a prefix
+                statement.append(line)
+            continue
+        if statement:
+            yield "\n".join(statement), None, 1
+        statement = [match.group(2)] if match.group(1) in ("Query", "Execute") else None
+    if statement:
+        yield "\n".join(statement), None, 1
+
+def mysql_slow_log(lines: Iterable[str]) -> Iterator[LogEntry]:
+    """Yield the statements of a MySQL slow query log with their Query_time."""
+    statement: List[str] = []
+    seconds: Optional[float] = None
+
+    def entry() -> Optional[LogEntry]:
+        sql = "\n".join(statement).strip().rstrip(";").strip()
+        return (sql, seconds, 1) if sql else None
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.startswith("#"):
+            if statement:
+                item = entry()
+                if item:
+                    yield item
+                statement = []
+                seconds = None
+            match = _QUERY_TIME_RE.search(line)
+            if match:
+                seconds = float(match.group(1))
+        elif _LOG_HEADER_RE.match(line) or (not statement and _SLOW_PREAMBLE_RE.match(line.strip())):
+            continue
+        elif statement or line.strip():
+            statement.append(line)
+    item = entry() if statement else None
+    if item:
+        yield item
+
+def pg_stat_statements_csv(lines: Iterable[str]) -> Iterator[LogEntry]:
+    """
+    Yield the statements of a pg_stat_statements CSV export with their calls
+    and total execution time (total_exec_time, or total_time before PostgreSQL 13).
+    """
+    for row in csv.DictReader(lines):
+        sql = row.get("query")
+        if not sql:
+            continue
+        total = row.get("total_exec_time") or row.get("total_time")
+        yield sql, float(total) / 1000 if total else None, int(row.get("calls") or 1)
+
+_READERS = {"mysql-general": mysql_general_log, "mysql-slow": mysql_slow_log, "pg-csv": pg_stat_statements_csv}
+
+def detect_format(head: List[str]) -> str:
+    """Guess the format of a log from its first lines."""
+    if any(line.startswith(("# Time:", "# User@Host:", "# Query_time:")) for line in head):
+        return "mysql-slow"
+    if head:
+        columns = next(csv.reader([head[0]]))
+        if "query" in columns and "calls" in columns:
+            return "pg-csv"
+    return "mysql-general"
+
+def read_query_log(lines: Iterable[str], log_format: str = "auto") -> Iterator[LogEntry]:
+    """
+    Yield (statement, seconds, calls) entries from a query log, lazily.
+
+    Args:
+        lines (Iterable[str]): Lines of the log, e.g. an open text file
+        log_format (str): One of LOG_FORMATS, or "auto" to detect it from the first lines
+
+    Yields:
+        LogEntry: Each logged statement
+    """
+    if log_format == "auto":
+        lines = iter(lines)
+        head = list(islice(lines, 50))
+        log_format = detect_format(head)
+        lines = chain(head, lines)
+    reader = _READERS.get(log_format)
+    if reader is None:
+        raise ValueError(f"Unknown log format {log_format!r}; expected one of {', '.join(LOG_FORMATS)}")
+    return reader(lines)
+
+class _Shape:
+    """Totals of one fingerprint and the translation of its first example."""
+
+    __slots__ = ("fingerprint", "example", "calls", "seconds", "result")
+
+    def __init__(self, fingerprint: str, example: str):
+        self.fingerprint = fingerprint
+        self.example = example
+        self.calls = 0
+        self.seconds = 0.0
+        self.result: Optional[Dict[str, Any]] = None
+
+class QueryLogAnalyzer:
+    """
+    Aggregates logged statements by fingerprint.
+
+    Memory and translation work grow with the number of distinct shapes,
+    not with the length of the log: each statement only costs a fingerprint,
+    and each fingerprint is translated once, from the first statement seen.
+    """
+
+    # Fingerprints memoized by literal skeleton; cleared when full
+    MEMO_SIZE = 65536
+
+    def __init__(self, translator: Optional[SQLToMongoDBTranslator] = None):
+        self.translator = translator or SQLToMongoDBTranslator(cache_size=0)
+        self.statements = 0
+        self._shapes: Dict[str, _Shape] = {}
+        self._memo: Dict[Tuple[Any, ...], str] = {}
+        self._timed = False
+
+    def add(self, sql_query: str, seconds: Optional[float] = None, calls: int = 1) -> None:
+        """Count one log entry."""
+        # Only statements of a shape not seen yet pay for tokenizing
+        skeleton = literal_skeleton(sql_query)
+        key = self._memo.get(skeleton)
+        if key is None:
+            key = fingerprint(sql_query)
+            if len(self._memo) >= self.MEMO_SIZE:
+                self._memo.clear()
+            self._memo[skeleton] = key
+        shape = self._shapes.get(key)
+        if shape is None:
+            shape = self._shapes[key] = _Shape(key, sql_query)
+        shape.calls += calls
+        if seconds is not None:
+            shape.seconds += seconds
+            self._timed = True
+        self.statements += 1
+
+    def ingest(self, entries: Iterable[LogEntry]) -> "QueryLogAnalyzer":
+        """Count every entry of a log, e.g. the output of read_query_log()."""
+        for sql_query, seconds, calls in entries:
+            self.add(sql_query, seconds, calls)
+        return self
+
+    def _translate(self, workers: Optional[int]) -> None:
+        """Translate the fingerprints added since the last report."""
+        pending = [shape for shape in self._shapes.values() if shape.result is None]
+        dml = [shape for shape in pending if statement_kind(shape.example) != "OTHER"]
+        for shape in pending:
+            if statement_kind(shape.example) == "OTHER":
+                shape.result = {"status": "skipped", "message": "Not a SELECT, INSERT, UPDATE or DELETE"}
+        results = self.translator.translate_batch([shape.example for shape in dml], workers=workers,
+                                                  return_errors=True)
+        for shape, result in zip(dml, results):
+            shape.result = result
+
+    def report(self, top: Optional[int] = None, workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Translate each new fingerprint once and summarize the log.
+
+        Fingerprints are ranked by their share of the logged time, or by
+        their number of executions when the log has no timings.
+
+        Args:
+            top (Optional[int]): Number of fingerprints to list; None lists all
+            workers (Optional[int]): Worker processes translating the fingerprints
+
+        Returns:
+            Dict[str, Any]: "summary" totals per status and "fingerprints" details
+        """
+        self._translate(workers)
+        calls = sum(shape.calls for shape in self._shapes.values()) or 1
+        seconds = sum(shape.seconds for shape in self._shapes.values())
+        timed = self._timed and seconds > 0
+
+        totals = {status: {"fingerprints": 0, "calls": 0, "seconds": 0.0}
+                  for status in ("translated", "failed", "skipped")}
+        rows = []
+        for shape in self._shapes.values():
+            status = shape.result.get("status")
+            if status == "error":
+                status = "failed"
+            elif status != "skipped":
+                status = "translated"
+            total = totals[status]
+            total["fingerprints"] += 1
+            total["calls"] += shape.calls
+            total["seconds"] += shape.seconds
+            row: Dict[str, Any] = {
+                "id": fingerprint_hash(shape.fingerprint)[:16],
+                "fingerprint": shape.fingerprint,
+                "example": shape.example,
+                "calls": shape.calls,
+                "call_share": shape.calls / calls,
+                "seconds": shape.seconds if timed else None,
+                "time_share": shape.seconds / seconds if timed else None,
+                "status": status
+            }
+            if status == "translated":
+                row["mongodb_shape"] = query_shape(shape.result)
+            else:
+                row["error"] = shape.result.get("message")
+            rows.append(row)
+
+        rows.sort(key=lambda row: (row["seconds"] or 0, row["calls"]), reverse=True)
+        for total in totals.values():
+            total["call_share"] = total["calls"] / calls
+            total["time_share"] = total["seconds"] / seconds if timed else None
+            if not timed:
+                total["seconds"] = None
+        return {
+            "summary": {
+                "statements": self.statements,
+                "calls": sum(shape.calls for shape in self._shapes.values()),
+                "fingerprints": len(self._shapes),
+                "seconds": seconds if timed else None,
+                **totals
+            },
+            "fingerprints": rows if top is None else rows[:top]
+        }
+
+def _percent(share: Optional[float]) -> str:
+    return "-" if share is None else f"{100 * share:.1f}%"
+
+def format_report(report: Dict[str, Any], width: int = 100) -> str:
+    """Render a report as text: totals per status, then one entry per fingerprint."""
+    summary = report["summary"]
+    lines = [
+        f"{summary['statements']:,} statements, {summary['calls']:,} calls, "
+        f"{summary['fingerprints']:,} fingerprints",
+    ]
+    for status in ("translated", "failed", "skipped"):
+        total = summary[status]
+        lines.append(f"  {status:<11}{total['fingerprints']:>8,} fingerprints  "
+                     f"{_percent(total['call_share']):>6} of calls  {_percent(total['time_share']):>6} of time")
+    lines.append("")
+    lines.append(f"{'calls':>12} {'calls %':>7} {'time %':>7}  {'status':<10} fingerprint")
+    for row in report["fingerprints"]:
+        lines.append(f"{row['calls']:>12,} {_percent(row['call_share']):>7} {_percent(row['time_share']):>7}  "
+                     f"{row['status']:<10} {row['fingerprint'][:width]}")
+        if "mongodb_shape" in row:
+            detail = "-> " + json.dumps(row["mongodb_shape"], separators=(",", ":"), default=str)
+        else:
+            detail = "!! " + str(row["error"])
+        lines.append(" " * 40 + detail[:width])
+    return "\n".join(lines) + "\n"
+
+def main(argv=None) -> int:
+    from .cli import _open_input
+
+    arg_parser = argparse.ArgumentParser(
+        prog="sql-to-mongodb-log",
+        description="Report how the statements of a query log translate to MongoDB."
+    )
+    arg_parser.add_argument("input", help="MySQL general/slow log or pg_stat_statements CSV (.gz ok), or -")
+    arg_parser.add_argument("--log-format", choices=("auto",) + LOG_FORMATS, default="auto",
+                            help="log format (default: detected from the first lines)")
+    arg_parser.add_argument("--schema", help="JSON file of collection field types used to type literals")
+    arg_parser.add_argument("--workers", type=int, default=None,
+                            help="translate fingerprints in this many worker processes")
+    arg_parser.add_argument("--top", type=int, default=50, help="fingerprints to list (default: 50, 0 for all)")
+    arg_parser.add_argument("--json", metavar="FILE", help="also write the full report as JSON")
+    args = arg_parser.parse_args(argv)
+
+    stream, _ = _open_input(args.input)
+    lines = io.TextIOWrapper(stream, encoding="utf-8", errors="replace", newline="")
+    analyzer = QueryLogAnalyzer(SQLToMongoDBTranslator(cache_size=0, schema=args.schema))
+    try:
+        analyzer.ingest(read_query_log(lines, args.log_format))
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+    report = analyzer.report(workers=args.workers)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+    shown = dict(report, fingerprints=report["fingerprints"][:args.top] if args.top else report["fingerprints"])
+    sys.stdout.write(format_report(shown))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
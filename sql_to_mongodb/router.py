@@ -0,0 +1,105 @@
+import re
+import threading
+from collections import Counter
+from typing import Dict, Any, Optional, Tuple
+from .sql_parser import SQLParser, SQLSyntaxError
+
+# Intents handled without the ReAct agent
+TRANSLATE = "translate"
+VALIDATE = "validate"
+EXPLAIN = "explain"
+AGENT = "agent"
+
+_FENCE_RE = re.compile(r"^```(?:sql)?\s*(.*?)\s*```$", re.DOTALL | re.IGNORECASE)
+_SQL_START_RE = re.compile(r"\b(?:SELECT|INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+
+_POLITE = r"(?:(?:please|can you|could you|would you)\s+)*"
+_OBJECT = r"(?:\s+(?:this|the|following|my|a))*(?:\s+(?:sql|query|statement))*"
+_TARGET = r"(?:\s+(?:to|into|for|in)\s+(?:a\s+)?mongo(?:db)?(?:\s+query)?)?"
+_END = r"\s*[:?\-]?\s*$"
+
+_PREFIXES = [
+    (TRANSLATE, re.compile(_POLITE + r"(?:translate|convert)" + _OBJECT + _TARGET + _END, re.IGNORECASE)),
+    (VALIDATE, re.compile(
+        _POLITE + r"(?:validate|check|verify)(?:\s+(?:if|whether))?" + _OBJECT
+        + r"(?:\s+is)?(?:\s+(?:valid|translatable))?" + _END,
+        re.IGNORECASE
+    )),
+    (VALIDATE, re.compile(_POLITE + r"is" + _OBJECT + r"\s+valid" + _END, re.IGNORECASE)),
+    (EXPLAIN, re.compile(
+        _POLITE + r"explain" + r"(?:\s+(?:how|the)\s+(?:translation|to\s+translate))?" + _OBJECT + _TARGET + _END,
+        re.IGNORECASE
+    )),
+]
+
+def _strip_sql(text: str) -> str:
+    text = text.strip()
+    fenced = _FENCE_RE.match(text)
+    if fenced:
+        text = fenced.group(1)
+    return text.strip().strip("`").strip()
+
+class IntentRouter:
+    """
+    Recognize requests that map directly onto one translator tool.
+
+    Plain SQL and short "translate/validate/explain <SQL>" requests are
+    matched with fixed patterns; anything else, including requests with extra
+    instructions around the SQL, is left to the ReAct agent. Counts of how
+    many requests took each path are kept for monitoring.
+    """
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._parser = SQLParser()
+
+    def classify(self, request: str) -> Tuple[str, Optional[str]]:
+        """
+        Work out how a request should be handled and count it.
+
+        Args:
+            request (str): The user's request
+
+        Returns:
+            Tuple[str, Optional[str]]: The intent and the SQL it applies to, or
+                ("agent", None) when the request needs the agent
+        """
+        intent, sql_query = self._match(request)
+        with self._lock:
+            self.counts[intent] += 1
+        return intent, sql_query
+
+    def _match(self, request: str) -> Tuple[str, Optional[str]]:
+        text = _strip_sql(request)
+        start = _SQL_START_RE.search(text)
+        if start is None:
+            return AGENT, None
+        prefix, sql_query = text[:start.start()], _strip_sql(text[start.start():])
+        if "\n\n" in sql_query or sql_query.count(";") > (1 if sql_query.endswith(";") else 0):
+            # Several statements or trailing instructions
+            return AGENT, None
+        prefix = " ".join(prefix.split())
+        if not prefix:
+            intent = TRANSLATE
+        else:
+            intent = next((intent for intent, pattern in _PREFIXES if pattern.match(prefix)), AGENT)
+        if intent == AGENT:
+            return AGENT, None
+        try:
+            # The SQL must parse cleanly, so prose that merely starts with a
+            # keyword ("delete my account") or trailing instructions ("... and
+            # then optimize it") are not mistaken for a query
+            self._parser.fast_parser.parse(sql_query)
+        except SQLSyntaxError:
+            return AGENT, None
+        return intent, sql_query
+
+    def stats(self) -> Dict[str, Any]:
+        """Return how many requests took each path."""
+        with self._lock:
+            stats = {intent: self.counts[intent] for intent in (TRANSLATE, VALIDATE, EXPLAIN, AGENT)}
+        total = sum(stats.values())
+        stats["total"] = total
+        stats["fast_path_rate"] = (total - stats[AGENT]) / total if total else 0.0
+        return stats
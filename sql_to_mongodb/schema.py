@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from functools import partial
+from typing import Dict, List, Any, Optional, Tuple
+from .prepared import Placeholder
+
+# Accepted spellings of each BSON type
+_TYPE_ALIASES = {
+    "int": "int", "integer": "int", "long": "long", "bigint": "long",
+    "double": "double", "float": "double", "number": "double", "real": "double",
+    "decimal": "decimal", "numeric": "decimal",
+    "string": "string", "str": "string", "text": "string", "varchar": "string",
+    "bool": "bool", "boolean": "bool",
+    "date": "date", "datetime": "date", "timestamp": "date",
+    "objectid": "objectId",
+}
+
+_TRUE = frozenset(["true", "t", "1", "yes", "y"])
+_FALSE = frozenset(["false", "f", "0", "no", "n"])
+
+def _bson_type(name: Any) -> str:
+    if isinstance(name, list):
+        # A JSON Schema bsonType list such as ["int", "null"]
+        name = next((item for item in name if item != "null"), "null")
+    bson_type = _TYPE_ALIASES.get(str(name).lower())
+    if bson_type is None:
+        raise ValueError(f"Unknown field type {name!r}")
+    return bson_type
+
+def _json_schema_fields(schema: Dict[str, Any], prefix: str, fields: Dict[str, str]) -> None:
+    """Collect the bsonType of every property of a $jsonSchema, nested ones as dotted paths."""
+    for name, spec in schema.get("properties", {}).items():
+        path = prefix + name
+        if "properties" in spec:
+            _json_schema_fields(spec, path + ".", fields)
+        elif "bsonType" in spec and spec["bsonType"] != "object":
+            fields[path] = _bson_type(spec["bsonType"])
+
+class SchemaRegistry:
+    """
+    Field types of each collection, used to give SQL literals the BSON type
+    the stored documents use.
+
+    Comparing a string with an int field never matches in MongoDB and cannot
+    use the field's index, so `age > '18'` must become `{"$gt": 18}` when
+    age holds ints, and date columns must be compared with datetimes.
+    """
+
+    def __init__(self, collections: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Args:
+            collections: Maps each collection name to {field: type name}, or
+                to a MongoDB $jsonSchema validator
+        """
+        self._collections: Dict[str, Dict[str, str]] = {}
+        self._unique: Dict[str, List[Tuple[str, ...]]] = {}
+        for name, fields in (collections or {}).items():
+            self.add_collection(name, fields)
+
+    def add_collection(self, name: str, fields: Dict[str, Any]) -> None:
+        """
+        Register the field types of a collection.
+
+        A "$unique" entry lists the collection's unique keys, each a field name
+        or a list of fields for a compound key, e.g. ["email", ["tenant", "slug"]].
+        """
+        unique = fields.get("$unique", [])
+        self._unique[name] = [(key,) if isinstance(key, str) else tuple(key) for key in unique]
+        fields = {key: value for key, value in fields.items() if key != "$unique"}
+        if "$jsonSchema" in fields:
+            fields = fields["$jsonSchema"]
+        if "properties" in fields:
+            types: Dict[str, str] = {}
+            _json_schema_fields(fields, "", types)
+        else:
+            types = {field: _bson_type(type_name) for field, type_name in fields.items()}
+        self._collections[name] = types
+
+    def field_type(self, collection: str, field: str) -> Optional[str]:
+        """Return the BSON type of a field, or None if it is not known."""
+        fields = self._collections.get(collection)
+        return fields.get(field) if fields else None
+
+    def unique_keys(self, collection: str) -> List[Tuple[str, ...]]:
+        """Return the unique keys of a collection, _id first."""
+        return [("_id",)] + self._unique.get(collection, [])
+
+    def coerce(self, collection: str, field: str, value: Any) -> Any:
+        """
+        Convert a literal to the BSON type of a field.
+
+        Values of unknown fields and NULLs are returned as is; placeholders
+        convert the value bound to them.
+
+        Raises:
+            ValueError: If the value cannot represent the field's type
+        """
+        fields = self._collections.get(collection)
+        if not fields:
+            return value
+        bson_type = fields.get(field)
+        if bson_type is None:
+            return value
+        if isinstance(value, list):
+            return [coerce_value(item, bson_type, f"{collection}.{field}") for item in value]
+        return coerce_value(value, bson_type, f"{collection}.{field}")
+
+    @property
+    def version(self) -> str:
+        """Digest of the registered types, for keying caches shared across schemas."""
+        data = json.dumps([self._collections, self._unique], sort_keys=True).encode()
+        return hashlib.sha1(data).hexdigest()[:12]
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        collections: Dict[str, Dict[str, Any]] = {}
+        for name, fields in self._collections.items():
+            collections[name] = dict(fields)
+            if self._unique.get(name):
+                collections[name]["$unique"] = [key[0] if len(key) == 1 else list(key)
+                                                for key in self._unique[name]]
+        return collections
+
+def parse_datetime(text: str) -> datetime:
+    """
+    Parse an ISO 8601 date or timestamp; dates become midnight.
+
+    BSON dates are UTC, so timestamps with an offset are converted to naive
+    UTC datetimes, which keeps them comparable with the rest.
+    """
+    text = text.strip()
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    value = datetime.fromisoformat(text)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def coerce_value(value: Any, bson_type: str, name: str = "value") -> Any:
+    """
+    Convert one literal to a BSON type.
+
+    Args:
+        value: A typed literal (int, float, str, bool, datetime)
+        bson_type (str): The target type, as normalized by SchemaRegistry
+        name (str): Field name used in error messages
+
+    Returns:
+        Any: The converted value
+    """
+    if value is None:
+        return value
+    if isinstance(value, Placeholder):
+        # The value bound later is converted then
+        return value.typed(partial(coerce_value, bson_type=bson_type, name=name))
+    try:
+        if bson_type == "int" or bson_type == "long":
+            if isinstance(value, bool):
+                return int(value)
+            if isinstance(value, int):
+                return value
+            if isinstance(value, str):
+                try:
+                    return int(value)
+                except ValueError:
+                    # Parsing as float would round integers beyond 2**53; it only accepts '18.0'
+                    pass
+            number = float(value)
+            if not number.is_integer():
+                raise ValueError
+            return int(number)
+        if bson_type == "double":
+            if isinstance(value, bool):
+                raise ValueError
+            return float(value)
+        if bson_type == "decimal":
+            from bson.decimal128 import Decimal128
+            return Decimal128(str(value))
+        if bson_type == "string":
+            if isinstance(value, datetime):
+                return value.isoformat()
+            return value if isinstance(value, str) else str(value)
+        if bson_type == "bool":
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, (int, float)) and value in (0, 1):
+                return bool(value)
+            if isinstance(value, str) and value.lower() in _TRUE:
+                return True
+            if isinstance(value, str) and value.lower() in _FALSE:
+                return False
+            raise ValueError
+        if bson_type == "date":
+            if isinstance(value, datetime):
+                return value
+            if isinstance(value, str):
+                return parse_datetime(value)
+            raise ValueError
+        if bson_type == "objectId":
+            from bson.objectid import ObjectId
+            return ObjectId(value)
+    except (ValueError, TypeError, ArithmeticError):
+        pass
+    except Exception as e:
+        # bson raises its own InvalidId / DecimalException types
+        raise ValueError(f"Cannot use {value!r} as {bson_type} for {name}: {e}")
+    else:
+        return value
+    raise ValueError(f"Cannot use {value!r} as {bson_type} for {name}")
+
+_schemas: Dict[Tuple[str, int], SchemaRegistry] = {}
+_schemas_lock = threading.Lock()
+
+def load_schema(path: str) -> SchemaRegistry:
+    """
+    Load a schema registry from a JSON file, once per file version.
+
+    The file maps collection names to {field: type} objects or to $jsonSchema
+    validators. Registries are cached by path and modification time, so every
+    translator in a process shares one copy and edits are picked up.
+
+    Args:
+        path (str): Path to the JSON file
+
+    Returns:
+        SchemaRegistry: The registry
+    """
+    path = os.path.abspath(path)
+    key = (path, os.stat(path).st_mtime_ns)
+    with _schemas_lock:
+        schema = _schemas.get(key)
+        if schema is None:
+            with open(path, encoding="utf-8") as f:
+                schema = SchemaRegistry(json.load(f))
+            for cached in [cached for cached in _schemas if cached[0] == path]:
+                del _schemas[cached]
+            _schemas[key] = schema
+        return schema
@@ -1,7 +1,20 @@
-import sqlparse
-from typing import Dict, List, Any, Optional
+from __future__ import annotations
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from .instrumentation import instrumented, timed
+from .predicates import And, Like, compare, simplify, to_filter, compile_likes
+from .schema import SchemaRegistry
+
+# sqlparse is only needed for statements the fast parser rejects, so it is
+# imported on first use to keep `import sql_to_mongodb` cheap
+sqlparse = None
+
+def _import_sqlparse() -> None:
+    global sqlparse
+    if sqlparse is None:
+        import sqlparse as module
+        sqlparse = module
 
 class QueryType(Enum):
     SELECT = "SELECT"
@@ -18,9 +31,36 @@ class ParsedSQL:
     order_by: Optional[List[Dict[str, str]]]
     limit: Optional[int]
     values: Optional[List[Any]]
+    group_by: Optional[List[str]] = None
+    having: Optional[Dict[str, Any]] = None
+    joins: Optional[List[Dict[str, Any]]] = None
+    aggregates: Optional[List[Dict[str, Any]]] = None
+    # Collation the filter was written for, e.g. for ILIKE
+    collation: Optional[Dict[str, Any]] = None
+    # Fields matched by LIKE patterns with a leading wildcard
+    text_search: Optional[List[str]] = None
+    offset: Optional[int] = None
+    # MongoDB update operator ($set, $inc, ...) of each UPDATE column
+    update_operators: Optional[List[str]] = None
+    # Whether the WHERE clause pins a unique key, so at most one row matches
+    single_row: bool = False
+
+# Keywords of clauses the sqlparse path cannot translate
+_UNSUPPORTED_KEYWORDS = frozenset(["DISTINCT", "HAVING", "INTERSECT", "EXCEPT", "EXISTS", "JOIN", "USING",
+                                   "RETURNING", "WITH", "OVER", "CASE", "NULLS FIRST", "NULLS LAST"])
+
+class SQLSyntaxError(ValueError):
+    """Raised when a statement falls outside the grammar of the fast parser."""
 
 class SQLParser:
-    def __init__(self):
+    def __init__(self, use_fast_parser: bool = True, schema: Optional[SchemaRegistry] = None):
+        """
+        Args:
+            use_fast_parser (bool): Try the single-pass parser before sqlparse
+            schema (Optional[SchemaRegistry]): Field types used to convert
+                literals to the BSON type of the fields they are compared with
+        """
+        self.schema = schema
         # Supported operators for SQL to MongoDB translation
         self.supported_operators = {
             '=': '$eq',
@@ -35,6 +75,12 @@ class SQLParser:
             'AND': '$and',
             'OR': '$or'
         }
+        
+        # Single-pass parser for the common subset; sqlparse handles the rest
+        self.fast_parser = None
+        if use_fast_parser:
+            from .fast_parser import FastSQLParser
+            self.fast_parser = FastSQLParser(self.supported_operators, schema)
 
     def parse(self, sql_query: str) -> ParsedSQL:
         """
@@ -46,19 +92,43 @@ class SQLParser:
         Returns:
             ParsedSQL: Structured representation of the SQL query
         """
+        if self.fast_parser is not None:
+            try:
+                return self._parse_fast(sql_query)
+            except SQLSyntaxError:
+                pass
+        
+        return self._parse_with_sqlparse(sql_query)
+
+    # Statements outside the fast parser's subset are counted as result="fallback"
+    @instrumented("parse.fast", fallback=(SQLSyntaxError,))
+    def _parse_fast(self, sql_query: str) -> ParsedSQL:
+        return self.fast_parser.parse(sql_query)
+
+    @instrumented("parse.sqlparse")
+    def _parse_with_sqlparse(self, sql_query: str) -> ParsedSQL:
+        """Parse a SQL query by walking the sqlparse token tree."""
         # Parse the SQL query using sqlparse
-        parsed = sqlparse.parse(sql_query)[0]
+        _import_sqlparse()
+        with timed("parse.sqlparse.tokenize"):
+            parsed = sqlparse.parse(sql_query)[0]
         
         # Determine query type
         query_type = self._get_query_type(parsed)
+        self._reject_unsupported(parsed, query_type)
         
         # Extract basic components
         table_name = self._extract_table_name(parsed)
         columns = self._extract_columns(parsed)
-        where_clause = self._extract_where_clause(parsed)
+        with timed("parse.sqlparse.where"):
+            where_clause = self._extract_where_clause(parsed, table_name)
         order_by = self._extract_order_by(parsed)
         limit = self._extract_limit(parsed)
-        values = self._extract_values(parsed) if query_type == QueryType.INSERT else None
+        values = self._extract_values(parsed, table_name, columns) if query_type == QueryType.INSERT else None
+        update_operators = None
+        if query_type == QueryType.UPDATE:
+            columns, values = self._extract_assignments(parsed, table_name)
+            update_operators = ["$set"] * len(columns)
         
         return ParsedSQL(
             query_type=query_type,
@@ -67,9 +137,72 @@ class SQLParser:
             where_clause=where_clause,
             order_by=order_by,
             limit=limit,
-            values=values
+            values=values,
+            offset=self._extract_offset(parsed),
+            update_operators=update_operators
         )
 
+    def _reject_unsupported(self, parsed: sqlparse.sql.Statement, query_type: QueryType) -> None:
+        """
+        Raise for constructs this path would otherwise drop from the query.
+
+        The sqlparse path only reads tables, columns, WHERE, ORDER BY,
+        LIMIT/OFFSET, VALUES and SET, so a statement using anything else
+        must fail rather than translate into a query that matches or
+        changes more than the SQL does.
+
+        Raises:
+            SQLSyntaxError: If the statement uses grouping, aggregates,
+                DISTINCT, set operations, joins, subqueries or function calls
+        """
+        # Any SELECT besides the statement's own is a subquery
+        selects = 1 if query_type == QueryType.SELECT else 0
+        for token in parsed.flatten():
+            if token.ttype in sqlparse.tokens.DML and token.normalized == "SELECT":
+                selects -= 1
+                if selects < 0:
+                    raise SQLSyntaxError("Subqueries are not supported")
+            elif token.is_keyword and (token.normalized in _UNSUPPORTED_KEYWORDS or token.normalized.endswith(" JOIN")
+                                       or token.normalized.startswith(("GROUP", "UNION"))):
+                raise SQLSyntaxError(f"Unsupported SQL: {token.normalized}")
+        if query_type != QueryType.INSERT:
+            # INSERT INTO t (columns) is grouped as a function call; anywhere else it is one
+            stack = list(parsed.get_sublists())
+            while stack:
+                group = stack.pop()
+                if isinstance(group, sqlparse.sql.Function):
+                    raise SQLSyntaxError(f"Unsupported function call: {group.value}")
+                stack.extend(group.get_sublists())
+
+    def _extract_assignments(self, parsed: sqlparse.sql.Statement, table_name: str) -> Tuple[List[str], List[Any]]:
+        """
+        Read the `column = literal` assignments of an UPDATE's SET clause.
+
+        Raises:
+            SQLSyntaxError: If there is no SET clause or an assignment is not
+                a column set to a literal
+        """
+        tokens = [token for token in parsed.tokens if not token.is_whitespace]
+        for index, token in enumerate(tokens[:-1]):
+            if token.is_keyword and token.normalized == "SET":
+                items = tokens[index + 1]
+                assignments = ([item for item in items.tokens if isinstance(item, sqlparse.sql.Comparison)
+                                or not (item.is_whitespace or item.ttype is sqlparse.tokens.Punctuation)]
+                               if isinstance(items, sqlparse.sql.IdentifierList) else [items])
+                columns, values = [], []
+                for assignment in assignments:
+                    if not isinstance(assignment, sqlparse.sql.Comparison) \
+                            or not isinstance(assignment.left, sqlparse.sql.Identifier) \
+                            or assignment.token_next(0)[1].value != "=":
+                        raise SQLSyntaxError(f"Unsupported SET assignment: {assignment.value}")
+                    column = assignment.left.get_real_name()
+                    if column in columns:
+                        raise SQLSyntaxError(f"Column {column!r} is assigned more than once")
+                    columns.append(column)
+                    values.append(self._literal(table_name, column, assignment.right.value))
+                return columns, values
+        raise SQLSyntaxError("UPDATE without a SET clause")
+
     def _get_query_type(self, parsed: sqlparse.sql.Statement) -> QueryType:
         """Extract the type of SQL query."""
         first_token = parsed.tokens[0].value.upper()
@@ -77,23 +210,74 @@ class SQLParser:
 
     def _extract_table_name(self, parsed: sqlparse.sql.Statement) -> str:
         """Extract the table name from the parsed SQL."""
-        # Implementation depends on query type
-        # This is a simplified version
+        tokens = [token for token in parsed.tokens if not token.is_whitespace]
+        for index, token in enumerate(tokens[:-1]):
+            # SELECT and DELETE name the table after FROM, not first
+            if token.is_keyword and token.normalized == "FROM":
+                if not isinstance(tokens[index + 1], sqlparse.sql.Identifier):
+                    # A comma-separated FROM list is a join this path cannot express
+                    raise SQLSyntaxError(f"Unsupported FROM clause: {tokens[index + 1].value}")
+                return tokens[index + 1].get_real_name()
+        if parsed.tokens[0].normalized in ("SELECT", "DELETE"):
+            raise SQLSyntaxError("Expected FROM <table>")
         for token in parsed.tokens:
             if isinstance(token, sqlparse.sql.Identifier):
                 return token.get_real_name()
+            # INSERT INTO table (columns) is grouped as a function call
+            if isinstance(token, sqlparse.sql.Function) and self._is_insert(parsed):
+                return token.get_real_name()
         return ""
 
     def _extract_columns(self, parsed: sqlparse.sql.Statement) -> List[str]:
         """Extract column names from the parsed SQL."""
         columns = []
+        select = parsed.tokens[0].normalized == "SELECT"
         for token in parsed.tokens:
-            if isinstance(token, sqlparse.sql.IdentifierList):
+            if token.is_keyword and token.normalized in ("FROM", "ORDER BY", "GROUP BY", "LIMIT", "OFFSET"):
+                # The identifier lists of later clauses are not columns
+                if select or token.normalized != "FROM":
+                    break
+            if select:
+                if not (token.is_whitespace or token.ttype is sqlparse.tokens.DML):
+                    items = token.get_identifiers() if isinstance(token, sqlparse.sql.IdentifierList) else [token]
+                    columns.extend(self._select_column(item) for item in items)
+            elif isinstance(token, sqlparse.sql.IdentifierList):
                 for identifier in token.get_identifiers():
                     columns.append(identifier.get_real_name())
+            elif isinstance(token, sqlparse.sql.Function) and self._is_insert(parsed):
+                for parenthesis in token.get_sublists():
+                    if isinstance(parenthesis, sqlparse.sql.Parenthesis):
+                        columns.extend(self._parenthesis_items(parenthesis, names=True))
         return columns
 
-    def _extract_where_clause(self, parsed: sqlparse.sql.Statement) -> Optional[Dict[str, Any]]:
+    def _select_column(self, token: sqlparse.sql.Token) -> str:
+        """
+        Read one select list item, which must be `*` or a plain column; as on
+        the fast path, a column alias is not applied.
+
+        Raises:
+            SQLSyntaxError: For expressions and literals, which this path
+                would project as missing fields
+        """
+        if token.ttype is sqlparse.tokens.Wildcard:
+            return "*"
+        if isinstance(token, sqlparse.sql.Identifier):
+            parts = [part for part in token.tokens if not part.is_whitespace]
+            if token.get_alias() is not None:
+                # `column AS alias` or `column alias`
+                parts = parts[:-2] if len(parts) > 2 and parts[-2].normalized == "AS" else parts[:-1]
+            if parts and parts[-1].ttype is sqlparse.tokens.Wildcard:
+                return "*"
+            if parts and all(part.ttype in sqlparse.tokens.Name or part.ttype in sqlparse.tokens.Literal.String.Symbol
+                   or part.ttype is sqlparse.tokens.Punctuation and part.value == "." for part in parts):
+                return token.get_real_name()
+        raise SQLSyntaxError(f"Unsupported select item: {token.value}")
+
+    def _is_insert(self, parsed: sqlparse.sql.Statement) -> bool:
+        return parsed.tokens[0].value.upper() == "INSERT"
+
+    def _extract_where_clause(self, parsed: sqlparse.sql.Statement,
+                              table_name: str) -> Optional[Dict[str, Any]]:
         """Extract and parse the WHERE clause."""
         where_token = None
         for token in parsed.tokens:
@@ -105,37 +289,142 @@ class SQLParser:
             return None
             
         # Convert WHERE clause to MongoDB format
-        return self._parse_where_clause(where_token)
-
-    def _parse_where_clause(self, where_token: sqlparse.sql.Where) -> Dict[str, Any]:
-        """Parse WHERE clause into MongoDB format."""
-        # This is a simplified version - would need more complex parsing
-        # for nested conditions, operators, etc.
-        conditions = {}
-        for token in where_token.tokens:
-            if isinstance(token, sqlparse.sql.Comparison):
-                field = token.left.get_real_name()
-                operator = token.token_next(0)[1].value
-                value = token.right.value
-                
-                if operator in self.supported_operators:
-                    conditions[field] = {
-                        self.supported_operators[operator]: value
-                    }
-        
-        return conditions
+        return self._parse_where_clause(where_token, table_name)
+
+    def _parse_where_clause(self, where_token: sqlparse.sql.Where, table_name: str) -> Dict[str, Any]:
+        """Parse WHERE clause into a simplified MongoDB filter."""
+        # The condition grammar is shared with the fast parser; statements
+        # only land here because of something outside the WHERE clause
+        condition = "".join(token.value for token in where_token.tokens[1:])
+        try:
+            predicate = self._predicate_parser().parse_predicate(condition, table_name)
+        except SQLSyntaxError as e:
+            predicate = self._and_of_comparisons(where_token, table_name, e)
+        # Only the fast parser carries a collation through to the query
+        return to_filter(simplify(compile_likes(predicate, False)[0]))
+
+    def _and_of_comparisons(self, where_token: sqlparse.sql.Where, table_name: str,
+                            error: SQLSyntaxError) -> And:
+        """
+        Read a WHERE clause that is a plain AND of `column <op> literal` comparisons.
+
+        Every token must be consumed: a condition that cannot be translated
+        in full, such as OR, EXISTS, a subquery or a function call, raises
+        rather than being dropped, which would widen the filter.
+
+        Raises:
+            SQLSyntaxError: If any part of the clause is not such a comparison
+        """
+        comparisons = []
+        for token in where_token.tokens[1:]:
+            if token.is_whitespace or token.value == ";" or token.is_keyword and token.normalized == "AND":
+                continue
+            if not isinstance(token, sqlparse.sql.Comparison) or not isinstance(token.left, sqlparse.sql.Identifier) \
+                    or any(isinstance(part, sqlparse.sql.Function) for part in token.left.tokens):
+                raise SQLSyntaxError(f"Unsupported WHERE condition {token.value.strip()!r}: {error}")
+            field = token.left.get_real_name()
+            operator = token.token_next(0)[1].value
+            if operator.upper() in ("LIKE", "ILIKE"):
+                pattern = self._literal(table_name, None, token.right.value)
+                if not isinstance(pattern, str):
+                    raise SQLSyntaxError(f"LIKE pattern must be a string: {token.value.strip()!r}")
+                comparisons.append(Like(field, pattern, case_insensitive=operator.upper() == "ILIKE"))
+            elif operator in self.supported_operators:
+                value = self._literal(table_name, field, token.right.value)
+                comparisons.append(compare(field, self.supported_operators[operator], value))
+            else:
+                raise SQLSyntaxError(f"Unsupported WHERE operator {operator!r}")
+        if not comparisons:
+            raise SQLSyntaxError(f"Unsupported WHERE clause: {error}")
+        return And(comparisons)
+
+    def _predicate_parser(self):
+        if self.fast_parser is not None:
+            return self.fast_parser
+        from .fast_parser import FastSQLParser
+        return FastSQLParser(self.supported_operators, self.schema)
+
+    def _literal(self, table_name: str, field: str, text: str) -> Any:
+        """Type a literal given as source text, using the schema when there is one."""
+        from .fast_parser import literal_value
+        value = literal_value(text)
+        if self.schema is not None and field:
+            value = self.schema.coerce(table_name, field, value)
+        return value
 
     def _extract_order_by(self, parsed: sqlparse.sql.Statement) -> Optional[List[Dict[str, str]]]:
         """Extract ORDER BY clause."""
-        # Implementation for ORDER BY parsing
+        tokens = [token for token in parsed.tokens if not token.is_whitespace]
+        for index, token in enumerate(tokens[:-1]):
+            if token.is_keyword and token.normalized == "ORDER BY":
+                items = tokens[index + 1]
+                identifiers = (items.get_identifiers() if isinstance(items, sqlparse.sql.IdentifierList)
+                               else [items])
+                return [
+                    {
+                        "field": identifier.get_real_name() if isinstance(identifier, sqlparse.sql.Identifier)
+                        else identifier.value,
+                        "direction": (identifier.get_ordering() if isinstance(identifier, sqlparse.sql.Identifier)
+                                      else None) or "ASC"
+                    }
+                    for identifier in identifiers
+                ]
         return None
 
+    def _limit_clause(self, parsed: sqlparse.sql.Statement) -> Tuple[Optional[int], Optional[int]]:
+        """Read LIMIT n [OFFSET m], LIMIT m, n and OFFSET m as (limit, offset)."""
+        limit = offset = None
+        tokens = [token for token in parsed.tokens if not token.is_whitespace]
+        for index, token in enumerate(tokens[:-1]):
+            if not token.is_keyword or token.normalized not in ("LIMIT", "OFFSET"):
+                continue
+            value = tokens[index + 1]
+            if isinstance(value, sqlparse.sql.IdentifierList):
+                # MySQL's LIMIT offset, count
+                numbers = [int(item.value) for item in value.get_identifiers()]
+                if token.normalized != "LIMIT" or len(numbers) != 2:
+                    raise ValueError(f"Invalid {token.normalized} clause: {value.value}")
+                offset, limit = numbers
+            elif value.ttype in sqlparse.tokens.Number.Integer:
+                if token.normalized == "LIMIT":
+                    limit = int(value.value)
+                else:
+                    offset = int(value.value)
+            else:
+                raise ValueError(f"Expected integer {token.normalized}, found {value.value!r}")
+        return limit, offset
+
     def _extract_limit(self, parsed: sqlparse.sql.Statement) -> Optional[int]:
         """Extract LIMIT clause."""
-        # Implementation for LIMIT parsing
+        return self._limit_clause(parsed)[0]
+
+    def _extract_offset(self, parsed: sqlparse.sql.Statement) -> Optional[int]:
+        """Extract OFFSET, or the offset of MySQL's LIMIT offset, count."""
+        return self._limit_clause(parsed)[1]
+
+    def _extract_values(self, parsed: sqlparse.sql.Statement, table_name: str,
+                        columns: List[str]) -> Optional[List[Any]]:
+        """Extract VALUES for INSERT statements as a list of rows of typed values."""
+        for token in parsed.tokens:
+            if isinstance(token, sqlparse.sql.Values):
+                return [
+                    [self._literal(table_name, column, text)
+                     for column, text in zip(columns + [""] * len(items), items)]
+                    for items in (self._parenthesis_items(row) for row in token.get_sublists()
+                                  if isinstance(row, sqlparse.sql.Parenthesis))
+                ]
         return None
 
-    def _extract_values(self, parsed: sqlparse.sql.Statement) -> Optional[List[Any]]:
-        """Extract VALUES for INSERT statements."""
-        # Implementation for VALUES parsing
-        return None 
\ No newline at end of file
+    def _parenthesis_items(self, parenthesis: sqlparse.sql.Parenthesis, names: bool = False) -> List[Any]:
+        """Return the comma separated items inside a parenthesis."""
+        items = []
+        for token in parenthesis.tokens[1:-1]:
+            if isinstance(token, sqlparse.sql.IdentifierList):
+                items.extend(
+                    item.get_real_name() if names else item.value
+                    for item in token.tokens
+                    if not item.is_whitespace and item.ttype is not sqlparse.tokens.Punctuation
+                )
+            elif not token.is_whitespace and token.ttype is not sqlparse.tokens.Punctuation:
+                items.append(token.get_real_name() if names else token.value)
+        return items 
\ No newline at end of file
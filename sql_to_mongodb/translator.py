@@ -1,38 +1,200 @@
-from typing import Dict, List, Union, Any
+from collections import deque
+from itertools import islice
+from typing import Dict, List, Union, Any, Optional, Iterable, Iterator
 from .sql_parser import SQLParser
 from .mongodb_builder import MongoDBQueryBuilder
+from .cache import LRUCache, SQLiteCache
+from .prepared import PreparedQuery
+from .pagination import keyset_query
+from .schema import SchemaRegistry, load_schema
+from .instrumentation import instrumented, statement_kind
+
+# Translator owned by each process pool worker
+_worker_translator = None
+
+def _init_worker(cache_path: Optional[str], schema: Optional[SchemaRegistry]) -> None:
+    """Create the translator used by a process pool worker."""
+    global _worker_translator
+    cache = SQLiteCache(cache_path) if cache_path else None
+    _worker_translator = SQLToMongoDBTranslator(cache=cache, schema=schema)
+
+def _translate_chunk(sql_queries: List[str], return_errors: bool) -> List[Dict[str, Any]]:
+    """Translate a chunk of queries inside a process pool worker."""
+    return [_worker_translator._translate_item(query, return_errors) for query in sql_queries]
 
 class SQLToMongoDBTranslator:
-    def __init__(self):
-        self.sql_parser = SQLParser()
+    def __init__(self, cache: Optional[Any] = None, cache_size: int = 1024,
+                 schema: Union[SchemaRegistry, str, None] = None):
+        """
+        Args:
+            cache: Translation cache (LRUCache or SQLiteCache). Defaults to an
+                in-process LRUCache holding cache_size entries.
+            cache_size (int): Size of the default cache; 0 disables caching
+            schema: SchemaRegistry, or path to a JSON schema file, giving the
+                field types literals are converted to
+        """
+        if isinstance(schema, str):
+            schema = load_schema(schema)
+        self.schema = schema
+        # Translations depend on the schema, so a cache shared between
+        # translators with different schemas must not mix their entries
+        self._cache_prefix = f"{schema.version}:" if schema is not None else ""
+        self.sql_parser = SQLParser(schema=schema)
         self.mongodb_builder = MongoDBQueryBuilder()
+        if cache is None and cache_size > 0:
+            cache = LRUCache(max_entries=cache_size)
+        self.cache = cache
 
+    @instrumented("translate", labels=lambda self, sql_query: {"query_type": statement_kind(sql_query)})
     def translate(self, sql_query: str) -> Dict[str, Any]:
         """
         Translate a SQL query to MongoDB query format.
-        
+
         Args:
             sql_query (str): The SQL query to translate
-            
+
         Returns:
             Dict[str, Any]: The equivalent MongoDB query
         """
+        if self.cache is not None:
+            key = self._cache_prefix + sql_query if self._cache_prefix else sql_query
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+
         # Parse the SQL query
         parsed_sql = self.sql_parser.parse(sql_query)
-        
+
         # Build MongoDB query
         mongodb_query = self.mongodb_builder.build(parsed_sql)
-        
+
+        if self.cache is not None:
+            self.cache.set(key, mongodb_query)
+
         return mongodb_query
 
-    def translate_batch(self, sql_queries: List[str]) -> List[Dict[str, Any]]:
+    @instrumented("cache.get", result_labels=lambda value: {"result": "miss" if value is None else "hit"})
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.cache.get(key)
+
+    def translate_page(self, sql_query: str, page_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Translate a LIMIT/OFFSET query for keyset pagination.
+
+        Args:
+            sql_query (str): A SELECT with ORDER BY, LIMIT and optionally OFFSET
+            page_token (Optional[str]): Continuation token of the previous page
+
+        Returns:
+            Dict[str, Any]: The find query seeking past the previous page; run it
+                with QueryExecutor.find_page to get the next token
+        """
+        return keyset_query(self.translate(sql_query), page_token)
+
+    def prepare(self, sql_query: str) -> PreparedQuery:
+        """
+        Parse and translate a parameterized SQL query once for repeated binding.
+
+        Args:
+            sql_query (str): SQL with positional `?` or named `:param` placeholders
+
+        Returns:
+            PreparedQuery: Template whose bind(params) returns the MongoDB query
+        """
+        if self.sql_parser.fast_parser is None:
+            raise ValueError("Prepared queries require the fast parser")
+        parsed_sql = self.sql_parser.fast_parser.parse(sql_query)
+        return PreparedQuery(sql_query, self.mongodb_builder.build(parsed_sql))
+
+    def translate_batch(self, sql_queries: List[str], workers: Optional[int] = None,
+                        chunksize: int = 256, return_errors: bool = False) -> List[Dict[str, Any]]:
         """
         Translate multiple SQL queries to MongoDB queries.
-        
+
         Args:
             sql_queries (List[str]): List of SQL queries to translate
-            
+            workers (Optional[int]): Number of worker processes; None translates in-process
+            chunksize (int): Number of queries sent to a worker at a time
+            return_errors (bool): Return an error entry for each failing query
+                instead of raising on the first one
+
+        Returns:
+            List[Dict[str, Any]]: List of equivalent MongoDB queries, in input order
+        """
+        if not workers or workers <= 1:
+            return [self._translate_item(query, return_errors) for query in sql_queries]
+        return list(self.translate_iter(sql_queries, workers, chunksize, return_errors))
+
+    def translate_iter(self, sql_queries: Iterable[str], workers: Optional[int] = None,
+                       chunksize: int = 256, return_errors: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily translate a stream of SQL queries, yielding results in input order.
+
+        Only a bounded number of chunks is in flight at any time, so memory use
+        does not grow with the length of the input.
+
+        Args:
+            sql_queries (Iterable[str]): SQL queries to translate
+            workers (Optional[int]): Number of worker processes; None translates in-process
+            chunksize (int): Number of queries sent to a worker at a time
+            return_errors (bool): Yield an error entry for each failing query
+                instead of raising
+
+        Yields:
+            Dict[str, Any]: The equivalent MongoDB query for each input query
+        """
+        if not workers or workers <= 1:
+            for query in sql_queries:
+                yield self._translate_item(query, return_errors)
+            return
+
+        # Imported here: multiprocessing costs more to import than the rest of the package
+        from concurrent.futures import ProcessPoolExecutor
+
+        cache_path = self.cache.path if isinstance(self.cache, SQLiteCache) else None
+        queries = iter(sql_queries)
+        pending = deque()
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(cache_path, self.schema)
+        )
+        try:
+            while True:
+                while len(pending) < workers * 2:
+                    chunk = list(islice(queries, chunksize))
+                    if not chunk:
+                        break
+                    pending.append(executor.submit(_translate_chunk, chunk, return_errors))
+                if not pending:
+                    break
+                for result in pending.popleft().result():
+                    yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def _translate_item(self, sql_query: str, return_errors: bool) -> Dict[str, Any]:
+        """Translate one query, optionally converting a failure into an error entry."""
+        if not return_errors:
+            return self.translate(sql_query)
+        try:
+            return self.translate(sql_query)
+        except Exception as e:
+            return {
+                "status": "error",
+                "sql_query": sql_query,
+                "message": str(e)
+            }
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get translation cache statistics.
+
         Returns:
-            List[Dict[str, Any]]: List of equivalent MongoDB queries
+            Optional[Dict[str, Any]]: Hit/miss/eviction counters, or None if caching is disabled
         """
-        return [self.translate(query) for query in sql_queries] 
\ No newline at end of file
+        if self.cache is None:
+            return None
+        return self.cache.stats()
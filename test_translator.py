@@ -40,6 +40,758 @@ def test_batch_translation():
         print(f"❌ Batch translation test failed: {e}")
         return False
 
+def test_fast_parser_matches_sqlparse():
+    """Test the fast parser agrees with the sqlparse path on the common subset."""
+    from sql_to_mongodb.sql_parser import SQLParser
+
+    fast = SQLParser()
+    slow = SQLParser(use_fast_parser=False)
+    for sql_query in [
+        "SELECT name, age FROM users WHERE age > 18",
+        "SELECT * FROM users WHERE status = 'active' AND age >= 21",
+        "DELETE FROM users WHERE age < 18",
+    ]:
+        assert fast.parse(sql_query).where_clause == slow.parse(sql_query).where_clause
+
+    parsed = fast.parse("SELECT name FROM users ORDER BY name DESC LIMIT 5;")
+    assert parsed.table_name == "users"
+    assert parsed.columns == ["name"]
+    assert parsed.order_by == [{"field": "name", "direction": "DESC"}]
+    assert parsed.limit == 5
+
+def test_fast_parser_falls_back_to_sqlparse():
+    """Test statements outside the fast grammar go to sqlparse, which rejects what it cannot translate."""
+    from sql_to_mongodb.fast_parser import FastSQLParser
+    from sql_to_mongodb.sql_parser import SQLParser, SQLSyntaxError
+
+    parser = SQLParser()
+    slow = SQLParser(use_fast_parser=False)
+    parsed = slow.parse("SELECT a, b FROM t WHERE a = 1 OR b = 2")
+    assert parsed.table_name == "t"
+    assert parsed.where_clause == {"$or": [{"a": {"$eq": 1}}, {"b": {"$eq": 2}}]}
+    parsed = slow.parse("UPDATE t SET a = 5, b = 'x' WHERE c = 1")
+    assert (parsed.columns, parsed.values, parsed.update_operators) == (["a", "b"], [5, "x"], ["$set", "$set"])
+    assert slow.parse('SELECT t.a, "b" AS c, d e, * FROM t u').columns == ["a", "b", "d", "*"]
+
+    # Dropping any of these would return a query that matches or changes more than the SQL
+    for sql_query in ["SELECT DISTINCT a, b FROM t WHERE a = 1 OR b = 2",
+                      "SELECT COUNT(DISTINCT a) FROM t GROUP BY b",
+                      "SELECT a FROM t UNION SELECT a FROM u",
+                      "SELECT a FROM t ORDER BY a NULLS LAST",
+                      "UPDATE t SET a = 5 WHERE x = y",
+                      "SELECT a FROM t1, t2",
+                      "SELECT a + 1 FROM t",
+                      "SELECT a + 1 AS x, b FROM t"]:
+        try:
+            FastSQLParser(parser.supported_operators).parse(sql_query)
+            assert False, "expected SQLSyntaxError"
+        except SQLSyntaxError:
+            pass
+        try:
+            parser.parse(sql_query)
+            assert False, f"expected SQLSyntaxError for {sql_query}"
+        except SQLSyntaxError:
+            pass
+
+def test_translation_cache_returns_copies():
+    """Test cached translations are defensive copies and counted."""
+    translator = SQLToMongoDBTranslator(cache_size=2)
+    first = translator.translate("SELECT name FROM users WHERE age > 18")
+    first["filter"]["age"] = "corrupted"
+    second = translator.translate("SELECT name FROM users WHERE age > 18")
+    assert second["filter"] == {"age": {"$gt": 18}}
+
+    translator.translate("SELECT * FROM a")
+    translator.translate("SELECT * FROM b")
+    stats = translator.cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 2
+
+def test_sqlite_translation_cache_is_shared(tmp_path):
+    """Test two translators on the same SQLite file share entries."""
+    from sql_to_mongodb.cache import SQLiteCache
+
+    path = str(tmp_path / "cache.sqlite")
+    SQLToMongoDBTranslator(cache=SQLiteCache(path)).translate("SELECT * FROM users")
+    other = SQLToMongoDBTranslator(cache=SQLiteCache(path))
+    assert other.translate("SELECT * FROM users")["collection"] == "users"
+    assert other.cache_stats()["hits"] == 1
+
+def test_prepared_query_binding():
+    """Test prepared queries bind positional and named placeholders."""
+    translator = SQLToMongoDBTranslator()
+
+    prepared = translator.prepare("SELECT name FROM users WHERE age > ? AND status IN (?, ?)")
+    assert prepared.param_count == 3
+    bound = prepared.bind([18, "active", "pending"])
+    assert bound["filter"] == {"age": {"$gt": 18}, "status": {"$in": ["active", "pending"]}}
+    bound["filter"]["age"]["$gt"] = 99
+    assert prepared.bind([21, "a", "b"])["filter"]["age"] == {"$gt": 21}
+
+    prepared = translator.prepare("UPDATE users SET age = :age WHERE name = :name")
+    bound = prepared.bind({"age": 30, "name": "John"})
+    assert bound["update"] == {"$set": {"age": 30}}
+    assert bound["filter"] == {"name": {"$eq": "John"}}
+    try:
+        prepared.bind({"age": 30})
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+    # $n placeholders count up to the highest number, and bound values take the schema's types
+    import pytest
+    from datetime import datetime
+    from sql_to_mongodb.schema import SchemaRegistry
+    typed = SQLToMongoDBTranslator(schema=SchemaRegistry({"users": {"age": "int", "joined": "date"}}))
+    prepared = typed.prepare("SELECT * FROM users WHERE joined < $2 AND age IN ($1, 7) AND age < $1")
+    assert prepared.param_count == 2
+    assert prepared.bind(["18", "2024-01-31"])["filter"]["joined"] == {"$lt": datetime(2024, 1, 31)}
+    assert typed.prepare("UPDATE users SET age = ? WHERE age = 1").bind(["30"])["update"] == {"$set": {"age": 30}}
+    with pytest.raises(ValueError, match="as int for users.age"):
+        typed.prepare("SELECT * FROM users WHERE age > :age").bind({"age": "old"})
+    with pytest.raises(ValueError, match=r"\$2 is not used"):
+        translator.prepare("SELECT * FROM users WHERE a = $1 AND b = $3")
+
+def test_parallel_batch_keeps_order_and_reports_errors():
+    """Test process pool batches keep input order and return per-item errors."""
+    translator = SQLToMongoDBTranslator()
+    sql_queries = [f"SELECT name FROM users WHERE age > {i}" for i in range(20)]
+    sql_queries[7] = "DROP TABLE users"
+
+    results = translator.translate_batch(sql_queries, workers=2, chunksize=3, return_errors=True)
+    assert len(results) == 20
+    assert results[7]["status"] == "error"
+    assert results[7]["sql_query"] == "DROP TABLE users"
+    assert results[8]["filter"] == {"age": {"$gt": 8}}
+
+    streamed = translator.translate_iter(iter(sql_queries), return_errors=True)
+    assert list(streamed) == results
+
+def test_dump_splitter_handles_chunk_boundaries():
+    """Test statements split identically however the dump is chunked."""
+    from sql_to_mongodb.dump_reader import StatementSplitter
+
+    dump = (
+        "-- MySQL dump\n/*!40101 SET NAMES utf8 */;\n"
+        "INSERT INTO users (id, name) VALUES (1, 'it\\'s; fine'), (2, 'a -- b');\n"
+        "# comment; here\nDELETE FROM users WHERE id = 2 /* done; */;\n"
+    )
+    expected = [
+        "INSERT INTO users (id, name) VALUES (1, 'it\\'s; fine'), (2, 'a -- b')",
+        "DELETE FROM users WHERE id = 2",
+    ]
+    for size in (1, 2, 5, len(dump)):
+        splitter = StatementSplitter()
+        statements = []
+        for start in range(0, len(dump), size):
+            statements += splitter.feed(dump[start:start + size])
+        statements += splitter.feed("", final=True)
+        assert statements == expected
+
+def test_dump_cli_writes_ndjson(tmp_path):
+    """Test the dump CLI translates DML and skips everything else."""
+    import json
+    from sql_to_mongodb.cli import main
+
+    dump = tmp_path / "dump.sql"
+    dump.write_text("CREATE TABLE users (id int);\nDELETE FROM users WHERE id = 2;\n")
+    output = tmp_path / "out.ndjson"
+    assert main([str(dump), "-o", str(output), "--quiet"]) == 0
+    lines = output.read_text().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["operation"] == "delete"
+
+def test_multi_row_insert_and_coalescing():
+    """Test multi-row INSERT parsing and batching of consecutive inserts."""
+    from sql_to_mongodb.batching import coalesce_inserts
+    from sql_to_mongodb.sql_parser import SQLParser
+
+    sql_query = "INSERT INTO users (name, age) VALUES ('John', 25), ('Jane', 31)"
+    for parser in (SQLParser(), SQLParser(use_fast_parser=False)):
+        parsed = parser.parse(sql_query)
+        assert parsed.table_name == "users"
+        assert parsed.columns == ["name", "age"]
+        assert len(parsed.values) == 2
+
+    translator = SQLToMongoDBTranslator()
+    sql_queries = [f"INSERT INTO users (id) VALUES ({i})" for i in range(5)]
+    sql_queries.append("DELETE FROM users WHERE id = 1")
+    sql_queries.append("INSERT INTO orders (id) VALUES (1), (2)")
+    batches = list(coalesce_inserts(translator.translate_iter(sql_queries), max_batch_size=3))
+    assert [(b["collection"], b["operation"], len(b.get("documents", []))) for b in batches] == [
+        ("users", "insert", 3),
+        ("users", "insert", 2),
+        ("users", "delete", 0),
+        ("orders", "insert", 2),
+    ]
+
+class _FakeBulkResult:
+    def __init__(self, requests):
+        names = [type(request).__name__ for request in requests]
+        self.inserted_count = names.count("InsertOne")
+        self.matched_count = self.modified_count = names.count("UpdateMany") + names.count("UpdateOne")
+        self.deleted_count = names.count("DeleteMany")
+        self.upserted_count = 0
+
+class _FakeCollection:
+    def __init__(self, documents):
+        self.documents = documents
+        self.find_calls = []
+        self.bulk_calls = []
+
+    def find(self, **kwargs):
+        self.find_calls.append(kwargs)
+        return iter(self.documents)
+
+    def bulk_write(self, requests, ordered=True):
+        self.bulk_calls.append((requests, ordered))
+        return _FakeBulkResult(requests)
+
+class _FakeDatabase:
+    def __init__(self, client):
+        self.client = client
+
+    def __getitem__(self, name):
+        return self.client.collection(name)
+
+class _FakeClient:
+    """Minimal in-process stand-in for MongoClient: client[db][collection]."""
+
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, database):
+        return _FakeDatabase(self)
+
+    def collection(self, name):
+        return self.collections.setdefault(name, _FakeCollection([{"name": "John"}]))
+
+def test_executor_bulk_writes_and_streaming_find():
+    """Test the executor groups writes into unordered bulk writes and streams finds."""
+    from sql_to_mongodb.executor import QueryExecutor
+
+    translator = SQLToMongoDBTranslator()
+    client = _FakeClient()
+    executor = QueryExecutor("app", client=client, batch_size=2)
+
+    summary = executor.execute_many(translator.translate_batch([
+        "INSERT INTO users (name) VALUES ('a'), ('b'), ('c')",
+        "UPDATE users SET age = 1 WHERE name = 'a'",
+        "DELETE FROM orders WHERE id = 1",
+    ]))
+    users = client.collection("users")
+    assert [len(requests) for requests, _ in users.bulk_calls] == [2, 1, 1]
+    assert all(not ordered for _, ordered in users.bulk_calls)
+    assert summary["bulk_writes"] == 4
+    assert summary["inserted"] == 3
+    assert summary["deleted"] == 1
+
+    # A batch never mixes kinds of writes, so unordered bulk writes keep statement order
+    client = _FakeClient()
+    QueryExecutor("app", client=client).execute_many(translator.translate_batch([
+        "DELETE FROM users WHERE name = 'a'",
+        "INSERT INTO users (name) VALUES ('a')",
+        "INSERT INTO users (name) VALUES ('b')",
+        "UPDATE users SET age = 1 WHERE name = 'a'",
+        "UPDATE users SET age = age + 1 WHERE age = 1",
+        "DELETE FROM users WHERE age = 2",
+    ]))
+    calls = client.collection("users").bulk_calls
+    assert [[type(request).__name__ for request in requests] for requests, _ in calls] == [
+        ["DeleteMany"], ["InsertOne", "InsertOne"], ["UpdateMany", "UpdateMany"], ["DeleteMany"]]
+    # Separate UPDATE statements may not commute, so they are sent ordered
+    assert [ordered for _, ordered in calls] == [False, False, True, False]
+
+    documents = list(executor.execute(translator.translate("SELECT name FROM users ORDER BY name LIMIT 5")))
+    assert documents == [{"name": "John"}]
+    find_call = users.find_calls[-1]
+    assert find_call["batch_size"] == 2
+    assert find_call["sort"] == [("name", 1)]
+    assert find_call["limit"] == 5
+
+def test_async_executor_uses_bulk_writes():
+    """Test the asyncio executor against an awaitable fake collection."""
+    import asyncio
+    from sql_to_mongodb.executor import AsyncQueryExecutor
+
+    class AsyncCollection:
+        def __init__(self):
+            self.inner = _FakeCollection([])
+
+        async def bulk_write(self, requests, ordered=True):
+            return self.inner.bulk_write(requests, ordered)
+
+    collection = AsyncCollection()
+    client = {"app": {"users": collection}}
+    executor = AsyncQueryExecutor("app", client=client)
+    query = SQLToMongoDBTranslator().translate("INSERT INTO users (name) VALUES ('a'), ('b')")
+    summary = asyncio.run(executor.execute(query))
+    assert summary["inserted"] == 2
+    assert collection.inner.bulk_calls[0][1] is False
+
+def test_group_by_having_builds_optimized_pipeline():
+    """Test GROUP BY/HAVING translate to an aggregation pipeline with pushed-down matches."""
+    translator = SQLToMongoDBTranslator()
+    result = translator.translate(
+        "SELECT status, COUNT(*) AS n FROM orders WHERE year = 2024 "
+        "GROUP BY status HAVING COUNT(*) > 5 AND status != 'void' ORDER BY n DESC LIMIT 3"
+    )
+    assert result["operation"] == "aggregate"
+    stages = [next(iter(stage)) for stage in result["pipeline"]]
+    assert stages == ["$match", "$project", "$group", "$match", "$sort", "$limit", "$project"]
+    # The HAVING condition on the group key runs before grouping
+    assert result["pipeline"][0]["$match"] == {"year": {"$eq": 2024}, "status": {"$nin": ["void", None]}}
+    assert result["pipeline"][1]["$project"] == {"status": 1}
+    assert result["pipeline"][2]["$group"] == {"_id": {"status": "$status"}, "n": {"$sum": 1}}
+    assert result["pipeline"][-1]["$project"] == {"_id": 0, "status": "$_id.status", "n": 1}
+
+def test_join_pushes_match_ahead_of_lookup():
+    """Test JOINs become $lookup/$unwind with base-table filters applied first."""
+    from sql_to_mongodb.pipeline import optimize_pipeline
+
+    translator = SQLToMongoDBTranslator()
+    result = translator.translate(
+        "SELECT u.name, o.total FROM users u LEFT JOIN orders o ON u.id = o.user_id "
+        "WHERE u.age > 18 AND o.total > 100"
+    )
+    pipeline = result["pipeline"]
+    assert pipeline[0] == {"$match": {"age": {"$gt": 18}}}
+    assert pipeline[1] == {"$project": {"id": 1, "name": 1}}
+    assert pipeline[2]["$lookup"] == {"from": "orders", "localField": "id", "foreignField": "user_id", "as": "o"}
+    assert pipeline[3]["$unwind"]["preserveNullAndEmptyArrays"] is True
+    assert pipeline[4] == {"$match": {"o.total": {"$gt": 100}}}
+    assert optimize_pipeline(pipeline) == pipeline
+
+def test_index_advisor_orders_keys_and_folds_prefixes():
+    """Test index keys follow equality-sort-range and prefix indexes are folded."""
+    from sql_to_mongodb.index_advisor import recommend_indexes
+
+    recommendations = recommend_indexes([
+        ("SELECT name FROM users WHERE age > 18 AND status = 'active' ORDER BY name", 10),
+        ("SELECT name FROM users WHERE status = 'active'", 5),
+        "SELECT u.name FROM users u JOIN orders o ON u.id = o.user_id",
+        "DROP TABLE users",
+    ])
+    users = recommendations[0]
+    assert users["collection"] == "users"
+    assert list(users["keys"].items()) == [("status", 1), ("name", 1), ("age", 1)]
+    assert users["weight"] == 15
+    assert len(users["queries"]) == 2
+    assert users["command"] == 'db.getCollection("users").createIndex({"status": 1, "name": 1, "age": 1})'
+    orders = recommendations[1]
+    assert (orders["collection"], orders["keys"]) == ("orders", {"user_id": 1})
+
+    # Case-insensitive lookups need an index with their collation, which a binary index does not cover
+    recommendations = recommend_indexes([
+        "SELECT * FROM users WHERE name ILIKE 'bob'",
+        ("SELECT * FROM users WHERE name = 'bob' AND city = 'Oslo'", 2),
+    ])
+    assert [(index["keys"], index["collation"]) for index in recommendations] == [
+        ({"city": 1, "name": 1}, None), ({"name": 1}, {"locale": "en", "strength": 2})]
+    assert recommendations[1]["command"] == \
+        'db.getCollection("users").createIndex({"name": 1}, {"collation": {"locale": "en", "strength": 2}})'
+
+    # LIKE '%' only checks the type, which scans the field's bounds like a range
+    recommendations = recommend_indexes(["SELECT * FROM users WHERE status = 'a' AND name LIKE '%' ORDER BY age"])
+    assert list(recommendations[0]["keys"]) == ["status", "age", "name"]
+
+def test_explanation_cache_coalesces_and_expires(tmp_path):
+    """Test same-shape queries share one LLM call and entries expire after the TTL."""
+    import threading
+    import time
+    from sql_to_mongodb.explanations import ExplanationCache
+    from sql_to_mongodb.fingerprint import fingerprint
+
+    assert fingerprint("select * from users where age > 18 and id in (1, 2)") == \
+        fingerprint("SELECT *  FROM users WHERE age > -3 AND id IN (7)")
+
+    translator = SQLToMongoDBTranslator()
+    cache = ExplanationCache(str(tmp_path / "explain.sqlite"), ttl=0.2)
+    first = "SELECT name FROM users WHERE age > 18"
+    key = cache.key(first, translator.translate(first))
+    other = "SELECT name FROM users WHERE age > 30"
+    assert cache.key(other, translator.translate(other)) == key
+
+    release = threading.Event()
+    calls = []
+
+    def explain():
+        calls.append(1)
+        release.wait(5)
+        return "explained"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute(key, explain)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while cache.coalesced < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["explained"] * 4
+    assert len(calls) == 1
+
+    assert cache.get_or_compute(key, explain) == "explained"
+    assert cache.stats()["hits"] == 1
+    time.sleep(0.25)
+    cache.get_or_compute(key, explain)
+    assert len(calls) == 2
+    assert cache.stats()["expirations"] == 1
+
+    # The in-memory backend honours the TTL too
+    memory = ExplanationCache(ttl=0.2)
+    assert memory.get_or_compute(key, explain) == "explained"
+    time.sleep(0.25)
+    memory.get_or_compute(key, explain)
+    assert len(calls) == 4
+    assert memory.stats()["expirations"] == 1
+
+    # Async lookups keep SQLite file I/O off the event loop
+    loop_threads = []
+    lookup = cache.cache.get
+    cache.cache.get = lambda key: loop_threads.append(threading.get_ident()) or lookup(key)
+
+    async def explain_async():
+        loop_threads.append(threading.get_ident())
+        return await cache.aget_or_compute(key, lambda: asyncio.sleep(0, "explained"))
+
+    import asyncio
+    assert asyncio.run(explain_async()) == "explained"
+    assert loop_threads[1] != loop_threads[0]
+
+def test_core_import_does_not_load_optional_stacks():
+    """Test importing the package leaves langchain, sqlparse and multiprocessing unloaded."""
+    import subprocess
+    import sys
+
+    probe = ("import sys, sql_to_mongodb; "
+             "print(sorted({m.split('.')[0] for m in sys.modules} & "
+             "{'langchain', 'sqlparse', 'multiprocessing'}))")
+    output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "[]"
+    # sqlparse still loads on demand for statements the fast parser rejects
+    assert SQLToMongoDBTranslator().translate("SELECT * FROM users WHERE a = 1 OR b = 2")["collection"] == "users"
+
+def test_intent_router_takes_fast_path_for_simple_requests():
+    """Test plain SQL and simple requests bypass the agent and are counted."""
+    from sql_to_mongodb.router import IntentRouter
+
+    router = IntentRouter()
+    assert router.classify("SELECT * FROM users;") == ("translate", "SELECT * FROM users;")
+    assert router.classify("```sql\nSELECT a FROM t\n```") == ("translate", "SELECT a FROM t")
+    assert router.classify("Translate this SQL to MongoDB: SELECT * FROM t") == ("translate", "SELECT * FROM t")
+    assert router.classify("Is this query valid? DELETE FROM t WHERE a = 1") == ("validate", "DELETE FROM t WHERE a = 1")
+    assert router.classify("explain SELECT * FROM t") == ("explain", "SELECT * FROM t")
+    assert router.classify("delete my account")[0] == "agent"
+    assert router.classify("translate SELECT * FROM t and then optimize it")[0] == "agent"
+    assert router.classify("Why is SELECT * FROM t slow?")[0] == "agent"
+    stats = router.stats()
+    assert (stats["translate"], stats["validate"], stats["explain"], stats["agent"]) == (3, 1, 1, 3)
+    assert stats["fast_path_rate"] == 5 / 8
+
+def test_stream_endpoint_translates_ndjson_with_per_line_errors():
+    """Test /translate/stream returns one NDJSON result per input line, errors included."""
+    import json
+    import pytest
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+    from sql_to_mongodb.dump_reader import LineSplitter
+    import web.main
+
+    splitter = LineSplitter()
+    assert splitter.feed('"SELECT * FROM a"\n\n"SEL') == ['"SELECT * FROM a"']
+    assert splitter.feed('ECT * FROM b"', final=True) == ['"SELECT * FROM b"']
+
+    client = TestClient(web.main.app)
+    body = '"SELECT * FROM users"\n{"sql_query": "DELETE FROM t WHERE a = 1"}\nnot json\n'
+    response = client.post("/translate/stream", content=body,
+                           headers={"content-type": "application/x-ndjson"})
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert results[0]["mongodb_query"]["collection"] == "users"
+    assert results[1]["mongodb_query"]["operation"] == "delete"
+    assert results[2]["status"] == "error"
+
+    response = client.post("/translate/stream", content="SELECT * FROM a; UPDATE b SET x = 'a;b' WHERE y = 2",
+                           headers={"content-type": "text/plain"})
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result["mongodb_query"]["operation"] for result in results] == ["find", "update"]
+
+def test_benchmark_corpus_is_deterministic_and_regressions_are_flagged():
+    """Test the corpus generator is reproducible and the suite flags regressions."""
+    from benchmarks.corpus import CorpusSpec, generate_corpus
+    from benchmarks.bench_suite import compare
+
+    spec = CorpusSpec(predicates=2, in_list=3, values_rows=4, mix="insert:1")
+    corpus = generate_corpus(20, spec, seed=7)
+    assert corpus == generate_corpus(20, spec, seed=7)
+    assert corpus != generate_corpus(20, spec, seed=8)
+    assert all(sql.count("(") == 5 for sql in corpus)
+    translator = SQLToMongoDBTranslator()
+    assert all(len(translator.translate(sql)["documents"]) == 4 for sql in corpus)
+
+    baseline = {"results": {"parse/simple": {"ops_per_sec": 1000.0, "peak_bytes": 1000}}}
+    assert compare({"parse/simple": {"ops_per_sec": 900.0, "peak_bytes": 1100}}, baseline, 0.25, 0.25) == []
+    regressions = compare({"parse/simple": {"ops_per_sec": 700.0, "peak_bytes": 1300}}, baseline, 0.25, 0.25)
+    assert len(regressions) == 2
+
+def test_stage_hooks_feed_prometheus_metrics():
+    """Test instrumented stages reach the hooks only while one is registered."""
+    from sql_to_mongodb import instrumentation
+    from sql_to_mongodb.instrumentation import PrometheusMetrics, add_hook, remove_hook
+    from sql_to_mongodb.sql_parser import SQLParser
+
+    # Hooks registered elsewhere (e.g. by the web app) are set aside
+    existing = list(instrumentation._hooks)
+    for hook in existing:
+        remove_hook(hook)
+    plain_parse = SQLParser.__dict__["_parse_fast"]
+    metrics = PrometheusMetrics()
+    add_hook(metrics)
+    try:
+        assert SQLParser.__dict__["_parse_fast"] is not plain_parse
+        translator = SQLToMongoDBTranslator()
+        translator.translate("SELECT * FROM users WHERE age > 18")
+        translator.translate("SELECT * FROM users WHERE age > 18")
+        translator.translate("DELETE FROM users WHERE id = 1")
+        # Outside the fast grammar, so sqlparse takes over
+        translator.translate("SELECT * FROM users WHERE id = 1;;")
+    finally:
+        remove_hook(metrics)
+        assert SQLParser.__dict__["_parse_fast"] is plain_parse
+        for hook in existing:
+            add_hook(hook)
+
+    text = metrics.render()
+    count = "sql_to_mongodb_stage_duration_seconds_count"
+    assert f'{count}{{stage="translate",query_type="SELECT"}} 3' in text
+    assert f'{count}{{stage="translate",query_type="DELETE"}} 1' in text
+    assert f'{count}{{stage="cache.get",result="hit"}} 1' in text
+    assert f'{count}{{stage="cache.get",result="miss"}} 3' in text
+    assert f'{count}{{stage="build",query_type="DELETE"}} 1' in text
+    assert f'{count}{{stage="parse.fast",result="ok"}} 2' in text
+    assert f'{count}{{stage="parse.fast",result="fallback"}} 1' in text
+    assert f'{count}{{stage="parse.sqlparse"}} 1' in text
+    assert 'le="+Inf"' in text
+    assert "sql_to_mongodb_stage_errors_total{" not in text
+
+def test_where_clause_is_simplified_into_index_friendly_filters():
+    """Test WHERE trees merge ranges, fold ORs into $in and detect contradictions."""
+    from sql_to_mongodb.predicates import NEVER_MATCHES
+
+    translator = SQLToMongoDBTranslator()
+
+    def where(condition):
+        return translator.translate(f"SELECT * FROM t WHERE {condition}")["filter"]
+
+    assert where("age > 18 AND age < 65") == {"age": {"$gt": 18, "$lt": 65}}
+    assert where("age >= 18 AND (age > 21 AND age <= 65) AND age < 70 AND age != 10") == {
+        "age": {"$gt": 21, "$lte": 65}
+    }
+    assert where("s = 'a' OR s = 'b' OR s IN ('c', 'a')") == {"s": {"$in": ["a", "b", "c"]}}
+    assert where("1 = 1 AND a = 1 AND a IN (1, 2)") == {"a": {"$eq": 1}}
+    assert where("a > 5 AND (a < 3 OR b = 1)") == {"a": {"$gt": 5}, "$or": [{"a": {"$lt": 3}}, {"b": {"$eq": 1}}]}
+    assert where("a > 5 AND a < 3 OR b = 1") == {"b": {"$eq": 1}}
+    # NOT (a = 1) is unknown, not true, when a is NULL
+    assert where("NOT (a = 1 OR b > 2)") == {"a": {"$nin": [1, None]}, "b": {"$lte": 2}}
+    assert where("a BETWEEN 1 AND 10 AND a IS NOT NULL") == {"a": {"$gte": 1, "$lte": 10, "$ne": None}}
+    assert where("a = 1 AND a = 2") == NEVER_MATCHES
+    assert where("a >= 'm' AND a < 'b'") == NEVER_MATCHES
+    assert where("a = 1 OR 1 = 1") == {}
+
+def test_schema_types_literals_for_index_friendly_filters(tmp_path):
+    """Test literals are typed, and coerced to the schema's BSON types when one is given."""
+    import json
+    from datetime import datetime
+    from sql_to_mongodb.schema import load_schema
+
+    plain = SQLToMongoDBTranslator()
+    assert plain.translate("SELECT * FROM users WHERE name = 'O''Brien' AND score >= -1.5 AND ok = TRUE")[
+        "filter"] == {"name": {"$eq": "O'Brien"}, "score": {"$gte": -1.5}, "ok": {"$eq": True}}
+
+    path = tmp_path / "schema.json"
+    path.write_text(json.dumps({
+        "users": {"age": "int", "created": "date", "zip": "string", "active": "bool"},
+        "orders": {"$jsonSchema": {"properties": {"total": {"bsonType": ["double", "null"]}}}}
+    }))
+    schema = load_schema(str(path))
+    assert load_schema(str(path)) is schema
+
+    translator = SQLToMongoDBTranslator(schema=str(path))
+    query = translator.translate(
+        "SELECT * FROM users WHERE age > '18' AND created >= '2024-01-31' AND zip IN (2134, '02139') AND active = 1"
+    )
+    assert query["filter"] == {
+        "age": {"$gt": 18},
+        "created": {"$gte": datetime(2024, 1, 31)},
+        "zip": {"$in": ["2134", "02139"]},
+        "active": {"$eq": True}
+    }
+    query = translator.translate("SELECT u.age FROM users u JOIN orders o ON o.user_id = u.id WHERE o.total > '9'")
+    assert {"$match": {"o.total": {"$gt": 9.0}}} in query["pipeline"]
+    query = translator.translate("INSERT INTO users (age, created) VALUES ('30', '2024-02-01T10:00:00Z')")
+    assert query["documents"] == [{"age": 30, "created": datetime(2024, 2, 1, 10)}]
+    try:
+        translator.translate("SELECT * FROM users WHERE age = 'abc'")
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert "users.age" in str(e)
+    # Column references and function calls are not literals
+    from sql_to_mongodb.sql_parser import SQLSyntaxError
+    for sql in ["SELECT * FROM t WHERE x = y", "DELETE FROM t USING u WHERE t.id = u.id",
+                "INSERT INTO t (a) VALUES (NOW())"]:
+        try:
+            translator.translate(sql)
+            assert False, f"expected SQLSyntaxError for {sql}"
+        except SQLSyntaxError:
+            pass
+
+def test_like_patterns_become_index_friendly_filters():
+    """Test LIKE compiles to equality, prefix ranges or escaped anchored regexes, and ILIKE to a collation."""
+    from sql_to_mongodb.output import to_mongosh
+
+    translator = SQLToMongoDBTranslator()
+
+    def where(condition):
+        return translator.translate(f"SELECT * FROM t WHERE {condition}")["filter"]
+
+    assert where("name LIKE 'a.c'") == {"name": {"$eq": "a.c"}}
+    assert where("name LIKE '100\\%'") == {"name": {"$eq": "100%"}}
+    assert where("name LIKE '100!%' ESCAPE '!'") == {"name": {"$eq": "100%"}}
+    assert where("name LIKE 'ab%' AND name LIKE 'a%'") == {"name": {"$gte": "ab", "$lt": "ac"}}
+    assert where("name NOT LIKE 'ab%'") == {"$or": [{"name": {"$lt": "ab"}}, {"name": {"$gte": "ac"}}]}
+    assert where("name LIKE 'a+_c%'") == {"name": {"$regex": "(?s)^a\\+.c"}}
+
+    query = translator.translate("SELECT * FROM t WHERE name LIKE '%smith%'")
+    assert query["filter"] == {"name": {"$regex": "smith"}}
+    assert query["text_search_candidates"] == ["name"]
+
+    query = translator.translate("SELECT * FROM t WHERE name ILIKE 'Bob%' AND age > 3")
+    assert query["filter"] == {"name": {"$gte": "bob", "$lt": "bob\uffff"}, "age": {"$gt": 3}}
+    assert query["options"]["collation"] == {"locale": "en", "strength": 2}
+    assert ".collation(" in to_mongosh(query)
+    query = translator.translate("DELETE FROM t WHERE name ILIKE 'bob'")
+    assert query["options"]["collation"]["strength"] == 2
+
+    # A case-sensitive string comparison in the same query rules out the collation
+    query = translator.translate("SELECT * FROM t WHERE name ILIKE 'Bob' AND status = 'x'")
+    assert query["filter"]["name"] == {"$regex": "(?i)^Bob$"}
+    assert "collation" not in query["options"]
+
+def test_offset_queries_page_with_keyset_tokens():
+    """Test LIMIT/OFFSET parse on both paths and keyset pages seek past the previous page."""
+    from sql_to_mongodb.sql_parser import SQLParser
+    from sql_to_mongodb.executor import QueryExecutor
+
+    slow = SQLParser(use_fast_parser=False).parse("SELECT a, b FROM users ORDER BY a DESC, b LIMIT 20, 10")
+    assert (slow.table_name, slow.columns, slow.limit, slow.offset) == ("users", ["a", "b"], 10, 20)
+    assert slow.order_by == [{"field": "a", "direction": "DESC"}, {"field": "b", "direction": "ASC"}]
+
+    translator = SQLToMongoDBTranslator()
+    sql_query = "SELECT name FROM users WHERE age > 18 ORDER BY created DESC LIMIT 2 OFFSET 4"
+    assert translator.translate(sql_query)["options"] == {"sort": {"created": -1}, "skip": 4, "limit": 2}
+
+    client = _FakeClient()
+    users = client.collection("users")
+    users.documents = [{"_id": 8, "name": "a", "created": 9}, {"_id": 7, "name": "b", "created": 5}]
+    executor = QueryExecutor("app", client=client)
+    page = executor.find_page(translator.translate_page(sql_query))
+    assert page["documents"] == [{"_id": 8, "name": "a"}, {"_id": 7, "name": "b"}]
+    assert users.find_calls[-1]["skip"] == 4
+    assert users.find_calls[-1]["sort"] == [("created", -1), ("_id", -1)]
+
+    query = translator.translate_page(sql_query.replace("OFFSET 4", "OFFSET 6"), page["next_page_token"])
+    assert "skip" not in query["options"]
+    assert query["filter"] == {"$and": [
+        {"age": {"$gt": 18}},
+        {"$or": [{"created": {"$lt": 5}}, {"created": None},
+                 {"created": 5, "_id": {"$lt": 7}}, {"created": 5, "_id": None}]}
+    ]}
+    try:
+        translator.translate_page(sql_query.replace("age > 18", "age > 21"), page["next_page_token"])
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    users.documents = users.documents[:1]
+    assert executor.find_page(query)["next_page_token"] is None
+
+    # Pages reach NULL, missing and other-typed sort keys in either direction
+    from sql_to_mongodb.evaluator import compile_query
+    from sql_to_mongodb.pagination import next_page_token
+    documents = [{"_id": 1, "created": 5}, {"_id": 2, "created": None}, {"_id": 3}, {"_id": 4, "created": 5},
+                 {"_id": 5, "created": "x"}, {"_id": 6, "created": 2.5}, {"_id": 7, "created": None}]
+    for direction in ("DESC", "ASC"):
+        sql_query = f"SELECT * FROM users ORDER BY created {direction} LIMIT 2"
+        # The same order, tiebreaker included, without paging
+        full = translator.translate_page(sql_query)
+        del full["options"]["limit"]
+        everything = compile_query(full)(documents)
+        assert len(everything) == len(documents)
+        seen, token = [], None
+        while True:
+            query = translator.translate_page(sql_query, token)
+            page = compile_query(query)(documents)
+            seen.extend(page)
+            token = next_page_token(query, page)
+            if token is None:
+                break
+        assert [document["_id"] for document in seen] == [document["_id"] for document in everything]
+
+def test_update_set_expressions_become_atomic_operators_and_bulk_batches():
+    """Test SET expressions compile to update operators, unique keys to updateOne, and updates batch."""
+    from sql_to_mongodb.batching import coalesce_updates, updates_commute
+    from sql_to_mongodb.executor import to_write_requests
+    from sql_to_mongodb.schema import SchemaRegistry
+
+    translator = SQLToMongoDBTranslator(schema=SchemaRegistry({"users": {"age": "int", "$unique": ["email"]}}))
+    query = translator.translate(
+        "UPDATE users SET views = views + 1, stock = stock - 2, price = price * 1.1, nick = NULL, "
+        "seen = NOW(), low = LEAST(low, 3), high = GREATEST(9, high), age = '31' WHERE email = 'a@b.c'"
+    )
+    assert query["update"] == {
+        "$inc": {"views": 1, "stock": -2},
+        "$mul": {"price": 1.1},
+        "$unset": {"nick": ""},
+        "$currentDate": {"seen": True},
+        "$min": {"low": 3},
+        "$max": {"high": 9},
+        "$set": {"age": 31}
+    }
+    assert query["options"] == {"multi": False}
+    assert translator.translate("UPDATE users SET age = 1 WHERE name = 'a'")["options"] == {"multi": True}
+    # SET expressions outside the grammar are syntax errors on both parser paths
+    from sql_to_mongodb.fast_parser import FastSQLParser
+    from sql_to_mongodb.sql_parser import SQLParser, SQLSyntaxError
+    fast = FastSQLParser(SQLParser().supported_operators)
+    for sql in ["UPDATE users SET views = clicks + 1", "UPDATE users SET a = 1, a = 2",
+                "UPDATE users SET a = a - ?", "UPDATE users SET a = a + 'x'"]:
+        for parse in (fast.parse, translator.translate):
+            try:
+                parse(sql)
+                assert False, f"expected SQLSyntaxError for {sql}"
+            except SQLSyntaxError:
+                pass
+
+    queries = translator.translate_batch(
+        [f"UPDATE users SET views = views + 1 WHERE _id = {i}" for i in range(3)]
+        + ["UPDATE users SET status = 'x' WHERE age > 1", "UPDATE users SET age = 2 WHERE status = 'x'"]
+    )
+    batches = list(coalesce_updates(queries))
+    # The status update commutes with the $incs by key; the age update reads status
+    assert [batch["operation"] for batch in batches] == ["bulk_update", "update"]
+    assert batches[0]["ordered"] is False
+    assert [type(request).__name__ for request in to_write_requests(batches[0])] == ["UpdateOne"] * 3 + ["UpdateMany"]
+
+    # Rewriting the pinned key can move a row into the next update's filter
+    moved = translator.translate_batch(["UPDATE t SET id = 5 WHERE id = 3", "UPDATE t SET x = 1 WHERE id = 5"])
+    assert not updates_commute(*moved)
+    assert [batch["operation"] for batch in coalesce_updates(moved)] == ["update", "update"]
+    assert [batch["operation"] for batch in coalesce_updates(list(reversed(moved)))] == ["update", "update"]
+
 if __name__ == "__main__":
     print("🧪 Testing SQL to MongoDB Translator...")
     print("=" * 50)
@@ -54,4 +806,476 @@ if __name__ == "__main__":
         print("python run_webapp.py")
         print("\nThen open: http://localhost:8000")
     else:
-        print("❌ Some tests failed. Please check the error messages above.") 
\ No newline at end of file
+        print("❌ Some tests failed. Please check the error messages above.") 
+def test_sqlite_migration_copies_tables_in_parallel_and_resumes(tmp_path):
+    """Test tables are copied in key-ordered batches and a failed run resumes from its checkpoint."""
+    import json
+    import sqlite3
+    from datetime import datetime
+    from sql_to_mongodb.migration import SQLiteSource, MemorySink, NDJSONSink, Checkpoint, migrate
+    from sql_to_mongodb.schema import SchemaRegistry
+
+    path = str(tmp_path / "shop.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, active BOOLEAN, "
+                       "joined DATE, zip INTEGER)")
+    connection.executemany("INSERT INTO users VALUES (?, ?, ?, ?, ?)",
+                           [(i, f"u{i}", i % 2, "2024-01-31", i) for i in range(1, 26)])
+    connection.execute("CREATE TABLE tags (post INTEGER, tag TEXT, PRIMARY KEY (post, tag)) WITHOUT ROWID")
+    connection.executemany("INSERT INTO tags VALUES (?, ?)", [(i // 3, f"t{i}") for i in range(10)])
+    connection.commit()
+    connection.close()
+
+    class FlakySink(MemorySink):
+        def __init__(self, fail_after):
+            super().__init__()
+            self.writes = 0
+            self.fail_after = fail_after
+
+        def write(self, collection, documents):
+            if collection == "users":
+                self.writes += 1
+                if self.writes > self.fail_after:
+                    raise ConnectionError("connection reset")
+            super().write(collection, documents)
+
+    source = SQLiteSource(path)
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    translator = SQLToMongoDBTranslator(schema=SchemaRegistry({"users": {"zip": "string"}}))
+    sink = FlakySink(fail_after=2)
+    stats = migrate(source, sink, translator, batch_size=4, workers=2, max_in_flight=1,
+                    checkpoint=Checkpoint(checkpoint_path))
+    assert stats.failed == ["users"]
+    assert stats.tables["tags"]["status"] == "done"
+    assert len(sink.collections["users"]) == 8
+
+    # Resuming reads users from the checkpointed key and skips the finished table
+    resumed = MemorySink()
+    stats = migrate(source, resumed, translator, batch_size=4, checkpoint=Checkpoint(checkpoint_path))
+    assert stats.tables["tags"]["status"] == "skipped"
+    assert stats.tables["users"]["rows"] == 25
+    assert [user["id"] for user in resumed.collections["users"]] == list(range(9, 26))
+    assert resumed.collections["users"][0] == {"id": 9, "name": "u9", "active": True,
+                                               "joined": datetime(2024, 1, 31), "zip": "9", "_id": 9}
+
+    # Compound keys become the _id and page with row values
+    ndjson = NDJSONSink(str(tmp_path / "out"))
+    migrate(source, ndjson, tables=["tags"], batch_size=3)
+    ndjson.close()
+    lines = [json.loads(line) for line in open(tmp_path / "out" / "tags.ndjson")]
+    assert len(lines) == 10
+    assert lines[0]["_id"] == {"post": 0, "tag": "t0"}
+
+    # Tables without a primary key take the rowid as _id, so a replayed batch is skipped
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE events (kind TEXT, at INTEGER)")
+    connection.executemany("INSERT INTO events VALUES (?, ?)", [("click", i % 3) for i in range(10)])
+    connection.commit()
+    connection.close()
+    events = MemorySink()
+    replay = Checkpoint()
+    replay.update("events", ["rowid"], [4], 4)
+    migrate(source, events, tables=["events"], batch_size=4, checkpoint=Checkpoint())
+    stats = migrate(source, events, tables=["events"], batch_size=4, checkpoint=replay)
+    assert stats.tables["events"]["rows"] == 10
+    assert [event["_id"] for event in events.collections["events"]] == list(range(1, 11))
+
+def test_query_log_report_translates_each_fingerprint_once():
+    """Test logs are grouped by fingerprint, weighted by calls and time, and translated once per shape."""
+    import io
+    from sql_to_mongodb.fingerprint import fingerprint, literal_skeleton
+    from sql_to_mongodb.query_log import QueryLogAnalyzer, read_query_log
+
+    slow_log = (
+        "/usr/sbin/mysqld, Version: 8.0.32. started with:\n"
+        + "".join(
+            f"# Time: 2024-01-01T10:00:0{i}Z\n# User@Host: app[app] @ localhost []  Id: 12\n"
+            f"# Query_time: {seconds}  Lock_time: 0.0 Rows_sent: 1  Rows_examined: 9\n"
+            f"SET timestamp=170410320{i};\n{sql};\n"
+            for i, (sql, seconds) in enumerate([
+                ("SELECT * FROM users WHERE id = 1", "0.5"),
+                ("SELECT * FROM users\nWHERE id = 2", "0.5"),
+                ("SELECT *  FROM users WHERE id IN (3, 4, 5)", "1.0"),
+                ("UPDATE users SET visits = visits + 1 WHERE id = 7", "2.0"),
+                ("SHOW TABLES", "0.0"),
+            ])
+        )
+    )
+    entries = list(read_query_log(io.StringIO(slow_log)))
+    assert entries[1] == ("SELECT * FROM users\nWHERE id = 2", 0.5, 1)
+
+    translator = SQLToMongoDBTranslator(cache_size=0)
+    translated = []
+    translate = translator.translate
+    translator.translate = lambda sql: translated.append(sql) or translate(sql)
+    analyzer = QueryLogAnalyzer(translator).ingest(entries)
+    report = analyzer.report()
+    assert report["summary"]["fingerprints"] == 4
+    assert report["summary"]["translated"]["time_share"] == 1.0
+    assert report["summary"]["skipped"]["fingerprints"] == 1
+    top = report["fingerprints"][0]
+    assert top["fingerprint"] == "UPDATE users SET visits = visits + ? WHERE id = ?"
+    assert top["time_share"] == 0.5
+    assert top["mongodb_shape"]["update"] == {"$inc": {"visits": "?"}}
+
+    # pg_stat_statements rows carry their own call counts and $n parameters
+    csv_export = ('queryid,query,calls,total_exec_time\n'
+                  '1,"SELECT * FROM users WHERE id = $1",1000,250\n'
+                  '2,"SELECT * FROM orders WHERE id IN ($1, $2)",10,750\n')
+    analyzer.ingest(read_query_log(io.StringIO(csv_export, newline="")))
+    report = analyzer.report()
+    users = next(row for row in report["fingerprints"] if row["fingerprint"] == "SELECT * FROM users WHERE id = ?")
+    assert users["calls"] == 1002
+    assert report["summary"]["fingerprints"] == 5
+    # Each shape was translated once, including across reports
+    assert len(translated) == 4
+
+    # Statements with the same skeleton differ only in literals
+    assert literal_skeleton("SELECT a1 FROM t WHERE x = 'it''s' AND y IN (1, 2.5)") == \
+        literal_skeleton("SELECT a1 FROM t WHERE x = 'b' AND y IN (7, 8)")
+    assert literal_skeleton("SELECT a1 FROM t") != literal_skeleton("SELECT a2 FROM t")
+    assert fingerprint("SELECT * FROM t WHERE id = $1") == "SELECT * FROM t WHERE id = ?"
+
+def test_differential_harness_matches_sqlite():
+    """Test translated queries return the rows SQLite returns, including for NULLs and missing fields."""
+    from sql_to_mongodb.differential import Dataset, DifferentialHarness
+    from sql_to_mongodb.evaluator import compile_filter, compile_query
+    from sql_to_mongodb.predicates import NEVER_MATCHES
+    from sql_to_mongodb.sql_parser import SQLParser
+
+    documents = [{"_id": 1, "a": 1}, {"_id": 2, "a": None}, {"_id": 3}, {"_id": 4, "a": [1, 2]}, {"_id": 5, "a": True}]
+    matching = lambda query_filter: [d["_id"] for d in documents if compile_filter(query_filter)(d)]
+    assert matching({"a": 1}) == [1, 4]
+    assert matching({"a": None}) == [2, 3]
+    assert matching({"a": {"$ne": 1}}) == [2, 3, 5]
+    assert matching({"a": {"$gte": 2}}) == [4]
+    query = {"operation": "find", "filter": {}, "projection": {"a": 1},
+             "options": {"sort": {"a": -1, "_id": 1}, "skip": 1, "limit": 2}}
+    assert compile_query(query)(documents) == [{"_id": 4, "a": [1, 2]}, {"_id": 1, "a": 1}]
+
+    # SQL comparisons never match NULL, so != and NOT IN exclude missing fields
+    translator = SQLToMongoDBTranslator(cache_size=0)
+    assert translator.translate("SELECT * FROM t WHERE a != 1")["filter"] == {"a": {"$nin": [1, None]}}
+
+    # Comparing with a NULL literal is unknown, even under NOT, and NULL in an IN list never matches
+    dataset = Dataset(rows=100, seed=1)
+    harness = DifferentialHarness(dataset, translator)
+    for condition, expected in [("age = NULL", NEVER_MATCHES), ("age IN (1, NULL)", {"age": {"$eq": 1}}),
+                                ("age != NULL", NEVER_MATCHES), ("age NOT IN (1, NULL)", NEVER_MATCHES),
+                                ("NOT (age < NULL)", NEVER_MATCHES),
+                                ("NOT (age IN (1, NULL) AND id > 3)", {"id": {"$lte": 3}}),
+                                ("NOT (age BETWEEN NULL AND 30)", {"age": {"$gt": 30}})]:
+        sql = f"SELECT * FROM people WHERE {condition}"
+        assert translator.translate(sql)["filter"] == expected, condition
+        assert harness.check(sql)["status"] == "match", condition
+    slow = SQLParser(use_fast_parser=False)
+    assert slow.parse("SELECT * FROM people WHERE age = NULL").where_clause == NEVER_MATCHES
+    assert slow.parse("SELECT * FROM people WHERE age IN (1, NULL)").where_clause == {"age": {"$eq": 1}}
+    report = DifferentialHarness(dataset, translator).run(300, seed=1)
+    assert (report["match"], report["mismatch"], report["error"]) == (300, 0, 0), report["failures"]
+
+    import pytest
+    pytest.importorskip("numpy")
+    report = DifferentialHarness(dataset, translator, columnar=True).run(300, seed=2)
+    assert (report["match"], report["mismatch"], report["error"]) == (300, 0, 0), report["failures"]
+
+def test_batch_explanations_pack_prompts_and_stream_over_sse():
+    """Test batch explanations cap concurrency and pack prompts, and /agent/explain/stream sends tokens as events."""
+    import asyncio
+    import json
+    import re
+    import pytest
+    pytest.importorskip("langchain")
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+    from sql_to_mongodb.agent import SQLToMongoDBAgent
+    import web.main
+
+    class FakeLLM:
+        def __init__(self):
+            self.prompts, self.active, self.peak = [], 0, 0
+
+        async def ainvoke(self, prompt):
+            self.prompts.append(prompt)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(0.01)
+            self.active -= 1
+            count = len(re.findall(r"### Query \d", prompt))
+            # Leave the last query unanswered so it is retried on its own
+            return "\n".join(f"### Query {i}\nExplained {i}" for i in range(1, count)) or "Explained alone"
+
+        async def astream(self, prompt):
+            for token in ["Find ", "on ", "users"]:
+                yield token
+
+    agent = SQLToMongoDBAgent(llm_type="ollama", translator=SQLToMongoDBTranslator(cache_size=0))
+    agent.llm = llm = FakeLLM()
+    queries = [f"SELECT * FROM t{i} WHERE a = {i}" for i in range(6)] + ["SELECT * FROM t0 WHERE a = 9", "SELEC nope"]
+    results = agent.explain_batch(queries, concurrency=2, pack_size=3)
+    assert [result["status"] for result in results] == ["success"] * 7 + ["error"]
+    assert [result["explanation"] for result in results[:3]] == ["Explained 1", "Explained 2", "Explained alone"]
+    assert results[6]["explanation"] == results[0]["explanation"]
+    # Two packed prompts plus one retry for each query a packed answer left out
+    assert len(llm.prompts) == 4 and llm.peak <= 2
+    agent.explain_batch(queries)
+    assert len(llm.prompts) == 4
+
+    web.main._agent = agent
+    try:
+        client = TestClient(web.main.app)
+        for expected in (["Find ", "on ", "users"], ["Find on users"]):
+            response = client.get("/agent/explain/stream", params={"sql_query": "SELECT * FROM users WHERE id = 1"})
+            assert response.headers["content-type"].startswith("text/event-stream")
+            events = [(block.split("\n")[0][len("event: "):], json.loads(block.split("\n")[1][len("data: "):]))
+                      for block in response.text.strip().split("\n\n")]
+            assert [data["text"] for event, data in events if event == "token"] == expected
+            assert events[-1][0] == "done"
+        response = client.get("/agent/explain/stream", params={"sql_query": "SELEC nope"})
+        assert response.text.startswith("event: error")
+    finally:
+        web.main._agent = None
+
+def test_untranslatable_where_clauses_raise_instead_of_widening_the_filter():
+    """Test WHERE conditions the translator cannot express raise instead of being dropped."""
+    import pytest
+    from sql_to_mongodb.sql_parser import SQLSyntaxError
+
+    translator = SQLToMongoDBTranslator(cache_size=0)
+    for sql in ["DELETE FROM t WHERE id IN (SELECT id FROM u)",
+                "DELETE FROM t WHERE EXISTS (SELECT 1 FROM u WHERE u.id = 1)",
+                "DELETE FROM t WHERE lower(name) = 'x'",
+                "UPDATE t SET a = 1 WHERE a = 1 OR id IN (SELECT id FROM u)",
+                "SELECT * FROM t WHERE a = 1 OR id IN (SELECT id FROM u)"]:
+        with pytest.raises(SQLSyntaxError):
+            translator.translate(sql)
+
+def test_limiters_reject_when_saturated_and_hold_slots_until_threads_finish(monkeypatch):
+    """Test /translate answers 504 on timeout and 429 while the timed-out thread still holds the slot."""
+    import time
+    import pytest
+    pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+    import web.main
+
+    limiter = web.main.ConcurrencyLimiter("translate", limit=1, max_queue=0, timeout=0.05)
+    monkeypatch.setattr(web.main, "translate_limiter", limiter)
+    monkeypatch.setattr(web.main.translator, "translate", lambda sql: time.sleep(0.3) or {"sql": sql})
+
+    with TestClient(web.main.app) as client:
+        assert client.post("/translate", data={"sql_query": "SELECT * FROM t"}).status_code == 504
+        # The translation thread cannot be interrupted, so it keeps the only slot
+        assert limiter._semaphore.locked()
+        assert client.post("/translate", data={"sql_query": "SELECT * FROM t"}).status_code == 429
+        deadline = time.monotonic() + 2
+        while limiter._semaphore.locked() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not limiter._semaphore.locked()
+
+        limiter.timeout = 5
+        response = client.post("/translate", data={"sql_query": "SELECT * FROM t"})
+        assert response.json()["mongodb_query"] == {"sql": "SELECT * FROM t"}
+
+def test_explanations_of_date_queries_serialize_their_literals():
+    """Test translations holding datetime literals can still be explained."""
+    import asyncio
+    import pytest
+    pytest.importorskip("langchain")
+    from sql_to_mongodb.agent import SQLToMongoDBAgent
+
+    class FakeLLM:
+        def __init__(self):
+            self.prompts = []
+
+        def invoke(self, prompt):
+            self.prompts.append(prompt)
+            return "Explained"
+
+        async def ainvoke(self, prompt):
+            return self.invoke(prompt)
+
+        async def astream(self, prompt):
+            yield self.invoke(prompt)
+
+    agent = SQLToMongoDBAgent(llm_type="ollama", translator=SQLToMongoDBTranslator(cache_size=0))
+    agent.llm = llm = FakeLLM()
+    sql = "SELECT * FROM t WHERE d > DATE '2024-01-01'"
+    assert agent._explain_translation(sql) == "Explained"
+    assert "2024-01-01 00:00:00" in llm.prompts[0]
+    response = agent.process_request(f"explain {sql}")
+    assert (response["status"], response["response"]) == ("success", "Explained")
+
+    async def stream():
+        return [chunk async for chunk in agent.astream_explanation("SELECT * FROM u WHERE d > DATE '2024-01-01'")]
+    assert asyncio.run(stream()) == ["Explained"]
+
+def test_batch_explanation_failures_stay_with_their_own_query():
+    """Test a query whose explanation fails does not fail the others packed with it."""
+    import pytest
+    pytest.importorskip("langchain")
+    from sql_to_mongodb.agent import SQLToMongoDBAgent
+
+    class FakeLLM:
+        def __init__(self):
+            self.prompts = []
+
+        async def ainvoke(self, prompt):
+            self.prompts.append(prompt)
+            if "broken" in prompt:
+                raise RuntimeError("model rejected the prompt")
+            return "Explained"
+
+    agent = SQLToMongoDBAgent(llm_type="ollama", translator=SQLToMongoDBTranslator(cache_size=0))
+    agent.llm = llm = FakeLLM()
+    queries = ["SELECT * FROM t WHERE a = 1", "SELECT * FROM broken WHERE a = 1",
+               "SELECT * FROM t WHERE d > DATE '2024-01-01'"]
+    results = agent.explain_batch(queries, pack_size=3)
+    assert [result["status"] for result in results] == ["success", "error", "success"]
+    assert results[1]["message"] == "model rejected the prompt"
+    # The failed pack is retried one query at a time
+    assert len(llm.prompts) == 4
+    assert [result["status"] for result in agent.explain_batch(queries, pack_size=3)] == ["success", "error", "success"]
+    assert len(llm.prompts) == 5
+
+def test_prepared_query_mixes_positional_and_named_placeholders():
+    """Test `?` and `:name` slots can share a template and bind together."""
+    import pytest
+
+    prepared = SQLToMongoDBTranslator().prepare(
+        "SELECT name FROM users WHERE age > ? AND status = :status AND score < ?")
+    assert prepared.positional_count == 2
+    assert prepared.param_names == ["status"]
+    expected = {"age": {"$gt": 18}, "status": {"$eq": "active"}, "score": {"$lt": 5}}
+    assert prepared.bind([18, 5], {"status": "active"})["filter"] == expected
+    assert prepared.bind({0: 18, 1: 5, "status": "active"})["filter"] == expected
+    with pytest.raises(ValueError, match="Missing parameters: status"):
+        prepared.bind([18, 5])
+    with pytest.raises(ValueError, match="Expected 2 positional parameters"):
+        prepared.bind({1: 5, "status": "active"})
+    with pytest.raises(ValueError, match="Expected 2 positional parameters"):
+        prepared.bind([18], {"status": "active"})
+
+def test_group_by_rejects_ungrouped_columns_and_sorts_before_projecting():
+    """Test grouped SELECT/ORDER BY fields must be grouped or aggregated, and sorting sees hidden keys."""
+    import pytest
+    from sql_to_mongodb.fast_parser import FastSQLParser
+    from sql_to_mongodb.sql_parser import SQLParser, SQLSyntaxError
+
+    fast = FastSQLParser(SQLParser().supported_operators)
+    for sql_query in ("SELECT dept, name, COUNT(*) FROM e GROUP BY dept",
+                      "SELECT dept, COUNT(*) FROM e GROUP BY dept ORDER BY name",
+                      "SELECT name FROM e ORDER BY COUNT(*)",
+                      "SELECT * FROM e GROUP BY dept"):
+        with pytest.raises(SQLSyntaxError):
+            fast.parse(sql_query)
+        with pytest.raises(SQLSyntaxError):
+            SQLToMongoDBTranslator().translate(sql_query)
+
+    pipeline = SQLToMongoDBTranslator().translate(
+        "SELECT COUNT(*) AS n FROM e GROUP BY dept ORDER BY dept, MAX(age) DESC")["pipeline"]
+    assert pipeline[-2:] == [
+        {"$sort": {"_id.dept": 1, "max_age": -1}},
+        {"$project": {"_id": 0, "n": 1}},
+    ]
+
+def test_non_string_like_patterns_are_syntax_errors():
+    """Test LIKE with a number or placeholder pattern is rejected as SQLSyntaxError on both paths."""
+    import pytest
+    from sql_to_mongodb.fast_parser import FastSQLParser
+    from sql_to_mongodb.sql_parser import SQLParser, SQLSyntaxError
+
+    fast = FastSQLParser(SQLParser().supported_operators)
+    for sql_query in ("SELECT * FROM t WHERE a LIKE 5", "SELECT * FROM t WHERE a NOT ILIKE ?"):
+        with pytest.raises(SQLSyntaxError, match="LIKE patterns must be string literals"):
+            fast.parse(sql_query)
+        with pytest.raises(SQLSyntaxError):
+            SQLToMongoDBTranslator().translate(sql_query)
+
+def test_invalid_date_literals_are_syntax_errors():
+    """Test malformed DATE/TIMESTAMP literals raise SQLSyntaxError rather than a bare ValueError."""
+    import pytest
+    from sql_to_mongodb.fast_parser import FastSQLParser
+    from sql_to_mongodb.sql_parser import SQLParser, SQLSyntaxError
+
+    fast = FastSQLParser(SQLParser().supported_operators)
+    for sql_query in ("SELECT * FROM t WHERE d < DATE '2024-13-01'",
+                      "SELECT * FROM t WHERE d BETWEEN TIMESTAMP 'noon' AND TIMESTAMP '2024-01-01 12:00:00'"):
+        with pytest.raises(SQLSyntaxError, match="Invalid (DATE|TIMESTAMP) literal"):
+            fast.parse(sql_query)
+
+def test_schema_int_coercion_keeps_large_string_values_exact():
+    """Test int/long coercion of strings parses integers exactly and still accepts '18.0'."""
+    import pytest
+    from sql_to_mongodb.schema import coerce_value
+
+    assert coerce_value("9007199254740993", "long") == 9007199254740993
+    assert coerce_value(" -42 ", "int") == -42
+    assert coerce_value("18.0", "int") == 18
+    with pytest.raises(ValueError):
+        coerce_value("18.5", "int")
+
+def test_async_executor_aggregate_passes_collation():
+    """Test the asyncio executor forwards an aggregate query's collation like the sync one."""
+    import asyncio
+    from sql_to_mongodb.executor import AsyncQueryExecutor, QueryExecutor
+
+    calls = []
+
+    class Collection:
+        def aggregate(self, pipeline, **kwargs):
+            calls.append(kwargs)
+            return iter([{"n": 1}])
+
+    class AsyncCollection:
+        async def _documents(self):
+            yield {"n": 1}
+
+        def aggregate(self, pipeline, **kwargs):
+            calls.append(kwargs)
+            return self._documents()
+
+    query = SQLToMongoDBTranslator().translate("SELECT COUNT(*) AS n FROM users")
+    query["options"]["collation"] = {"locale": "en", "strength": 2}
+    assert list(QueryExecutor("app", client={"app": {"users": Collection()}}).execute(query)) == [{"n": 1}]
+    executor = AsyncQueryExecutor("app", client={"app": {"users": AsyncCollection()}}, batch_size=50)
+    assert asyncio.run(executor.execute(query)) == [{"n": 1}]
+    assert calls[0] == {"batchSize": 1000, "collation": {"locale": "en", "strength": 2}}
+    assert calls[1] == {"batchSize": 50, "collation": {"locale": "en", "strength": 2}}
+
+def test_ndjson_output_writes_dates_as_extended_json():
+    """Test NDJSON output encodes datetimes as {"$date": ...} like the migration sink."""
+    import json
+    from sql_to_mongodb.output import to_ndjson
+
+    query = SQLToMongoDBTranslator().translate("SELECT * FROM t WHERE d < DATE '2024-01-31'")
+    assert json.loads(to_ndjson(query))["filter"] == {"d": {"$lt": {"$date": "2024-01-31T00:00:00Z"}}}
+
+def test_query_shape_keeps_sort_directions_and_boolean_options():
+    """Test query shapes tell ASC from DESC and updateOne from updateMany, but not literal values."""
+    from sql_to_mongodb.fingerprint import query_shape
+
+    translator = SQLToMongoDBTranslator()
+    shape = query_shape(translator.translate("SELECT a FROM t WHERE b = 1 ORDER BY a DESC LIMIT 5"))
+    assert shape["options"] == {"sort": {"a": -1}, "limit": "?"}
+    assert shape != query_shape(translator.translate("SELECT a FROM t WHERE b = 2 ORDER BY a LIMIT 5"))
+    assert shape == query_shape(translator.translate("SELECT a FROM t WHERE b = 2 ORDER BY a DESC LIMIT 9"))
+
+    update = translator.translate("UPDATE t SET a = 1 WHERE b = 2")
+    assert query_shape(update)["options"]["multi"] is True
+    update["options"]["multi"] = False
+    assert query_shape(update)["options"]["multi"] is False
+    assert query_shape(translator.translate("SELECT a FROM t WHERE ok = TRUE"))["filter"] == {"ok": {"$eq": "?"}}
+
+def test_evaluator_in_lists_keep_bson_type_rules():
+    """Test hashed $in/$nin lists still tell True from 1 and match null, missing fields and array elements."""
+    from sql_to_mongodb.evaluator import compile_filter
+
+    documents = [{"_id": 1, "a": 1}, {"_id": 2, "a": True}, {"_id": 3, "a": 1.0}, {"_id": 4, "a": None},
+                 {"_id": 5}, {"_id": 6, "a": ["x", 2]}, {"_id": 7, "a": "1"}, {"_id": 8, "a": {"b": 1}}]
+    matching = lambda query_filter: [d["_id"] for d in documents if compile_filter(query_filter)(d)]
+    assert matching({"a": {"$in": [1, "x"]}}) == [1, 3, 6]
+    assert matching({"a": {"$in": [True]}}) == [2]
+    assert matching({"a": {"$in": [2, None]}}) == [4, 5, 6]
+    assert matching({"a": {"$nin": [1, None]}}) == [2, 6, 7, 8]
+    assert matching({"a": {"$gt": 0, "$lt": 2}}) == [1, 3]
+    assert matching({"$or": [{"a": "1"}, {"a": 1.0}], "_id": {"$gte": 3}}) == [3, 7]
@@ -1,11 +1,22 @@
-from fastapi import FastAPI, Request, Form
+from fastapi import FastAPI, Request, Form, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse, PlainTextResponse
 from sql_to_mongodb import SQLToMongoDBTranslator
-from sql_to_mongodb.agent import SQLToMongoDBAgent
+from sql_to_mongodb.cache import SQLiteCache
+from sql_to_mongodb.dump_reader import StatementSplitter, LineSplitter
+from sql_to_mongodb.output import to_ndjson
+from sql_to_mongodb.explanations import ExplanationCache, DEFAULT_TTL
+from sql_to_mongodb.router import IntentRouter
+from sql_to_mongodb.instrumentation import PrometheusMetrics, add_hook, timed
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import asyncio
+import codecs
 import json
 import os
+import threading
+from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -19,16 +30,183 @@ static_dir = "web/static"
 if os.path.exists(static_dir):
     app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
-# Initialize the translator and agent
-translator = SQLToMongoDBTranslator()
-
-# Try to use OpenAI if API key is available, otherwise use Ollama
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if openai_api_key:
-    agent = SQLToMongoDBAgent(llm_type="openai", openai_api_key=openai_api_key)
+# Initialize the translator and agent.
+# Set TRANSLATION_CACHE_PATH to share one SQLite-backed cache across all workers,
+# and TRANSLATION_SCHEMA_PATH to a JSON file of field types to type literals with.
+cache_path = os.getenv("TRANSLATION_CACHE_PATH")
+schema_path = os.getenv("TRANSLATION_SCHEMA_PATH") or None
+if cache_path:
+    translator = SQLToMongoDBTranslator(cache=SQLiteCache(cache_path), schema=schema_path)
 else:
-    # Use Ollama (free local LLM)
-    agent = SQLToMongoDBAgent(llm_type="ollama", model_name="llama2")
+    translator = SQLToMongoDBTranslator(schema=schema_path)
+
+# Set EXPLANATION_CACHE_PATH to persist LLM explanations across restarts and workers
+explanation_cache = ExplanationCache(
+    path=os.getenv("EXPLANATION_CACHE_PATH"),
+    ttl=float(os.getenv("EXPLANATION_CACHE_TTL") or DEFAULT_TTL)
+)
+
+# Counts requests answered directly versus through the ReAct agent
+router = IntentRouter()
+
+# Per-stage timings exported on /metrics; set METRICS_ENABLED=0 to turn the
+# hooks off, which removes their overhead entirely
+metrics = PrometheusMetrics()
+if os.getenv("METRICS_ENABLED", "1") != "0":
+    add_hook(metrics)
+
+# The agent pulls in langchain, which dominates worker start-up, so it is
+# imported and built on the first /agent/* request rather than at import time
+_agent = None
+_agent_lock = threading.Lock()
+
+def _build_agent():
+    global _agent
+    with _agent_lock:
+        if _agent is None:
+            from sql_to_mongodb.agent import SQLToMongoDBAgent
+
+            # Try to use OpenAI if API key is available, otherwise use Ollama
+            openai_api_key = os.getenv("OPENAI_API_KEY")
+            if openai_api_key:
+                _agent = SQLToMongoDBAgent(llm_type="openai", openai_api_key=openai_api_key,
+                                           explanation_cache=explanation_cache, router=router,
+                                           translator=translator, executor=translate_executor)
+            else:
+                # Use Ollama (free local LLM)
+                _agent = SQLToMongoDBAgent(llm_type="ollama", model_name="llama2",
+                                           explanation_cache=explanation_cache, router=router,
+                                           translator=translator, executor=translate_executor)
+        return _agent
+
+async def get_agent():
+    """Return the agent, building it off the event loop on first use."""
+    if _agent is not None:
+        return _agent
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _build_agent)
+
+class ConcurrencyLimiter:
+    """
+    Bound the number of requests an endpoint group works on at once.
+
+    Requests beyond `limit` wait in a queue of at most `max_queue` entries;
+    once the queue is full further requests are rejected with 429. Work that
+    runs longer than `timeout` seconds fails with 504.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.waiting = 0
+        self._semaphore = None
+
+    async def acquire(self):
+        """Wait for a slot, raising 429 if the queue is full; every acquire needs a release()."""
+        # Created lazily so the semaphore binds to the server's event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            raise HTTPException(status_code=429, detail=f"Too many concurrent {self.name} requests")
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+    def release(self):
+        self._semaphore.release()
+
+    def _release_when_done(self, work):
+        if not work.cancelled():
+            work.exception()  # retrieved here, as nobody awaits it any more
+        self.release()
+
+    async def run(self, make_awaitable):
+        """
+        Run the awaitable make_awaitable() returns in a slot, raising 504 after `timeout`.
+
+        A thread cannot be interrupted, so after a timeout the slot stays taken
+        until work on the thread pool really ends; coroutines are cancelled.
+        """
+        await self.acquire()
+        try:
+            work = asyncio.ensure_future(make_awaitable())
+        except BaseException:
+            self.release()
+            raise
+        try:
+            return await asyncio.wait_for(asyncio.shield(work), self.timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail=f"{self.name} request timed out")
+        finally:
+            if work.done():
+                self.release()
+            else:
+                if isinstance(work, asyncio.Task):
+                    work.cancel()
+                work.add_done_callback(self._release_when_done)
+
+def _env_number(name: str, default, cast=int):
+    value = os.getenv(name)
+    return cast(value) if value else default
+
+# Translation runs on its own bounded thread pool so CPU work never blocks the
+# event loop, and LLM traffic on /agent/* cannot starve /translate.
+translate_executor = ThreadPoolExecutor(
+    max_workers=_env_number("TRANSLATE_WORKERS", 4),
+    thread_name_prefix="translate"
+)
+translate_limiter = ConcurrencyLimiter(
+    "translate",
+    limit=_env_number("TRANSLATE_CONCURRENCY", 8),
+    max_queue=_env_number("TRANSLATE_QUEUE", 200),
+    timeout=_env_number("TRANSLATE_TIMEOUT", 30.0, float)
+)
+batch_limiter = ConcurrencyLimiter(
+    "batch",
+    limit=_env_number("BATCH_CONCURRENCY", 2),
+    max_queue=_env_number("BATCH_QUEUE", 10),
+    timeout=_env_number("BATCH_TIMEOUT", 300.0, float)
+)
+agent_limiter = ConcurrencyLimiter(
+    "agent",
+    limit=_env_number("AGENT_CONCURRENCY", 4),
+    max_queue=_env_number("AGENT_QUEUE", 20),
+    timeout=_env_number("AGENT_TIMEOUT", 120.0, float)
+)
+
+# LLM calls one /agent/explain/batch request makes at once, and short
+# translations packed into one prompt
+explain_concurrency = _env_number("EXPLAIN_BATCH_CONCURRENCY", 4)
+explain_pack_size = _env_number("EXPLAIN_PACK_SIZE", 4)
+
+def run_translation(func, *args):
+    """Run CPU-bound translation work on the translation thread pool."""
+    loop = asyncio.get_running_loop()
+    return loop.run_in_executor(translate_executor, partial(func, *args))
+
+_route_paths = None
+
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    global _route_paths
+    if _route_paths is None:
+        _route_paths = {route.path for route in app.routes}
+    # Unknown paths share one label so scanners cannot blow up the series count
+    path = request.url.path if request.url.path in _route_paths else "other"
+    with timed("http", method=request.method, path=path) as span:
+        response = await call_next(request)
+        if span:
+            span.set(status=str(response.status_code))
+        return response
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Stage latency histograms and error counts in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
@@ -38,69 +216,272 @@ async def home(request: Request):
     )
 
 @app.post("/translate")
-async def translate_sql(sql_query: str = Form(...)):
+async def translate_sql(sql_query: str = Form(...), pagination: Optional[str] = Form(None),
+                        page_token: Optional[str] = Form(None)):
     try:
-        mongodb_query = translator.translate(sql_query)
+        if pagination == "keyset":
+            work = lambda: run_translation(translator.translate_page, sql_query, page_token)
+        else:
+            work = lambda: run_translation(translator.translate, sql_query)
+        mongodb_query = await translate_limiter.run(work)
         return {
             "status": "success",
             "mongodb_query": mongodb_query
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {
             "status": "error",
             "message": str(e)
         }
 
+@app.get("/translate/cache")
+async def translation_cache_stats():
+    """Get hit/miss/eviction statistics for the translation cache."""
+    return {
+        "status": "success",
+        "cache": translator.cache_stats()
+    }
+
 @app.post("/translate/batch")
 async def translate_batch(sql_queries: str = Form(...)):
     try:
         queries = json.loads(sql_queries)
-        mongodb_queries = translator.translate_batch(queries)
+        mongodb_queries = await batch_limiter.run(
+            lambda: run_translation(translator.translate_batch, queries)
+        )
         return {
             "status": "success",
             "mongodb_queries": mongodb_queries
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return {
             "status": "error",
             "message": str(e)
         }
 
+def _ndjson_statement(line: str) -> str:
+    value = json.loads(line)
+    if isinstance(value, dict):
+        value = value.get("sql_query")
+    if not isinstance(value, str):
+        raise ValueError('Expected a JSON string or an object with a "sql_query" field')
+    return value
+
+def _translate_stream_piece(splitter, text: str, final: bool, first_index: int, ndjson: bool):
+    """Split a piece of the request body and translate the statements it completes."""
+    lines = []
+    statements = splitter.feed(text, final)
+    for index, statement in enumerate(statements, first_index):
+        result = {"index": index}
+        try:
+            if ndjson:
+                statement = _ndjson_statement(statement)
+            result["status"] = "success"
+            result["mongodb_query"] = translator.translate(statement)
+        except Exception as e:
+            result.update(status="error", sql_query=statement, message=str(e))
+        lines.append(to_ndjson(result))
+    return len(statements), "".join(lines)
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose content reads the request body as it streams.
+
+    Starlette's disconnect listener also consumes request messages, so it is
+    held back until the content generator has finished reading the body.
+    """
+
+    def __init__(self, content, body_read: asyncio.Event, **kwargs):
+        super().__init__(content, **kwargs)
+        self.body_read = body_read
+
+    async def listen_for_disconnect(self, receive) -> None:
+        await self.body_read.wait()
+        await super().listen_for_disconnect(receive)
+
+async def _stream_translations(request: Request, splitter, ndjson: bool, body_read: asyncio.Event):
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    index = 0
+    final = False
+    body = request.stream()
+    try:
+        while not final:
+            try:
+                text = decoder.decode(await body.__anext__())
+            except StopAsyncIteration:
+                text = decoder.decode(b"", final=True)
+                final = True
+                body_read.set()
+            try:
+                count, lines = await translate_limiter.run(
+                    lambda: run_translation(_translate_stream_piece, splitter, text, final, index, ndjson)
+                )
+            except HTTPException as e:
+                # Headers are already sent, so report the failure in-band and stop
+                yield to_ndjson({"index": index, "status": "error", "message": e.detail})
+                return
+            index += count
+            if lines:
+                yield lines
+    finally:
+        body_read.set()
+
+@app.post("/translate/stream")
+async def translate_stream(request: Request, dialect: str = "mysql"):
+    """
+    Translate a request body of statements, streaming one NDJSON result per statement.
+
+    An application/x-ndjson body holds one JSON string (or {"sql_query": ...}
+    object) per line; any other body is SQL text split on semicolons using
+    the given dump dialect. Statements are translated as the body arrives and
+    results are sent as soon as they are ready, so memory stays flat however
+    large the job.
+    """
+    content_type = request.headers.get("content-type", "")
+    ndjson = "ndjson" in content_type or "jsonl" in content_type
+    try:
+        splitter = LineSplitter() if ndjson else StatementSplitter(dialect)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    body_read = asyncio.Event()
+    return BodyStreamingResponse(
+        _stream_translations(request, splitter, ndjson, body_read),
+        body_read,
+        media_type="application/x-ndjson"
+    )
+
 @app.post("/agent/process")
 async def process_agent_request(request: str = Form(...)):
     """Process a request using the agent."""
     try:
-        response = agent.process_request(request)
+        agent = await get_agent()
+        response = await agent_limiter.run(lambda: agent.aprocess_request(request))
         return response
+    except HTTPException:
+        raise
     except Exception as e:
         return {
             "status": "error",
             "message": str(e)
         }
 
+@app.get("/agent/routes")
+async def agent_route_stats():
+    """Get how many /agent/process requests took the direct path versus the agent."""
+    return {
+        "status": "success",
+        "routes": router.stats()
+    }
+
 @app.post("/agent/explain")
 async def explain_translation(sql_query: str = Form(...)):
     """Get an explanation of how a SQL query was translated to MongoDB."""
     try:
-        explanation = agent._explain_translation(sql_query)
+        agent = await get_agent()
+        explanation = await agent_limiter.run(lambda: agent._aexplain_translation(sql_query))
         return {
             "status": "success",
             "explanation": explanation
         }
+    except HTTPException:
+        raise
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+@app.post("/agent/explain/batch")
+async def explain_batch(sql_queries: str = Form(...)):
+    """Explain a JSON list of SQL queries with concurrent, packed LLM calls."""
+    try:
+        queries = json.loads(sql_queries)
+        agent = await get_agent()
+        explanations = await agent_limiter.run(
+            lambda: agent.aexplain_batch(queries, concurrency=explain_concurrency, pack_size=explain_pack_size)
+        )
+        return {
+            "status": "success",
+            "explanations": explanations
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         return {
             "status": "error",
             "message": str(e)
         }
 
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def _stream_explanation(sql_query: str):
+    try:
+        agent = await get_agent()
+        await agent_limiter.acquire()
+    except Exception as e:
+        # Headers are already sent, so failures are reported as events
+        yield _sse("error", {"message": getattr(e, "detail", str(e))})
+        return
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + agent_limiter.timeout
+    chunks = agent.astream_explanation(sql_query).__aiter__()
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), max(deadline - loop.time(), 0))
+            except StopAsyncIteration:
+                break
+            yield _sse("token", {"text": chunk})
+        yield _sse("done", {})
+    except asyncio.TimeoutError:
+        yield _sse("error", {"message": "agent request timed out"})
+    except Exception as e:
+        yield _sse("error", {"message": str(e)})
+    finally:
+        await chunks.aclose()
+        agent_limiter.release()
+
+@app.get("/agent/explain/stream")
+async def explain_translation_stream(sql_query: str):
+    """
+    Stream an explanation as Server-Sent Events while the LLM generates it.
+
+    Each "token" event carries {"text": ...}; the stream ends with a "done"
+    event, or an "error" event with {"message": ...}.
+    """
+    return StreamingResponse(
+        _stream_explanation(sql_query),
+        media_type="text/event-stream",
+        # Proxies must pass events through as they are written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/agent/explain/cache")
+async def explanation_cache_stats():
+    """Get hit-rate, LLM call and coalescing statistics for the explanation cache."""
+    return {
+        "status": "success",
+        "cache": explanation_cache.stats()
+    }
+
 @app.post("/agent/validate")
 async def validate_sql(sql_query: str = Form(...)):
     """Validate if a SQL query is valid and can be translated."""
     try:
-        validation = agent._validate_sql(sql_query)
+        agent = await get_agent()
+        validation = await translate_limiter.run(
+            lambda: run_translation(agent._validate_sql, sql_query)
+        )
         return validation
+    except HTTPException:
+        raise
     except Exception as e:
         return {
             "status": "error",
             "message": str(e)
-        } 
\ No newline at end of file
+        }